@@ -6,4 +6,20 @@ def text():
     return 'Hello, world!'
 
 
+@bobo.query('/json', content_type='application/json')
+def json():
+    return {'message': 'Hello, world!'}
+
+
+@bobo.query('/params', content_type='application/json')
+def params(name, count):
+    return {'name': name, 'count': int(count)}
+
+
+@bobo.post('/body', content_type='application/json')
+def body(bobo_request):
+    body = bobo_request.json
+    return {'name': body['name'], 'count': len(body['values'])}
+
+
 app = bobo.Application(bobo_resources=__name__)
@@ -6,3 +6,19 @@ app = bottle.Bottle()
 @app.route('/text')
 def text():
     return 'Hello, world!'
+
+
+@app.route('/json')
+def json():
+    return {'message': 'Hello, world!'}
+
+
+@app.route('/params')
+def params():
+    return {'name': bottle.request.query['name'], 'count': int(bottle.request.query['count'])}
+
+
+@app.post('/body')
+def body():
+    body = bottle.request.json
+    return {'name': body['name'], 'count': len(body['values'])}
@@ -7,6 +7,23 @@ class Root(object):
     def text(self):
         return 'Hello, world!'
 
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def json(self):
+        return {'message': 'Hello, world!'}
+
+    @cherrypy.expose
+    @cherrypy.tools.json_out()
+    def params(self, name, count):
+        return {'name': name, 'count': int(count)}
+
+    @cherrypy.expose
+    @cherrypy.tools.json_in()
+    @cherrypy.tools.json_out()
+    def body(self):
+        body = cherrypy.request.json
+        return {'name': body['name'], 'count': len(body['values'])}
+
 
 app = cherrypy.tree.mount(Root())
 cherrypy.log.screen = False
@@ -1,3 +1,5 @@
+import json
+
 import falcon
 
 
@@ -9,5 +11,27 @@ class Resource(object):
         resp.body = 'Hello, world!'
 
 
+class JSONResource(object):
+
+    def on_get(self, req, resp):
+        resp.body = json.dumps({'message': 'Hello, world!'})
+
+
+class ParamsResource(object):
+
+    def on_get(self, req, resp):
+        resp.body = json.dumps({'name': req.get_param('name'), 'count': req.get_param_as_int('count')})
+
+
+class BodyResource(object):
+
+    def on_post(self, req, resp):
+        body = json.loads(req.stream.read().decode('utf8'))
+        resp.body = json.dumps({'name': body['name'], 'count': len(body['values'])})
+
+
 app = falcon.API()
 app.add_route('/text', Resource())
+app.add_route('/json', JSONResource())
+app.add_route('/params', ParamsResource())
+app.add_route('/body', BodyResource())
@@ -6,3 +6,19 @@ app = flask.Flask(__name__)
 @app.route('/text')
 def text():
     return 'Hello, world!'
+
+
+@app.route('/json')
+def json():
+    return flask.jsonify(message='Hello, world!')
+
+
+@app.route('/params')
+def params():
+    return flask.jsonify(name=flask.request.args['name'], count=int(flask.request.args['count']))
+
+
+@app.route('/body', methods=['POST'])
+def body():
+    body = flask.request.get_json()
+    return flask.jsonify(name=body['name'], count=len(body['values']))
@@ -1,9 +1,24 @@
 import izi
 
 
-@izi.get('/text', output_format=izi.output_format.text, parse_body=False)
+@izi.get('/text', output=izi.output_format.text, parse_body=False)
 def text():
     return 'Hello, World!'
 
 
+@izi.get('/json', parse_body=False)
+def json():
+    return {'message': 'Hello, World!'}
+
+
+@izi.get('/params', parse_body=False)
+def params(name, count: izi.types.number):
+    return {'name': name, 'count': count}
+
+
+@izi.post('/body')
+def body(body):
+    return {'name': body['name'], 'count': len(body['values'])}
+
+
 app = izi.API(__name__).http.server()
@@ -0,0 +1,163 @@
+"""Load tests WSGI framework apps under identical conditions, without any external tools
+
+Each app (`izi_test`, `falcon_test`, ...) is served from a socket bound once on the loopback interface and shared
+between a number of forked worker processes, running either `wsgiref` or the keep-alive capable worker loop of
+izi's production server (`izi.prefork`). A pool of client processes then drives every scenario against it
+for a fixed duration, reporting throughput and latency percentiles.
+
+Usage:
+    python loadgen.py                                    # all apps, all scenarios
+    python loadgen.py izi_test falcon_test -d 10 -c 16   # chosen apps, 10 seconds per scenario, 16 clients
+    python loadgen.py -s json -s params -o results.json  # chosen scenarios, results saved as JSON
+    python loadgen.py --server izi --keep-alive          # izi's worker loop, clients reusing connections
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from collections import OrderedDict
+from http.client import HTTPConnection
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer
+
+APPS = ('izi_test', 'falcon_test', 'flask_test', 'bobo_test', 'cherrypy_test', 'pyramid_test', 'bottle_test')
+BODY = json.dumps({'name': 'izi', 'values': list(range(50))})
+SCENARIOS = OrderedDict((
+    ('text', ('GET', '/text', None, {}, 200)),
+    ('json', ('GET', '/json', None, {}, 200)),
+    ('params', ('GET', '/params?name=izi&count=10', None, {}, 200)),
+    ('body', ('POST', '/body', BODY, {'Content-Type': 'application/json'}, 200)),
+    ('not_found', ('GET', '/does-not-exist', None, {}, 404)),
+))
+
+
+class QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, *args, **kwargs):
+        pass
+
+
+def serve(app_name, listener, server_name='wsgiref'):
+    """Serves the named app module's WSGI `app` from an already bound and listening socket"""
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    app = importlib.import_module(app_name).app
+    if server_name == 'izi':
+        from izi.prefork import Worker
+        Worker(app, listener).run()
+        return
+
+    server = WSGIServer(listener.getsockname(), QuietHandler, bind_and_activate=False)
+    server.socket.close()
+    server.socket = listener
+    server.server_name, server.server_port = listener.getsockname()[:2]
+    server.setup_environ()
+    server.set_app(app)
+    server.serve_forever()
+
+
+def drive(arguments):
+    """Makes requests for the specified scenario until the deadline, returning all latencies and the error count"""
+    port, (method, url, body, headers, status), deadline, keep_alive = arguments
+    latencies = []
+    errors = 0
+    connection = None
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            connection = connection or HTTPConnection('127.0.0.1', port, timeout=10)
+            connection.request(method, url, body, headers)
+            response = connection.getresponse()
+            response.read()
+            if not keep_alive or response.will_close:
+                connection.close()
+                connection = None
+            if response.status != status:
+                errors += 1
+        except (OSError, ValueError):
+            errors += 1
+            connection = None
+        latencies.append(time.perf_counter() - start)
+    if connection:
+        connection.close()
+    return latencies, errors
+
+
+def percentile(ordered, percent):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))] if ordered else 0.0
+
+
+def benchmark(app_name, scenarios, workers, concurrency, duration, warmup, server_name='wsgiref', keep_alive=False):
+    """Starts the named app across worker processes, returning the results of load testing each scenario"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+    port = listener.getsockname()[1]
+
+    servers = [multiprocessing.Process(target=serve, args=(app_name, listener, server_name), daemon=True)
+               for _ in range(workers)]
+    for server in servers:
+        server.start()
+    listener.close()
+
+    results = OrderedDict()
+    try:
+        with multiprocessing.Pool(concurrency) as clients:
+            for name in scenarios:
+                scenario = SCENARIOS[name]
+                clients.map(drive, [(port, scenario, time.time() + warmup, keep_alive)] * concurrency)
+                start = time.time()
+                runs = clients.map(drive, [(port, scenario, start + duration, keep_alive)] * concurrency)
+                elapsed = time.time() - start
+
+                latencies = sorted(latency for run_latencies, _ in runs for latency in run_latencies)
+                results[name] = OrderedDict((('requests', len(latencies)),
+                                             ('errors', sum(run_errors for _, run_errors in runs)),
+                                             ('rps', len(latencies) / elapsed),
+                                             ('p50', percentile(latencies, 50)), ('p90', percentile(latencies, 90)),
+                                             ('p99', percentile(latencies, 99)),
+                                             ('max', latencies[-1] if latencies else 0.0)))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.join()
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('apps', nargs='*', default=APPS, help='App modules to benchmark. Defaults to all WSGI apps')
+    parser.add_argument('-s', '--scenario', action='append', choices=tuple(SCENARIOS.keys()),
+                        help='Scenario to run, can be given multiple times. Defaults to all')
+    parser.add_argument('-w', '--workers', type=int, default=2, help='Server worker processes per app')
+    parser.add_argument('--server', choices=('wsgiref', 'izi'), default='wsgiref',
+                        help='Server loop workers run: wsgiref, or the worker loop of the izi production server')
+    parser.add_argument('--keep-alive', action='store_true', help='Reuse client connections across requests')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='Concurrent client processes')
+    parser.add_argument('-d', '--duration', type=float, default=5, help='Seconds to run each scenario for')
+    parser.add_argument('--warmup', type=float, default=1, help='Seconds to warm up each scenario for')
+    parser.add_argument('-o', '--output', help='File to save the results to as JSON')
+    args = parser.parse_args(args)
+
+    results = OrderedDict()
+    print('{0:<16}{1:<12}{2:>10}{3:>8}{4:>10}{5:>10}{6:>10}{7:>10}'.format('app', 'scenario', 'rps', 'errors',
+                                                                        'p50 (ms)', 'p90 (ms)', 'p99 (ms)',
+                                                                        'max (ms)'))
+    for app_name in args.apps:
+        results[app_name] = benchmark(app_name, args.scenario or SCENARIOS.keys(), args.workers, args.concurrency,
+                                      args.duration, args.warmup, args.server, args.keep_alive)
+        for name, result in results[app_name].items():
+            print('{0:<16}{1:<12}{2:>10.1f}{3:>8}{4:>10.2f}{5:>10.2f}{6:>10.2f}{7:>10.2f}'.format(
+                  app_name, name, result['rps'], result['errors'], result['p50'] * 1e3, result['p90'] * 1e3,
+                  result['p99'] * 1e3, result['max'] * 1e3))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
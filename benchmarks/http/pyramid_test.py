@@ -7,9 +7,28 @@ def text(request):
     return 'Hello, World!'
 
 
+@view_config(route_name='json', renderer='json')
+def json(request):
+    return {'message': 'Hello, World!'}
+
+
+@view_config(route_name='params', renderer='json')
+def params(request):
+    return {'name': request.params['name'], 'count': int(request.params['count'])}
+
+
+@view_config(route_name='body', renderer='json', request_method='POST')
+def body(request):
+    body = request.json_body
+    return {'name': body['name'], 'count': len(body['values'])}
+
+
 config = Configurator()
 
 config.add_route('text', '/text')
+config.add_route('json', '/json')
+config.add_route('params', '/params')
+config.add_route('body', '/body')
 
 config.scan()
 app = config.make_wsgi_app()
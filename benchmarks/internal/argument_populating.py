@@ -12,10 +12,10 @@ class Timer(object):
         self.name = name
 
     def __enter__(self):
-        self.start = time.time()
+        self.start = time.perf_counter()
 
     def __exit__(self, *args):
-        print("{0} took {1}".format(self.name, time.clock() - self.start))
+        print("{0} took {1}".format(self.name, time.perf_counter() - self.start))
 
 
 def my_method(name, request=None):
@@ -0,0 +1,116 @@
+"""Benchmarks the startup time of izi tools and services, running each scenario in a fresh Python process
+
+A module defining many `@izi.cli` commands is generated in a temporary directory and then ran the same way
+`izi -f tools.py -c command_0` would, alongside a baseline of only importing izi. A module defining many versioned
+HTTP routes is generated as well, timing how long building its WSGI server takes with and without a router cache.
+
+Usage:
+    python startup.py                                # 150 commands, 10 runs per scenario
+    python startup.py --commands 500 -r 20           # a larger tool, more runs
+    python startup.py --routes 1200                  # a larger service
+    python startup.py -o results.json                # also save the results as JSON
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from statistics import mean, stdev
+
+COMMAND = '''
+@izi.cli()
+def command_{0}(name: izi.types.text, count: izi.types.number=1, ratio: izi.types.float_number=1.0,
+                kind: izi.types.one_of(('small', 'large'))='small', tags: izi.types.multiple=[], verbose=False):
+    """Command number {0}"""
+    return name
+'''
+ROUTE = '''
+@izi.get('/resource_{0}/{{item_id}}/detail', versions=1)
+def resource_{0}(item_id: izi.types.number, name: izi.types.text='izi', limit: izi.types.in_range(1, 100)=10):
+    """Resource number {0}"""
+    return item_id
+'''
+RUNNER = 'import sys, izi.development_runner; sys.argv[0] = "izi"; izi.development_runner.izi.interface.cli()'
+
+
+def write_tools(directory, commands):
+    """Writes a module defining the given number of CLI commands, returning its path"""
+    path = os.path.join(directory, 'tools.py')
+    with open(path, 'w') as tools:
+        tools.write('import izi\n')
+        tools.write(''.join(COMMAND.format(index) for index in range(commands)))
+    return path
+
+
+def write_service(directory, routes):
+    """Writes a module defining the given number of HTTP routes, returning its path"""
+    path = os.path.join(directory, 'service.py')
+    with open(path, 'w') as service:
+        service.write('import izi\n')
+        service.write(''.join(ROUTE.format(index) for index in range(routes)))
+    return path
+
+
+def server(path, cache=None):
+    """Returns the code to build the WSGI server of the service at the given path, optionally caching its router"""
+    code = 'import sys; sys.path.insert(0, {0!r}); import service; '.format(os.path.dirname(path))
+    if cache:
+        code += 'service.__izi__.http.router_cache = {0!r}; '.format(cache)
+    return [sys.executable, '-c', code + 'service.__izi__.http.server()']
+
+
+def scenarios(path, service, cache):
+    return OrderedDict((
+        ('import_izi', [sys.executable, '-c', 'import izi']),
+        ('import_tools', [sys.executable, '-c', 'import sys; sys.path.insert(0, {0!r}); import tools'.format(
+                          os.path.dirname(path))]),
+        ('list_commands', [sys.executable, '-c', RUNNER, '-f', path, '-c', 'missing']),
+        ('run_command', [sys.executable, '-c', RUNNER, '-f', path, '-c', 'command_0', 'izi']),
+        ('command_help', [sys.executable, '-c', RUNNER, '-f', path, '-c', 'command_0', '--help']),
+        ('build_server', server(service)),
+        ('build_server_cached', server(service, cache)),
+    ))
+
+
+def run(command, repeat):
+    """Runs the command the given number of times, returning the wall clock time taken by each run in seconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', type=int, default=150, help='CLI commands defined by the generated tool')
+    parser.add_argument('--routes', type=int, default=300, help='HTTP routes defined by the generated service')
+    parser.add_argument('-r', '--repeat', type=int, default=10, help='Runs per scenario')
+    parser.add_argument('-o', '--output', help='File to save the results to as JSON')
+    args = parser.parse_args(args)
+
+    results = OrderedDict()
+    with tempfile.TemporaryDirectory() as directory:
+        for name, command in scenarios(write_tools(directory, args.commands), write_service(directory, args.routes),
+                                       os.path.join(directory, 'router_cache')).items():
+            timings = run(command, args.repeat)
+            results[name] = {'min': min(timings), 'mean': mean(timings),
+                             'stdev': stdev(timings) if len(timings) > 1 else 0.0, 'repeat': args.repeat}
+
+    print('{0:<24}{1:>14}{2:>14}'.format('scenario', 'min (ms)', 'mean (ms)'))
+    for name, result in results.items():
+        print('{0:<24}{1:>14.2f}{2:>14.2f}'.format(name, result['min'] * 1e3, result['mean'] * 1e3))
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(OrderedDict((('python', platform.python_version()), ('commands', args.commands),
+                                   ('routes', args.routes), ('benchmarks', results))), output_file, indent=4)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
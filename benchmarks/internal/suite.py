@@ -0,0 +1,317 @@
+"""Benchmarks the internals of izi in-process, producing JSON results that can be compared across releases
+
+Every scenario drives the API through its WSGI server directly (using `izi.test.Client`),
+so no network, web server, or external benchmarking tool is required.
+
+Usage:
+    python suite.py                                  # run all scenarios and print the results
+    python suite.py -o results.json                  # also save the results for future comparison
+    python suite.py --compare results.json           # compare against previously saved results
+    python suite.py -s routing -s json_output        # only run the named scenarios
+"""
+import argparse
+import platform
+import sys
+import timeit
+from collections import OrderedDict
+from statistics import mean, stdev
+
+import izi
+from izi.json_module import json
+
+try:
+    import marshmallow
+except ImportError:
+    marshmallow = None
+
+api = izi.API(__name__)
+client = izi.test.Client(api, decode=False)
+SCENARIOS = OrderedDict()
+MULTIPART_BOUNDARY = 'izibenchmark'
+
+
+def scenario(function):
+    """Registers the decorated function as a benchmark scenario"""
+    SCENARIOS[function.__name__] = function
+    return function
+
+
+for index in range(50):
+    izi.get('/filler/{0}/{{value}}'.format(index), output=izi.output_format.text)(lambda value: value)
+
+
+@izi.get('/text', output=izi.output_format.text)
+def text():
+    return 'Hello, World!'
+
+
+@izi.get('/item/{item_id}/detail/{name}', output=izi.output_format.text)
+def item(item_id: izi.types.number, name):
+    return name
+
+
+@izi.get()
+def validated(number: izi.types.number, ratio: izi.types.float_number, name: izi.types.Length(1, 20),
+              tags: izi.types.comma_separated_list, kind: izi.types.OneOf(('small', 'medium', 'large')),
+              enabled: izi.types.smart_boolean=False):
+    return True
+
+
+@izi.type(extend=izi.types.number, error_text='Must be a positive number')
+def positive(value):
+    if value < 1:
+        raise ValueError('not positive')
+    return value
+
+
+@izi.type(extend=positive, exception_handlers={OverflowError: 'Too large'})
+def percentage(value):
+    if value > 100:
+        raise OverflowError('over 100')
+    return value
+
+
+@izi.get()
+def annotated(page: positive, percent: percentage, size: izi.types.in_range(1, 100)=10,
+              order: izi.types.OneOf(('asc', 'desc'))='asc'):
+    return True
+
+
+@izi.get()
+def identifiers(ids: izi.types.DelimitedList[izi.types.number]()):
+    return len(ids)
+
+
+class Point(izi.types.Schema):
+    name = izi.types.text
+    x = izi.types.float_number
+    y = izi.types.float_number
+
+
+@izi.post()
+def points(points: Point.many):
+    return points
+
+
+if marshmallow:
+    class PointSchema(marshmallow.Schema):
+        name = marshmallow.fields.String()
+        x = marshmallow.fields.Float()
+        y = marshmallow.fields.Float()
+
+    @izi.post()
+    def marshmallow_points(points: PointSchema(many=True)) -> PointSchema():
+        return points
+
+
+@izi.get(output=izi.output_format.text)
+def lookup(product_id: izi.types.multi(izi.types.number, izi.types.uuid, izi.types.text)):
+    return 'found'
+
+
+COLOURS = ['colour_{0}'.format(index) for index in range(200)]
+
+
+@izi.get()
+def enums(first: izi.types.OneOf(COLOURS), second: izi.types.OneOf(COLOURS), third: izi.types.OneOf(COLOURS),
+          size: izi.types.Mapping({'small': 1, 'medium': 2, 'large': 3}), options: izi.types.InlineDictionary()):
+    return True
+
+
+@izi.get()
+def structured():
+    return {'users': [{'id': index, 'name': 'user {0}'.format(index), 'scores': [1.5, 2.5, 3.5],
+                       'active': bool(index % 2)} for index in range(50)]}
+
+
+@izi.post(output=izi.output_format.text)
+def parsed(body):
+    return 'parsed'
+
+
+@izi.get(output=izi.output_format.text)
+def directives(izi_timer=3, izi_api_version=None, izi_module=None):
+    return 'directed'
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+@izi.get()
+def raises():
+    raise BenchmarkError('failed')
+
+
+@izi.exception(BenchmarkError)
+def handle_error(exception):
+    return {'error': str(exception)}
+
+
+@izi.cli()
+def command(number: izi.types.number, name: izi.types.text='izi'):
+    return number
+
+
+@izi.local()
+def local(number: izi.types.number, name: izi.types.text='izi'):
+    return number
+
+
+IDENTIFIERS = ','.join(str(index) for index in range(2000))
+POINTS_BODY = json.dumps({'points': [{'name': 'point {0}'.format(index), 'x': index, 'y': index / 2}
+                                     for index in range(200)]})
+JSON_BODY = json.dumps({'name': 'izi', 'values': list(range(20)), 'nested': {'key': 'value'}})
+URLENCODED_BODY = '&'.join('field_{0}=value_{0}'.format(index) for index in range(20))
+MULTIPART_BODY = ''.join('--{0}\r\nContent-Disposition: form-data; name="field_{1}"\r\n\r\nvalue_{1}\r\n'.format(
+                         MULTIPART_BOUNDARY, index) for index in range(20)) + '--{0}--\r\n'.format(MULTIPART_BOUNDARY)
+
+
+@scenario
+def hello_world():
+    client.get('/text')
+
+
+@scenario
+def routing():
+    client.get('/item/10/detail/izi')
+
+
+@scenario
+def type_validation():
+    client.get('/validated', number='10', ratio='1.5', name='izi', tags='a,b,c', kind='medium', enabled='true')
+
+
+@scenario
+def chained_types():
+    client.get('/annotated', page='3', percent='50', size='25', order='desc')
+
+
+@scenario
+def chained_type_errors():
+    client.get('/annotated', page='0', percent='500', size='250', order='up')
+
+
+@scenario
+def bulk_identifiers():
+    client.get('/identifiers', ids=IDENTIFIERS)
+
+
+@scenario
+def schema_batch():
+    client.post('/points', POINTS_BODY, headers={'content-type': 'application/json'})
+
+
+if marshmallow:
+    @scenario
+    def marshmallow_batch():
+        client.post('/marshmallow_points', POINTS_BODY, headers={'content-type': 'application/json'})
+
+
+@scenario
+def enum_validation():
+    client.get('/enums', first='colour_199', second='colour_100', third='colour_0', size='large',
+               options='|'.join('option_{0}:value'.format(index) for index in range(20)))
+
+
+@scenario
+def polymorphic_identifier():
+    client.get('/lookup', product_id='6f1c2a5e-8d14-4c55-9a0b-3e2f7c9d1b42')
+
+
+@scenario
+def json_output():
+    client.get('/structured')
+
+
+@scenario
+def json_input():
+    client.post('/parsed', JSON_BODY, headers={'content-type': 'application/json'})
+
+
+@scenario
+def urlencoded_input():
+    client.post('/parsed', URLENCODED_BODY, headers={'content-type': 'application/x-www-form-urlencoded'})
+
+
+@scenario
+def multipart_input():
+    client.post('/parsed', MULTIPART_BODY,
+                headers={'content-type': 'multipart/form-data; boundary={0}'.format(MULTIPART_BOUNDARY)})
+
+
+@scenario
+def directive_population():
+    client.get('/directives')
+
+
+@scenario
+def exception_handling():
+    client.get('/raises')
+
+
+@scenario
+def documentation_404():
+    client.get('/does_not_exist')
+
+
+@scenario
+def cli_dispatch():
+    izi.test.cli(command, 10, name='benchmark')
+
+
+@scenario
+def local_call():
+    local(10, name='benchmark')
+
+
+def run(names, number, repeat):
+    """Runs the named scenarios returning the time taken in seconds per call for each"""
+    results = OrderedDict()
+    for name in names:
+        timings = [total / number for total in timeit.repeat(SCENARIOS[name], number=number, repeat=repeat)]
+        results[name] = {'min': min(timings), 'mean': mean(timings),
+                         'stdev': stdev(timings) if len(timings) > 1 else 0.0, 'number': number, 'repeat': repeat}
+    return results
+
+
+def report(results, compare_to=None):
+    """Prints the provided results, along with the relative change against previously saved results if provided"""
+    previous = (compare_to or {}).get('benchmarks', {})
+    print('{0:<24}{1:>14}{2:>14}{3:>12}'.format('scenario', 'min (us)', 'mean (us)', 'change'))
+    for name, result in results.items():
+        change = ''
+        if name in previous:
+            change = '{0:+.1f}%'.format((result['min'] / previous[name]['min'] - 1) * 100)
+        print('{0:<24}{1:>14.2f}{2:>14.2f}{3:>12}'.format(name, result['min'] * 1e6, result['mean'] * 1e6, change))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--number', type=int, default=1000, help='Calls per timing run')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Timing runs per scenario')
+    parser.add_argument('-s', '--scenario', action='append', choices=tuple(SCENARIOS.keys()),
+                        help='Scenario to run, can be given multiple times. Defaults to all')
+    parser.add_argument('-o', '--output', help='File to save the results to as JSON')
+    parser.add_argument('--compare', help='Previously saved JSON results to compare against')
+    args = parser.parse_args(args)
+
+    for name in SCENARIOS:  # warm up caches such as the built WSGI server before timing
+        SCENARIOS[name]()
+
+    results = OrderedDict((('izi', izi.__version__), ('python', platform.python_version()),
+                           ('implementation', platform.python_implementation()),
+                           ('benchmarks', run(args.scenario or SCENARIOS.keys(), args.number, args.repeat))))
+    compare_to = None
+    if args.compare:
+        with open(args.compare) as compare_file:
+            compare_to = json.load(compare_file)
+    report(results['benchmarks'], compare_to)
+
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(results, output_file, indent=4)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
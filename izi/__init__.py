@@ -31,10 +31,14 @@ OTHER DEALINGS IN THE SOFTWARE.
 """
 from __future__ import absolute_import
 
+import sys
+from importlib import import_module
+from types import ModuleType
+
 from falcon import *
 
-from izi import (authentication, directives, exceptions, format, input_format, introspect,
-                 middleware, output_format, redirect, route, test, transform, types, use, validate)
+from izi import (authentication, concurrency, directives, exceptions, format, input_format, introspect, metrics,
+                 middleware, output_format, rate_limit, redirect, route, transform, types, validate)
 from izi._version import current
 from izi.api import API
 from izi.decorators import (context_factory, default_input_format, default_output_format, delete_context, directive,
@@ -44,9 +48,31 @@ from izi.route import (call, cli, connect, delete, exception, get, get_post, hea
                        not_found, object, options, patch, post, put, sink, static, trace)
 from izi.types import create as type
 
-from izi import development_runner # isort:skip
 from izi import defaults  # isort:skip - must be imported last for defaults to have access to all modules
 
+LAZY_MODULES = ('development_runner', 'test', 'use')
+
+
+def __getattr__(name):
+    """Imports the rarely needed submodules, such as izi.test and izi.use, the first time they are accessed"""
+    if name in LAZY_MODULES:
+        return import_module('{0}.{1}'.format(__name__, name))
+    raise AttributeError("module '{0}' has no attribute '{1}'".format(__name__, name))
+
+
+if sys.version_info < (3, 7):  # pragma: no cover - module level __getattr__ (PEP 562) is only used from 3.7
+    class LazyModule(ModuleType):
+        """Gives the izi module the attribute fallback PEP 562 provides on newer Pythons"""
+
+        def __getattr__(self, name):
+            return globals()['__getattr__'](name)
+
+    try:
+        sys.modules[__name__].__class__ = LazyModule
+    except TypeError:  # Python 3.4 does not allow changing the class of a module
+        for lazy_module in LAZY_MODULES:
+            import_module('{0}.{1}'.format(__name__, lazy_module))
+
 try:  # pragma: no cover - defaulting to uvloop if it is installed
     import uvloop
     import asyncio
@@ -21,17 +21,25 @@ OTHER DEALINGS IN THE SOFTWARE.
 """
 from __future__ import absolute_import
 
+import os
 import sys
+import traceback
 from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from distutils.util import strtobool
 from functools import partial
+from io import BytesIO
 from itertools import chain
 from types import ModuleType
+from urllib.parse import unquote, urlencode
 from wsgiref.simple_server import make_server
 
 import falcon
 import izi.defaults
+import izi.json_module
+import izi.metrics
 import izi.output_format
+import izi.router
 from falcon import HTTP_METHODS
 from izi import introspect
 from izi._async import asyncio, ensure_future
@@ -69,7 +77,8 @@ class InterfaceAPI(object):
 class HTTPInterfaceAPI(InterfaceAPI):
     """Defines the HTTP interface specific API"""
     __slots__ = ('routes', 'versions', 'base_url', '_output_format', '_input_format', 'versioned', '_middleware',
-                 '_not_found_handlers', 'sinks', '_not_found', '_exception_handlers')
+                 '_not_found_handlers', 'sinks', '_not_found', '_exception_handlers', 'revision', '_servers',
+                 'metrics', 'router_cache')
 
     def __init__(self, api, base_url=''):
         super().__init__(api)
@@ -78,6 +87,10 @@ class HTTPInterfaceAPI(InterfaceAPI):
         self.sinks = OrderedDict()
         self.versioned = OrderedDict()
         self.base_url = base_url
+        self.revision = 0
+        self._servers = {}
+        self.metrics = None
+        self.router_cache = os.environ.get('IZI_ROUTER_CACHE', None)
 
     @property
     def output_format(self):
@@ -128,11 +141,17 @@ class HTTPInterfaceAPI(InterfaceAPI):
         if self.middleware is None:
             self._middleware = []
         self.middleware.append(middleware)
+        self.changed()
 
     def add_sink(self, sink, url, base_url=""):
         base_url = base_url or self.base_url
         self.sinks.setdefault(base_url, OrderedDict())
         self.sinks[base_url][url] = sink
+        self.changed()
+
+    def changed(self):
+        """Marks the routing of this API as changed, so that servers cached by `cached_server` are rebuilt"""
+        self.revision += 1
 
     def exception_handlers(self, version=None):
         if not hasattr(self, '_exception_handlers'):
@@ -149,6 +168,7 @@ class HTTPInterfaceAPI(InterfaceAPI):
         for version in versions:
             placement = self._exception_handlers.setdefault(version, OrderedDict())
             placement[exception_type] = (error_handler, ) + placement.get(exception_type, tuple())
+        self.changed()
 
     def extend(self, http_api, route="", base_url=""):
         """Adds handlers from a different IZIR API to this one - to create a single API"""
@@ -162,6 +182,7 @@ class HTTPInterfaceAPI(InterfaceAPI):
                     for version, function in versions.items():
                         function.interface.api = self.api
                 self.routes[base_url][route + item_route] = handler
+        self.changed()
 
         for sink_base_url, sinks in http_api.sinks.items():
             for url, sink in sinks.items():
@@ -195,6 +216,7 @@ class HTTPInterfaceAPI(InterfaceAPI):
             self._not_found_handlers = {}
 
         self.not_found_handlers[version] = handler
+        self.changed()
 
     def documentation(self, base_url=None, api_version=None, prefix=""):
         """Generates and returns documentation for this API endpoint"""
@@ -253,6 +275,18 @@ class HTTPInterfaceAPI(InterfaceAPI):
         print("Serving on {0}:{1}...".format(host, port))
         httpd.serve_forever()
 
+    def prefork(self, host='', port=8000, workers=None, no_documentation=False, display_intro=True, **options):
+        """Runs the production izi server against this API: binding the port once, then serving requests from the
+           given number of worker processes (defaults to the CPU count). See `izi.prefork.Master` for the signals
+           it responds to and the additional options it accepts
+        """
+        import izi.prefork
+
+        if display_intro:
+            print(INTRO)
+
+        izi.prefork.Master(self.api, host, port, workers, no_documentation, **options).run()
+
     @staticmethod
     def base_404(request, response, *args, **kwargs):
         """Defines the base 404 handler"""
@@ -304,6 +338,110 @@ class HTTPInterfaceAPI(InterfaceAPI):
         handle_404.interface = True
         return handle_404
 
+    def batch_handler(self, max_size=50, concurrent=False, workers=None):
+        """Returns a handler that runs a list of sub-requests in-process against the routes of this API"""
+        state = {}
+
+        def invalid(error, status=400):
+            return {'status': status, 'headers': [], 'body': {'errors': {'batch': error}}}
+
+        def call(request, item):
+            if not isinstance(item, dict) or not isinstance(item.get('url', None), str):
+                return invalid('Each request must define a url')
+            if not isinstance(item.get('method', 'GET'), str):
+                return invalid('The method of a request must be a string')
+            if not isinstance(item.get('headers', None) or {}, dict):
+                return invalid('The headers of a request must be an object')
+
+            path, _, query_string = item['url'].partition('?')
+            if item.get('params', None):
+                query_string = '&'.join(filter(None, (query_string, urlencode(item['params'], True))))
+
+            environ = {key: value for key, value in request.env.items() if key not in
+                       ('CONTENT_TYPE', 'CONTENT_LENGTH', 'QUERY_STRING', 'wsgi.input')}
+            environ['izi.batch'] = True
+            body = item.get('body', None)
+            if body is None:
+                body = b''
+            elif isinstance(body, str):
+                body = body.encode('utf8')
+            elif not isinstance(body, bytes):
+                body = izi.output_format.json(body)
+                environ['CONTENT_TYPE'] = 'application/json'
+
+            for name, value in (item.get('headers', None) or {}).items():
+                name = name.upper().replace('-', '_')
+                environ[name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name] = str(value)
+            environ.update({'REQUEST_METHOD': item.get('method', 'GET').upper(), 'PATH_INFO': unquote(path),
+                            'QUERY_STRING': query_string, 'CONTENT_LENGTH': str(len(body)),
+                            'wsgi.input': BytesIO(body)})
+
+            result = {}
+
+            def start_response(status, headers, exc_info=None):
+                result['status'] = int(status.split(' ', 1)[0])
+                result['headers'] = list(headers)
+
+            content = None
+            try:
+                content = state['server'](environ, start_response)
+                data = b''.join(content)
+                content_type = next((value for name, value in result['headers'] if name.lower() == 'content-type'),
+                                    '')
+                result['body'] = izi.json_module.json.loads(data.decode('utf8')) if (
+                    data and 'application/json' in content_type) else data
+            except Exception:  # fail only this request, keeping the results of the others within the batch
+                traceback.print_exc(file=environ.get('wsgi.errors', sys.stderr))
+                return invalid('The request failed unexpectedly', 500)
+            finally:
+                if hasattr(content, 'close'):
+                    content.close()
+            return result
+
+        def batch(body, request):
+            """Runs a list of {method, url, params, headers, body} requests, returning their status, headers and body"""
+            if request.env.get('izi.batch', False):  # reached from within a batch, by whichever route resolved to it
+                raise falcon.HTTPBadRequest('Invalid Batch', 'Batches can not be nested')
+            if not isinstance(body, list):
+                raise falcon.HTTPBadRequest('Invalid Batch', 'A batch must be a list of requests')
+            if len(body) > max_size:
+                raise falcon.HTTPBadRequest('Invalid Batch',
+                                            'A batch can contain at most {0} requests'.format(max_size))
+
+            state['server'] = self.cached_server()
+            if concurrent and len(body) > 1:
+                if not 'executor' in state:
+                    state['executor'] = ThreadPoolExecutor(workers or max_size)
+                return list(state['executor'].map(partial(call, request), body))
+            return [call(request, item) for item in body]
+
+        return batch
+
+    def add_batch(self, url='/_batch', max_size=50, concurrent=False, workers=None, **route):
+        """Exposes a POST route that runs a list of sub-requests in-process, returning all results at once"""
+        batch = self.batch_handler(max_size, concurrent, workers)
+        izi.routing.URLRouter(urls=url, accept=('POST', ), api=self.api, private=True, **route)(batch)
+        return batch
+
+    def add_metrics(self, url='/_metrics', metrics=None, **route):
+        """Starts recording per endpoint latency and throughput metrics, exposing them in the Prometheus text format
+           at the given URL and as JSON at the same URL with a `.json` suffix
+        """
+        self.metrics = metrics or self.metrics or izi.metrics.Metrics()
+
+        def metrics_text():
+            """Returns the recorded per endpoint metrics in the Prometheus text format"""
+            return self.metrics.prometheus()
+
+        def metrics_json():
+            """Returns the recorded per endpoint metrics"""
+            return self.metrics
+
+        router = izi.routing.URLRouter(accept=('GET', ), api=self.api, private=True, **route)
+        router.urls(url, output=izi.output_format.text)(metrics_text)
+        router.urls(url + '.json')(metrics_json)
+        return self.metrics
+
     def version_router(self, request, response, api_version=None, versions={}, not_found=None, **kwargs):
         """Intelligently routes a request to the correct handler based on the version being requested"""
         request_version = self.determine_version(request, api_version)
@@ -315,7 +453,8 @@ class HTTPInterfaceAPI(InterfaceAPI):
 
     def server(self, default_not_found=True, base_url=None):
         """Returns a WSGI compatible API server for the given IZIR API module"""
-        falcon_api = falcon.API(middleware=self.middleware)
+        route_table = izi.router.Router(self.router_cache)
+        falcon_api = falcon.API(middleware=self.middleware, router=route_table)
         default_not_found = self.documentation_404() if default_not_found is True else None
         base_url = self.base_url if base_url is None else base_url
 
@@ -337,6 +476,7 @@ class HTTPInterfaceAPI(InterfaceAPI):
             for url, extra_sink in sinks.items():
                 falcon_api.add_sink(extra_sink, sink_base_url + url + '(?P<path>.*)')
 
+        router_types = {}
         for router_base_url, routes in self.routes.items():
             for url, methods in routes.items():
                 router = {}
@@ -348,7 +488,10 @@ class HTTPInterfaceAPI(InterfaceAPI):
                         router[method_function] = partial(self.version_router, versions=versions,
                                                           not_found=not_found_handler)
 
-                router = namedtuple('Router', router.keys())(**router)
+                router_type = router_types.get(tuple(router.keys()), None)
+                if router_type is None:
+                    router_type = router_types[tuple(router.keys())] = namedtuple('Router', router.keys())
+                router = router_type(**router)
                 falcon_api.add_route(router_base_url + url, router)
                 if self.versions and self.versions != (None, ):
                     falcon_api.add_route(router_base_url + '/v{api_version}' + url, router)
@@ -358,8 +501,19 @@ class HTTPInterfaceAPI(InterfaceAPI):
                     self.output_format({"errors": {error.title: error.description}}))
 
         falcon_api.set_error_serializer(error_serializer)
+        route_table.compile()
         return falcon_api
 
+    def cached_server(self, default_not_found=True, base_url=None):
+        """Returns a WSGI compatible API server for the given IZIR API module, reusing the last one built
+           until the routing of the API changes
+        """
+        revision, server = self._servers.get((default_not_found, base_url), (None, None))
+        if revision != self.revision:
+            server = self.server(default_not_found, base_url)
+            self._servers[(default_not_found, base_url)] = (self.revision, server)
+        return server
+
 HTTPInterfaceAPI.base_404.interface = True
 
 
@@ -522,6 +676,7 @@ class API(object, metaclass=ModuleSingleton):
             for startup_handler in self.startup_handlers:
                 if not startup_handler in async_handlers:
                     startup_handler(self)
+            self.started = True
 
     @property
     def startup_handlers(self):
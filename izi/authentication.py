@@ -23,9 +23,110 @@ from __future__ import absolute_import
 
 import base64
 import binascii
+import hmac
+import os
+from functools import lru_cache
+from hashlib import sha256
+from time import time
 
 from falcon import HTTPUnauthorized
 
+from izi import introspect
+from izi.exceptions import StoreKeyNotFound
+from izi.json_module import json
+from izi.store import InMemoryStore
+
+
+class Verifier(object):
+    """Wraps a verify_user function, resolving only once whether it should be passed the request context
+       after the provided credentials: as the `context` keyword when it has an optional parameter of that name,
+       otherwise positionally when it requires more positional arguments than the credentials given
+    """
+    __slots__ = ('verify_user', 'arguments', 'names', 'context_keyword')
+
+    def __init__(self, verify_user):
+        self.verify_user = verify_user
+        self.arguments = None
+        self.names = ()
+        self.context_keyword = False
+        if hasattr(verify_user, '__code__') and not introspect.takes_args(verify_user):
+            self.names = introspect.arguments(verify_user)[introspect.is_method(verify_user):]
+            self.arguments = len(self.names) - len(verify_user.__defaults__ or ())
+            self.context_keyword = 'context' in self.names[self.arguments:]
+
+    def __call__(self, *credentials, context=None, **kwargs):
+        if self.context_keyword:
+            return self.verify_user(*credentials, context=context, **kwargs)
+
+        if self.arguments is None:  # the signature couldn't be introspected, so resolve it by trial on first use
+            try:
+                result = self.verify_user(*credentials, **kwargs)
+                self.arguments = len(credentials)
+                return result
+            except TypeError:
+                self.arguments = len(credentials) + 1
+
+        following = self.names[len(credentials):len(credentials) + 1]
+        if self.arguments > len(credentials) and not (following and following[0] in kwargs):
+            return self.verify_user(*(credentials + (context, )), **kwargs)
+        return self.verify_user(*credentials, **kwargs)
+
+
+class CachedVerifier(Verifier):
+    """A Verifier remembering the users verified by credentials for ttl seconds, and failed attempts for failure_ttl
+       seconds, keyed by an HMAC of the credentials using secret (random for each process unless given).
+
+       Results are cached by credentials alone: the request context is not part of the key, so a verify_user
+       whose result depends on the context is called with the context of the first request only.
+    """
+    __slots__ = ('store', 'ttl', 'failure_ttl', 'secret')
+
+    def __init__(self, verify_user, ttl=300, failure_ttl=30, max_size=10000, store=None, secret=None):
+        super().__init__(verify_user)
+        self.store = InMemoryStore(max_entries=max_size) if store is None else store
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.secret = os.urandom(32) if secret is None else secret.encode('utf8') if isinstance(secret, str) else secret
+
+    def key(self, credentials):
+        """Returns the cache key for the given credentials, so they are never kept in plain text, nor as a hash that
+           could be brute-forced without the secret
+        """
+        return hmac.new(self.secret, repr(credentials).encode('utf8'), sha256).hexdigest()
+
+    def __call__(self, *credentials, context=None, **kwargs):
+        key = self.key((credentials, sorted(kwargs.items())) if kwargs else credentials)
+        try:
+            return self.store.get(key)
+        except StoreKeyNotFound:
+            pass
+
+        user = super().__call__(*credentials, context=context, **kwargs)
+        if user:
+            self.store.set(key, user, self.ttl)
+        elif self.failure_ttl:
+            self.store.set(key, False, self.failure_ttl)
+        return user
+
+    def revoke(self, *credentials, **kwargs):
+        """Removes any cached result for the given credentials, so they are verified again on next use"""
+        self.store.delete(self.key((credentials, sorted(kwargs.items())) if kwargs else credentials))
+
+
+def cached(verify_user=None, ttl=300, failure_ttl=30, max_size=10000, store=None, secret=None):
+    """Caches the results of a verify_user function, so repeated requests with the same credentials are only verified
+       once every ttl seconds. Failed attempts are remembered for failure_ttl seconds, 0 disables caching them.
+       Results are cached by credentials alone, regardless of the request context.
+
+       The store used can be any izi store whose set accepts a ttl, such as izi.store.SharedMemoryStore to
+       share the cache (and revocations) between processes. Keys are derived from the credentials using secret,
+       random for each process unless given: pass one to share the cache between processes not forked from the one
+       the verifier was created in. Can be used directly or as a decorator.
+    """
+    if verify_user is None:
+        return lambda verify_user: cached(verify_user, ttl, failure_ttl, max_size, store, secret)
+    return CachedVerifier(verify_user, ttl, failure_ttl, max_size, store, secret)
+
 
 def authenticator(function, challenges=()):
     """Wraps authentication logic, verify_user through to the authentication function.
@@ -36,6 +137,9 @@ def authenticator(function, challenges=()):
     challenges = challenges or ('{} realm="simple"'.format(function.__name__), )
 
     def wrapper(verify_user):
+        if not isinstance(verify_user, Verifier):
+            verify_user = Verifier(verify_user)
+
         def authenticate(request, response, **kwargs):
             result = function(request, response, verify_user, **kwargs)
 
@@ -84,10 +188,7 @@ def basic(request, response, verify_user, realm='simple', context=None, **kwargs
     if auth_type.lower() == 'basic':
         try:
             user_id, key = base64.decodebytes(bytes(user_and_key.strip(), 'utf8')).decode('utf8').split(':', 1)
-            try:
-                user = verify_user(user_id, key)
-            except TypeError:
-                user = verify_user(user_id, key, context)
+            user = verify_user(user_id, key, context=context)
             if user:
                 response.set_header('WWW-Authenticate', '')
                 return user
@@ -109,10 +210,7 @@ def api_key(request, response, verify_user, context=None, **kwargs):
     api_key = request.get_header('X-Api-Key')
 
     if api_key:
-        try:
-            user = verify_user(api_key)
-        except TypeError:
-            user = verify_user(api_key, context)
+        user = verify_user(api_key, context=context)
         if user:
             return user
         else:
@@ -129,10 +227,7 @@ def token(request, response, verify_user, context=None, **kwargs):
     """
     token = request.get_header('Authorization')
     if token:
-        try:
-            verified_token = verify_user(token)
-        except TypeError:
-            verified_token = verify_user(token, context)
+        verified_token = verify_user(token, context=context)
         if verified_token:
             return verified_token
         else:
@@ -140,6 +235,115 @@ def token(request, response, verify_user, context=None, **kwargs):
     return None
 
 
+@authenticator
+def bearer_token(request, response, verify_user, context=None, **kwargs):
+    """Bearer Token Authentication
+
+    Checks for the Authorization header, optionally prefixed by Bearer, and verifies using the verify_user function
+    """
+    token = request.get_header('Authorization')
+    if token:
+        if token[:7].lower() == 'bearer ':
+            token = token[7:].strip()
+        return verify_user(token, context=context) or False
+    return None
+
+
+def _base64_decode(segment):
+    return base64.urlsafe_b64decode(segment + b'=' * (-len(segment) % 4))
+
+
+def _base64_encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+@lru_cache(maxsize=256)
+def _token_header(segment):
+    """Returns the key ID of a supported signed token header segment, or False if it is unsupported.
+       Tokens signed with the same key share the same header, so parsing them is cached.
+    """
+    try:
+        header = json.loads(_base64_decode(segment).decode('utf8'))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        return False
+    if not isinstance(header, dict) or header.get('alg', None) != 'HS256':
+        return False
+    kid = header.get('kid', None)
+    return kid if kid is None or isinstance(kid, str) else False
+
+
+class SignedTokens(Verifier):
+    """Signs and verifies self-contained HMAC-SHA256 signed tokens, a subset of JSON Web Tokens using HS256.
+
+       keys is either a single secret, or a dictionary of secrets by the key ID (kid) tokens are signed with,
+       allowing keys to be rotated. Verified claims are passed to verify_user, if given, to produce the user.
+    """
+    __slots__ = ('keys', 'leeway')
+
+    def __init__(self, keys, verify_user=None, leeway=0):
+        super().__init__(verify_user or (lambda claims: claims))
+        self.keys = {kid: key.encode('utf8') if isinstance(key, str) else key for kid, key in
+                     (keys.items() if isinstance(keys, dict) else ((None, keys), ))}
+        self.leeway = leeway
+
+    def sign(self, claims, kid=None):
+        """Returns a token holding the given claims, signed by the key with the given ID"""
+        header = {'alg': 'HS256', 'typ': 'JWT'}
+        if kid is not None:
+            header['kid'] = kid
+        signing_input = b'.'.join(_base64_encode(json.dumps(part, separators=(',', ':')).encode('utf8'))
+                                  for part in (header, claims))
+        signature = hmac.new(self.keys[kid], signing_input, sha256).digest()
+        return (signing_input + b'.' + _base64_encode(signature)).decode('ascii')
+
+    def claims(self, token):
+        """Returns the claims of a validly signed token that is currently in effect, otherwise None"""
+        try:
+            header, payload, signature = token.encode('ascii').split(b'.')
+        except (UnicodeEncodeError, ValueError):
+            return None
+
+        kid = _token_header(header)
+        key = self.keys.get(kid, None) if kid is not False else None
+        if key is None:
+            return None
+
+        try:
+            if not hmac.compare_digest(hmac.new(key, header + b'.' + payload, sha256).digest(),
+                                       _base64_decode(signature)):
+                return None
+            claims = json.loads(_base64_decode(payload).decode('utf8'))
+        except (binascii.Error, ValueError, UnicodeDecodeError):
+            return None
+        if not isinstance(claims, dict):
+            return None
+
+        now = time()
+        try:
+            if 'exp' in claims and now >= float(claims['exp']) + self.leeway:
+                return None
+            if 'nbf' in claims and now < float(claims['nbf']) - self.leeway:
+                return None
+        except (TypeError, ValueError):
+            return None
+        return claims
+
+    def __call__(self, token, context=None):
+        claims = self.claims(token)
+        if claims is None:
+            return False
+        return super().__call__(claims, context=context)
+
+
+def signed_token(keys, verify_user=None, leeway=0):
+    """Signed Token Authentication
+
+    Verifies HS256 signed tokens (see SignedTokens) given in the Authorization header, storing their claims,
+    or the user returned by verify_user for them, in the request context without needing any storage lookup.
+    """
+    return bearer_token(SignedTokens(keys, verify_user, leeway))
+
+
 def verify(user, password):
     """Returns a simple verification callback that simply verifies that the users and password match that provided"""
     def verify_user(user_name, user_password):
@@ -0,0 +1,108 @@
+"""izi/concurrency.py
+
+Defines the limits on how many requests an endpoint can handle concurrently, shedding the excess
+
+Copyright (C) 2018 IZI Global
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from __future__ import absolute_import
+
+from threading import Condition
+from timeit import default_timer as python_timer
+
+
+class ConcurrencyLimit(object):
+    """Caps the number of requests in flight at once, rejecting those beyond the limit.
+
+    If `queue_timeout` is set, requests beyond the limit wait up to that many seconds for another to finish first.
+    """
+    __slots__ = ('limit', 'queue_timeout', 'in_flight', 'shed', '_condition')
+
+    def __init__(self, limit, queue_timeout=0):
+        self.limit = limit
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.shed = 0
+        self._condition = Condition()
+
+    def _available(self):
+        return self.in_flight < self.limit
+
+    def acquire(self):
+        """Returns the time the request started if it may proceed, otherwise None"""
+        with self._condition:
+            if self.in_flight >= self.limit and not (self.queue_timeout and
+                                                     self._condition.wait_for(self._available, self.queue_timeout)):
+                self.shed += 1
+                return None
+            self.in_flight += 1
+        return python_timer()
+
+    def release(self, started):
+        """Marks a request that was allowed to proceed at the given start time as finished"""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+class AdaptiveConcurrencyLimit(ConcurrencyLimit):
+    """A concurrency limit that adapts to the latency observed, using additive increase / multiplicative decrease.
+
+    While the smoothed latency stays within `tolerance` times the best seen recently, the limit grows by about one
+    each time `limit` requests complete while it is in use. Once requests slow down beyond that, the limit is cut by
+    `backoff`, at most once per round trip as requests already in flight when it was cut can't reflect it, so a
+    struggling endpoint sheds load before it exhausts every worker without collapsing on a single slow burst.
+    """
+    __slots__ = ('min_limit', 'max_limit', 'tolerance', 'backoff', 'latency', 'baseline', 'decreased')
+
+    def __init__(self, limit=10, min_limit=1, max_limit=200, tolerance=2.0, backoff=0.9, queue_timeout=0):
+        super().__init__(float(limit), queue_timeout)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.latency = None
+        self.baseline = None
+        self.decreased = None
+
+    def release(self, started):
+        latency = python_timer() - started
+        with self._condition:
+            self.latency = latency if self.latency is None else self.latency * 0.9 + latency * 0.1
+            if self.baseline is None or self.latency < self.baseline:
+                self.baseline = self.latency
+            else:  # let the baseline drift upwards slowly, so it follows lasting changes in latency
+                self.baseline += (self.latency - self.baseline) * 0.01
+
+            if self.latency > self.baseline * self.tolerance:
+                if self.decreased is None or started >= self.decreased:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.decreased = python_timer()
+            elif self.in_flight >= self.limit - 1:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+            self.in_flight -= 1
+            self._condition.notify()
+
+
+def limit(max_in_flight, queue_timeout=0):
+    """Returns the concurrency limit for the given route options: a number, 'adaptive' or a ConcurrencyLimit"""
+    if isinstance(max_in_flight, ConcurrencyLimit):
+        return max_in_flight
+    if max_in_flight == 'adaptive':
+        return AdaptiveConcurrencyLimit(queue_timeout=queue_timeout)
+    return ConcurrencyLimit(max_in_flight, queue_timeout)
@@ -47,7 +47,7 @@ def izi(file: 'A Python file that contains a IZIR API'=None, module: 'A Python m
         host: 'Interface to bind to'='', port: number=8000, no_404_documentation: boolean=False,
         manual_reload: boolean=False, interval: number=1,
         command: 'Run a command defined in the given module'=None,
-        silent: boolean=False):
+        silent: boolean=False, serve: boolean=False, workers: number=0):
     """IZIR API Development Server"""
     api_module = None
     if file and module:
@@ -74,6 +74,18 @@ def izi(file: 'A Python file that contains a IZIR API'=None, module: 'A Python m
         api.cli.commands[command]()
         return
 
+    if serve:
+        def reload():
+            for name in list(sys.modules.keys()):
+                if name not in INIT_MODULES:
+                    del(sys.modules[name])
+            if file:
+                return API(importlib.machinery.SourceFileLoader(file.split(".")[0], file).load_module())
+            return API(importlib.import_module(module))
+
+        api.http.prefork(host, port, workers or None, no_404_documentation, not silent, reload=reload)
+        return
+
     ran = False
     if not manual_reload:
         thread.start_new_thread(reload_checker, (interval, ))
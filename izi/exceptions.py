@@ -33,6 +33,10 @@ class StoreKeyNotFound(Exception):
     """Should be raised when a store key has not been found inside a store"""
 
 
+class StoreFull(Exception):
+    """Should be raised when a store has no room left for the data being set"""
+
+
 class SessionNotFound(StoreKeyNotFound):
     """Should be raised when a session ID has not been found inside a session store"""
     pass
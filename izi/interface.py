@@ -26,6 +26,7 @@ import os
 import sys
 from collections import OrderedDict
 from functools import lru_cache, partial, wraps
+from timeit import default_timer as python_timer
 
 import falcon
 from falcon import HTTP_BAD_REQUEST
@@ -34,7 +35,7 @@ import izi._empty as empty
 import izi.api
 import izi.output_format
 import izi.types as types
-from izi import introspect
+from izi import concurrency, introspect
 from izi._async import asyncio_call
 from izi.exceptions import InvalidTypeData
 from izi.format import parse_content_type
@@ -372,8 +373,25 @@ class CLI(Interface):
         super().__init__(route, function)
         self.interface.cli = self
         self.reaffirm_types = {}
-        use_parameters = list(self.interface.parameters)
+        self.context_tranforms = []
         self.additional_options = getattr(self.interface, 'arg', getattr(self.interface, 'kwarg', False))
+        self._route = route
+        self._parser = None
+        self.api.cli.commands[route.get('name', self.interface.spec.__name__)] = self
+
+    @property
+    def parser(self):
+        """The argument parser for this command, only built once the command is ran or inspected"""
+        if self._parser is None:
+            self._parser = self._build_parser(self._route)
+        return self._parser
+
+    @parser.setter
+    def parser(self, parser):
+        self._parser = parser
+
+    def _build_parser(self, route):
+        use_parameters = list(self.interface.parameters)
         if self.additional_options:
             use_parameters.append(self.additional_options)
 
@@ -388,14 +406,13 @@ class CLI(Interface):
                     self.exit_callback(message)
                 super().exit(status, message)
 
-        self.parser = CustomArgumentParser(description=route.get('doc', self.interface.spec.__doc__))
+        parser = CustomArgumentParser(description=route.get('doc', self.interface.spec.__doc__))
         if 'version' in route:
-            self.parser.add_argument('-v', '--version', action='version',
+            parser.add_argument('-v', '--version', action='version',
                                 version="{0} {1}".format(route.get('name', self.interface.spec.__name__),
                                                          route['version']))
             used_options.update(('v', 'version'))
 
-        self.context_tranforms = []
         for option in use_parameters:
 
             if option in self.directives:
@@ -448,9 +465,9 @@ class CLI(Interface):
                 kwargs.pop('action', '')
                 nargs_set = True
 
-            self.parser.add_argument(*args, **kwargs)
+            parser.add_argument(*args, **kwargs)
 
-        self.api.cli.commands[route.get('name', self.interface.spec.__name__)] = self
+        return parser
 
     @property
     def outputs(self):
@@ -558,7 +575,8 @@ class HTTP(Interface):
     """Defines the interface responsible for wrapping functions and exposing them via HTTP based on the route"""
     __slots__ = ('_params_for_outputs_state', '_params_for_invalid_outputs_state', '_params_for_transform_state',
                  '_params_for_on_invalid', 'set_status', 'response_headers', 'transform', 'input_transformations',
-                 'examples', 'wrapped', 'catch_exceptions', 'parse_body', 'private', 'on_invalid', 'inputs')
+                 'examples', 'wrapped', 'catch_exceptions', 'parse_body', 'private', 'on_invalid', 'inputs',
+                 'concurrency_limit')
     AUTO_INCLUDE = {'request', 'response'}
 
     def __init__(self, route, function, catch_exceptions=True):
@@ -569,6 +587,9 @@ class HTTP(Interface):
         self.response_headers = tuple(route.get('response_headers', {}).items())
         self.private = 'private' in route
         self.inputs = route.get('inputs', {})
+        self.concurrency_limit = None
+        if route.get('max_in_flight', None) is not None:
+            self.concurrency_limit = concurrency.limit(route['max_in_flight'], route.get('queue_timeout', None) or 0)
 
         if 'on_invalid' in route:
             self._params_for_on_invalid = introspect.takes_arguments(self.on_invalid, *self.AUTO_INCLUDE)
@@ -702,7 +723,7 @@ class HTTP(Interface):
 
         return self.interface(**parameters)
 
-    def render_content(self, content, context, request, response, **kwargs):
+    def render_content(self, content, context, request, response, timings=None, **kwargs):
         if hasattr(content, 'interface') and (content.interface is True or hasattr(content.interface, 'http')):
             if content.interface is True:
                 content(request, response, api_version=None, **kwargs)
@@ -711,7 +732,9 @@ class HTTP(Interface):
             return
 
         content = self.transform_data(content, request, response, context)
+        timings and timings.append(python_timer())
         content = self.outputs(content, **self._arguments(self._params_for_outputs, request, response))
+        timings and timings.append(python_timer())
         if hasattr(content, 'read'):
             size = None
             if hasattr(content, 'name') and os.path.isfile(content.name):
@@ -734,6 +757,15 @@ class HTTP(Interface):
         else:
             response.data = content
 
+    def render_overloaded(self, context, request, response):
+        """Sheds a request beyond the endpoint's concurrency limit, quickly responding with 503 Service Unavailable"""
+        response.status = falcon.HTTP_503
+        response.set_header('Retry-After', '1')
+        response.data = self.outputs({'errors': {'Service Unavailable': 'Too many requests are being handled by this '
+                                                                         'endpoint, please try again shortly'}},
+                                     **self._arguments(self._params_for_outputs, request, response))
+        self.api.delete_context(context)
+
     def __call__(self, request, response, api_version=None, **kwargs):
         context = self.api.context_factory(response=response, request=request, api=self.api, api_version=api_version,
                                            interface=self)
@@ -747,10 +779,20 @@ class HTTP(Interface):
         else:
             exception_types = self.api.http.exception_handlers(api_version)
             exception_types = tuple(exception_types.keys()) if exception_types else ()
+        metrics = self.api.http.metrics
+        timings = metrics and metrics.start()
+        status = None
         input_parameters = {}
+        started = None
         try:
             self.set_response_defaults(response, request)
+            if self.concurrency_limit is not None:
+                started = self.concurrency_limit.acquire()
+                if started is None:
+                    return self.render_overloaded(context, request, response)
+
             lacks_requirement = self.check_requirements(request, response, context)
+            timings and timings.append(python_timer())
             if lacks_requirement:
                 response.data = self.outputs(lacks_requirement,
                                              **self._arguments(self._params_for_outputs, request, response))
@@ -758,12 +800,16 @@ class HTTP(Interface):
                 return
 
             input_parameters = self.gather_parameters(request, response, context, api_version, **kwargs)
+            timings and timings.append(python_timer())
             errors = self.validate(input_parameters, context)
+            timings and timings.append(python_timer())
             if errors:
                 self.api.delete_context(context, errors=errors)
                 return self.render_errors(errors, request, response)
 
-            self.render_content(self.call_function(input_parameters), context, request, response, **kwargs)
+            content = self.call_function(input_parameters)
+            timings and timings.append(python_timer())
+            self.render_content(content, context, request, response, timings, **kwargs)
         except falcon.HTTPNotFound as exception:
             self.cleanup_parameters(input_parameters, exception=exception)
             self.api.delete_context(context, exception=exception)
@@ -784,13 +830,21 @@ class HTTP(Interface):
                                 handler = potential_handler
 
             if not handler:
+                status = exception.status if isinstance(exception, falcon.HTTPError) else falcon.HTTP_500
                 raise exception
 
             handler(request=request, response=response, exception=exception, **kwargs)
         except Exception as exception:
+            status = exception.status if isinstance(exception, falcon.HTTPError) else falcon.HTTP_500
             self.cleanup_parameters(input_parameters, exception=exception)
             self.api.delete_context(context, exception=exception)
             raise exception
+        finally:
+            if started is not None:
+                self.concurrency_limit.release(started)
+            if metrics:
+                metrics.observe(getattr(request, 'uri_template', None) or self.interface.name, request.method,
+                                api_version, timings, (status or response.status)[:3])
         self.cleanup_parameters(input_parameters)
         self.api.delete_context(context)
 
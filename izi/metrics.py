@@ -0,0 +1,150 @@
+"""izi/metrics.py
+
+Defines the per endpoint latency and throughput metrics izi can record for HTTP interfaces
+
+Copyright (C) 2018 IZI Global
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from __future__ import absolute_import
+
+from bisect import bisect_left
+from collections import OrderedDict
+from timeit import default_timer as python_timer
+
+PHASES = ('requirements', 'gather_parameters', 'validate', 'call', 'transform', 'output')
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram(object):
+    """A latency histogram with preallocated buckets, recording in seconds"""
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def cumulative(self):
+        """Returns (upper bound, cumulative count) pairs, ending with the infinite bucket"""
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'), ), self.counts):
+            total += count
+            yield bound, total
+
+    def __native_types__(self):
+        return OrderedDict((('count', self.count), ('sum', self.sum),
+                            ('buckets', OrderedDict(('+Inf' if bound == float('inf') else str(bound), count)
+                                                    for bound, count in self.cumulative()))))
+
+
+class EndpointMetrics(object):
+    """The metrics recorded for a single (route, method, version) combination"""
+    __slots__ = ('latency', 'phases', 'statuses')
+
+    def __init__(self, buckets=BUCKETS):
+        self.latency = Histogram(buckets)
+        self.phases = tuple(Histogram(buckets) for phase in PHASES)
+        self.statuses = {}
+
+    def __native_types__(self):
+        return OrderedDict((('statuses', self.statuses), ('latency', self.latency),
+                            ('phases', OrderedDict(zip(PHASES, self.phases)))))
+
+
+class Metrics(object):
+    """Records request counts and latency histograms per endpoint, along with the time spent in each phase of
+       handling a request.
+
+       Recording avoids locks entirely, so counts may be marginally under reported under heavy thread contention.
+    """
+    __slots__ = ('buckets', 'endpoints', 'rate_limits')
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.endpoints = {}
+        self.rate_limits = {}
+
+    @staticmethod
+    def start():
+        """Returns the list used to collect the timings of a single request"""
+        return [python_timer()]
+
+    def observe(self, route, method, version, timings, status):
+        """Records a handled request given the timings collected at the end of each phase"""
+        endpoint = self.endpoints.get((route, method, version), None)
+        if endpoint is None:
+            endpoint = self.endpoints.setdefault((route, method, version), EndpointMetrics(self.buckets))
+
+        end = python_timer()
+        endpoint.latency.observe(end - timings[0])
+        for histogram, start, finish in zip(endpoint.phases, timings, timings[1:]):
+            histogram.observe(finish - start)
+        endpoint.statuses[status] = endpoint.statuses.get(status, 0) + 1
+
+    def rate_limit(self, route, allowed):
+        """Records the decision a rate limit made for a request to the given route"""
+        key = (route, 'allowed' if allowed else 'limited')
+        self.rate_limits[key] = self.rate_limits.get(key, 0) + 1
+
+    def __native_types__(self):
+        return [OrderedDict((('route', route), ('method', method), ('version', version)),
+                            **endpoint.__native_types__()) for (route, method, version), endpoint in
+                sorted(self.endpoints.items(), key=lambda item: tuple(str(part) for part in item[0]))]
+
+    def prometheus(self):
+        """Returns all recorded metrics in the Prometheus text exposition format"""
+        requests = ['# HELP izi_requests_total Requests handled per endpoint and status',
+                    '# TYPE izi_requests_total counter']
+        latency = ['# HELP izi_request_duration_seconds Time taken to handle requests per endpoint',
+                   '# TYPE izi_request_duration_seconds histogram']
+        phases = ['# HELP izi_request_phase_duration_seconds Time taken within each phase of handling requests',
+                  '# TYPE izi_request_phase_duration_seconds histogram']
+        for endpoint in self.__native_types__():
+            labels = 'route="{0}",method="{1}",version="{2}"'.format(
+                endpoint['route'].replace('\\', '\\\\').replace('"', '\\"'), endpoint['method'],
+                '' if endpoint['version'] is None else endpoint['version'])
+            for status, count in sorted(endpoint['statuses'].items()):
+                requests.append('izi_requests_total{{{0},status="{1}"}} {2}'.format(labels, status, count))
+            latency.extend(self._histogram('izi_request_duration_seconds', labels, endpoint['latency']))
+            for phase, histogram in endpoint['phases'].items():
+                if histogram.count:
+                    phases.extend(self._histogram('izi_request_phase_duration_seconds',
+                                                  '{0},phase="{1}"'.format(labels, phase), histogram))
+        limits = []
+        if self.rate_limits:
+            limits = ['# HELP izi_rate_limit_decisions_total Requests allowed or limited by rate limits per route',
+                      '# TYPE izi_rate_limit_decisions_total counter']
+            limits.extend('izi_rate_limit_decisions_total{{route="{0}",decision="{1}"}} {2}'.format(
+                          route.replace('\\', '\\\\').replace('"', '\\"'), decision, count)
+                          for (route, decision), count in sorted(self.rate_limits.items()))
+        return '\n'.join(requests + latency + phases + limits) + '\n'
+
+    @staticmethod
+    def _histogram(name, labels, histogram):
+        for bound, count in histogram.cumulative():
+            yield '{0}_bucket{{{1},le="{2}"}} {3}'.format(name, labels, '+Inf' if bound == float('inf') else bound,
+                                                          count)
+        yield '{0}_sum{{{1}}} {2}'.format(name, labels, histogram.sum)
+        yield '{0}_count{{{1}}} {2}'.format(name, labels, histogram.count)
@@ -19,10 +19,80 @@ OTHER DEALINGS IN THE SOFTWARE.
 """
 from __future__ import absolute_import
 
+import cProfile
+import io
 import logging
+import os
+import pstats
+import random
 import re
 import uuid
+from collections import OrderedDict, deque
+from copy import deepcopy
 from datetime import datetime
+from time import time
+from timeit import default_timer as python_timer
+
+import izi
+from izi._async import coroutine
+from izi.exceptions import StoreKeyNotFound
+from izi.store import ThreadPoolStore
+
+IMMUTABLE = (str, bytes, int, float, bool, type(None))
+
+
+class Session(dict):
+    """A session dictionary keeping track of whether it has been modified since it was loaded from the store.
+
+    Changes within nested values (such as appending to a list held by the session) are found by comparing them
+    against a copy taken when the session was loaded. Values that can't be compared that way are best marked changed
+    by setting `modified` to True.
+    """
+    __slots__ = ('sid', 'modified', 'touched', 'loaded')
+
+    def __init__(self, data=(), sid=None, touched=None):
+        super().__init__(data)
+        self.sid = sid
+        self.modified = False
+        self.touched = touched
+        self.loaded = {key: deepcopy(value) for key, value in self.items() if not isinstance(value, IMMUTABLE)}
+
+    @property
+    def changed(self):
+        """Returns True if the session has been modified, including within the values it held when loaded"""
+        if not self.modified:
+            self.modified = any(key not in self or self[key] != value for key, value in self.loaded.items())
+        return self.modified
+
+    def __setitem__(self, key, value):
+        self.modified = True
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.modified = True
+        super().__delitem__(key)
+
+    def clear(self):
+        self.modified = True
+        super().clear()
+
+    def pop(self, key, *default):
+        if key in self:
+            self.modified = True
+        return super().pop(key, *default)
+
+    def popitem(self):
+        self.modified = True
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.modified = True
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        self.modified = True
+        super().update(*args, **kwargs)
 
 
 class SessionMiddleware(object):
@@ -32,18 +102,24 @@ class SessionMiddleware(object):
     and stores/restores data via a coupled store object.
 
     A session store object must implement the following methods:
-    * get(session_id) - return session data
+    * get(session_id) - return session data, raising izi.exceptions.StoreKeyNotFound if the session ID doesn't exist
     * exists(session_id) - return boolean if session ID exists or not
     * set(session_id, session_data) - save session data for given session ID
 
+    Sessions are only written to the store, and the cookie only set, when their data has been modified.
+    When 'touch_interval' is set, unmodified sessions are also written back at most once per that many seconds
+    so stores (and cookies) that expire sessions do so only after they stop being used,
+    the time of the last write is kept within the stored data under 'touched_key'.
+
     The name of the context key can be set via the 'context_name' argument.
     The cookie arguments are the same as for falcons set_cookie() function, just prefixed with 'cookie_'.
     """
     __slots__ = ('store', 'context_name', 'cookie_name', 'cookie_expires', 'cookie_max_age', 'cookie_domain',
-                 'cookie_path', 'cookie_secure', 'cookie_http_only')
+                 'cookie_path', 'cookie_secure', 'cookie_http_only', 'touch_interval', 'touched_key')
 
     def __init__(self, store, context_name='session', cookie_name='sid', cookie_expires=None, cookie_max_age=None,
-                 cookie_domain=None, cookie_path=None, cookie_secure=True, cookie_http_only=True):
+                 cookie_domain=None, cookie_path=None, cookie_secure=True, cookie_http_only=True,
+                 touch_interval=None, touched_key='_touched'):
         self.store = store
         self.context_name = context_name
         self.cookie_name = cookie_name
@@ -53,6 +129,8 @@ class SessionMiddleware(object):
         self.cookie_path = cookie_path
         self.cookie_secure = cookie_secure
         self.cookie_http_only = cookie_http_only
+        self.touch_interval = touch_interval
+        self.touched_key = touched_key
 
     def generate_sid(self):
         """Generate a UUID4 string."""
@@ -63,24 +141,106 @@ class SessionMiddleware(object):
             the request context.
         """
         sid = request.cookies.get(self.cookie_name, None)
-        data = {}
+        data = None
         if sid is not None:
-            if self.store.exists(sid):
+            try:
                 data = self.store.get(sid)
-        request.context.update({self.context_name: data})
+            except StoreKeyNotFound:
+                pass
+        self._inject(request, sid, data)
 
     def process_response(self, request, response, resource):
-        """Save request context in coupled store object. Set cookie containing a session ID."""
-        sid = request.cookies.get(self.cookie_name, None)
-        if sid is None or not self.store.exists(sid):
+        """Save request context in coupled store object if modified. Set cookie containing a session ID."""
+        session = request.context.get(self.context_name, None)
+        if not isinstance(session, Session):  # the session has been replaced entirely
+            sid = request.cookies.get(self.cookie_name, None)
+            session = self._replaced(session, sid if sid is not None and self.store.exists(sid) else None)
+
+        changes = self._changes(session)
+        if changes:
+            self.store.set(*changes)
+            self._set_cookie(response, changes[0])
+
+    def _inject(self, request, sid, data):
+        """Injects the session loaded for sid into the request context, starting a new one if data is None"""
+        session = None
+        if data is not None:
+            data = dict(data)
+            touched = data.pop(self.touched_key, None) if self.touch_interval else None
+            session = Session(data, sid, touched)
+        request.context[self.context_name] = Session() if session is None else session
+
+    @staticmethod
+    def _replaced(data, sid):
+        session = Session(data or {}, sid)
+        session.modified = True
+        return session
+
+    def _changes(self, session):
+        """Returns the (session ID, data) that needs to be written to the store for the session, if any"""
+        now = time()
+        sid = session.sid
+        if sid is None:
+            if not (session.modified and session):
+                return None
             sid = self.generate_sid()
+        elif not session.changed and (not self.touch_interval or
+                                       now - (session.touched or 0) < self.touch_interval):
+            return None
 
-        self.store.set(sid, request.context.get(self.context_name, {}))
+        data = dict(session)
+        if self.touch_interval:
+            data[self.touched_key] = now
+        return sid, data
+
+    def _set_cookie(self, response, sid):
         response.set_cookie(self.cookie_name, sid, expires=self.cookie_expires, max_age=self.cookie_max_age,
                             domain=self.cookie_domain, path=self.cookie_path, secure=self.cookie_secure,
                             http_only=self.cookie_http_only)
 
 
+class AsyncSessionMiddleware(SessionMiddleware):
+    """Session middleware for stores implementing the async store protocol (aget, aexists, aset) alongside the
+    synchronous one, such as izi.store.AsyncInMemoryStore. Synchronous stores are wrapped in an
+    izi.store.ThreadPoolStore automatically.
+
+    Servers running requests within an event loop await `process_request_async` and `process_response_async`, so
+    waiting on the store never blocks the loop. The standard hooks, called by izi's own (WSGI) server from a worker
+    thread outside of any event loop, use the synchronous store methods just like SessionMiddleware.
+    """
+    __slots__ = ()
+
+    def __init__(self, store, *args, **kwargs):
+        if not hasattr(store, 'aget'):
+            store = ThreadPoolStore(store)
+        super().__init__(store, *args, **kwargs)
+
+    @coroutine
+    def process_request_async(self, request, response):
+        """Get session ID from cookie, await loading its session from the store and inject it into the context"""
+        sid = request.cookies.get(self.cookie_name, None)
+        data = None
+        if sid is not None:
+            try:
+                data = yield from self.store.aget(sid)
+            except StoreKeyNotFound:
+                pass
+        self._inject(request, sid, data)
+
+    @coroutine
+    def process_response_async(self, request, response, resource):
+        """Await saving the session to the store if modified. Set cookie containing a session ID."""
+        session = request.context.get(self.context_name, None)
+        if not isinstance(session, Session):
+            sid = request.cookies.get(self.cookie_name, None)
+            session = self._replaced(session, sid if sid is not None and (yield from self.store.aexists(sid)) else None)
+
+        changes = self._changes(session)
+        if changes:
+            yield from self.store.aset(*changes)
+            self._set_cookie(response, changes[0])
+
+
 class LogMiddleware(object):
     """A middleware that logs all incoming requests and outgoing responses that make their way through the API"""
     __slots__ = ('logger', )
@@ -110,53 +270,174 @@ class CORSMiddleware(object):
 
     Adds appropriate Access-Control-* headers to the HTTP responses returned from the izi API,
     especially for HTTP OPTIONS responses used in CORS preflighting.
+
+    The API's routes are compiled into a single matcher along with the methods allowed for each,
+    recompiled only when the routes of the API change.
     """
-    __slots__ = ('api', 'allow_origins', 'allow_credentials', 'max_age')
+    __slots__ = ('api', 'allow_origins', 'allow_credentials', 'max_age', '_any_origin', '_credentials', '_revision',
+                 '_exact', '_matchers', '_templates')
 
     def __init__(self, api, allow_origins: list=['*'], allow_credentials: bool=True, max_age: int=None):
         self.api = api
-        self.allow_origins = allow_origins
+        self.allow_origins = frozenset(allow_origins)
         self.allow_credentials = allow_credentials
-        self.max_age = max_age
+        self.max_age = str(max_age) if max_age else None
+        self._any_origin = '*' in self.allow_origins
+        self._credentials = str(allow_credentials).lower()
+        self._revision = None
+
+    def _compile(self):
+        """Compiles every route of the API into a single regular expression, along with the methods each allows"""
+        http = self.api.http
+        templates = []
+        patterns = []
+        self._exact = {}
+        for base_url, routes in http.routes.items():
+            for route, handlers in routes.items():
+                template = (route, ', '.join(sorted(set(handlers.keys()) | {'OPTIONS'})))
+                self._exact[base_url + route] = template
+                patterns.append('(?P<route{0}>{1}(?:/v\\d+)?{2})'.format(
+                                len(templates), re.escape(base_url),
+                                re.sub(r'\\{[^{}]+\\}', '[^/]+', re.escape(route))))
+                templates.append(template)
+
+        self._templates = tuple(templates)
+        self._matchers = tuple(re.compile('^(?:{0})/?$'.format('|'.join(patterns[offset:offset + 99])))
+                               for offset in range(0, len(patterns), 99))  # Python < 3.5 allows only 100 groups
+        self._revision = http.revision
+
+    def _route(self, reqpath):
+        """Returns the (route, allowed methods) matching the request path, or None if it doesn't match any route"""
+        if self._revision != self.api.http.revision:
+            self._compile()
+
+        exact = self._exact.get(reqpath, None)
+        if exact is not None:
+            return exact
+
+        for matcher in self._matchers:
+            match = matcher.match(reqpath)
+            if match:
+                return self._templates[int(match.lastgroup[5:])]
+        return None
 
     def match_route(self, reqpath):
         """Match a request with parameter to it's corresponding route"""
-        route_dicts = [routes for _, routes in self.api.http.routes.items()][0]
-        routes = [route for route, _ in route_dicts.items()]
-        if reqpath not in routes:
-            for route in routes:  # replace params in route with regex
-                reqpath = re.sub('^(/v\d*/?)', '/', reqpath)
-                base_url = getattr(self.api.http, 'base_url', '')
-                reqpath = reqpath.replace(base_url, '', 1) if base_url else reqpath
-                if re.match(re.sub(r'/{[^{}]+}', '/[\w-]+', route) + '$', reqpath):
-                    return route
-
-        return reqpath
+        route = self._route(reqpath)
+        return route[0] if route else reqpath
 
     def process_response(self, request, response, resource):
         """Add CORS headers to the response"""
-        response.set_header('Access-Control-Allow-Credentials', str(self.allow_credentials).lower())
+        response.set_header('Access-Control-Allow-Credentials', self._credentials)
 
         origin = request.get_header('ORIGIN')
-        if origin and (origin in self.allow_origins) or ('*' in self.allow_origins):
+        if origin and (self._any_origin or origin in self.allow_origins):
             response.set_header('Access-Control-Allow-Origin', origin)
+            response.append_header('Vary', 'Origin')
 
-        if request.method == 'OPTIONS': # check if we are handling a preflight request
-            allowed_methods = set(
-                method
-                for _, routes in self.api.http.routes.items()
-                for method, _ in routes[self.match_route(request.path)].items()
-            )
-            allowed_methods.add('OPTIONS')
+        if request.method == 'OPTIONS':  # check if we are handling a preflight request
+            route = self._route(request.path)
+            allowed_methods = route[1] if route else 'OPTIONS'
 
             # return allowed methods
-            response.set_header('Access-Control-Allow-Methods', ', '.join(allowed_methods))
-            response.set_header('Allow', ', '.join(allowed_methods))
+            response.set_header('Access-Control-Allow-Methods', allowed_methods)
+            response.set_header('Allow', allowed_methods)
 
             # get all requested headers and echo them back
             requested_headers = request.get_header('Access-Control-Request-Headers')
             response.set_header('Access-Control-Allow-Headers', requested_headers or '')
+            if requested_headers:
+                response.append_header('Vary', 'Access-Control-Request-Headers')
 
             # return valid caching time
             if self.max_age:
                 response.set_header('Access-Control-Max-Age', self.max_age)
+
+
+class ProfileMiddleware(object):
+    """A middleware that profiles a sampled fraction of requests, as well as slow ones, keeping the most recent
+       profiles for review
+
+    Requests are profiled using cProfile from the moment they enter izi until the response has been formatted.
+    The profiles of a `sample_rate` fraction of requests are kept, as are those of any request taking at least
+    `threshold` seconds when one is set. As a request can't be known to be slow until it finishes, setting a
+    `threshold` profiles every request. Profiles are kept within a ring buffer holding the last `keep` of them.
+    These can be rendered using `report`, written out as pstats files using `dump`, or reviewed over HTTP by passing
+    in an `api` to register private routes on at `url`.
+    """
+    __slots__ = ('sample_rate', 'threshold', 'profiles', 'sort', 'context_name', 'url')
+
+    def __init__(self, sample_rate=0.01, threshold=None, keep=20, sort='cumulative', api=None, url='/_profiles',
+                 context_name='_profile'):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.profiles = deque(maxlen=keep)
+        self.sort = sort
+        self.context_name = context_name
+        self.url = None
+        if api is not None:
+            self.add_routes(api, url)
+
+    def process_request(self, request, response):
+        """Starts profiling the request if it has been sampled, or if it may turn out to be slow"""
+        if self.url and (request.path == self.url or request.path.startswith(self.url + '/')):
+            return
+
+        sampled = self.sample_rate >= 1 or random.random() < self.sample_rate
+        if sampled or self.threshold is not None:
+            profile = cProfile.Profile()
+            request.context[self.context_name] = (profile, python_timer(), sampled)
+            profile.enable()
+
+    def process_response(self, request, response, resource):
+        """Stops profiling the request, keeping the profile if it was sampled or took longer than the threshold"""
+        profile, start, sampled = request.context.pop(self.context_name, (None, None, False))
+        if profile is None:
+            return
+
+        profile.disable()
+        duration = python_timer() - start
+        if sampled or (self.threshold is not None and duration >= self.threshold):
+            self.profiles.append(OrderedDict((('method', request.method), ('path', request.path),
+                                              ('status', response.status), ('duration', duration),
+                                              ('time', datetime.utcnow()), ('profile', profile))))
+
+    def summary(self):
+        """Returns the details of all kept profiles, most recent first"""
+        return [OrderedDict((key, value) for key, value in profile.items() if key != 'profile') for
+                profile in reversed(self.profiles)]
+
+    def report(self, index=0, limit=40):
+        """Returns the pstats report of the kept profile at the given index, where 0 is the most recent"""
+        output = io.StringIO()
+        pstats.Stats(self.profiles[-1 - index]['profile'], stream=output).sort_stats(self.sort).print_stats(limit)
+        return output.getvalue()
+
+    def dump(self, directory):
+        """Writes all kept profiles to the given directory as pstats files, returning the written file paths"""
+        paths = []
+        for profile in self.profiles:
+            path = os.path.join(directory, '{0}-{1}{2}.pstats'.format(profile['time'].strftime('%Y%m%d%H%M%S%f'),
+                                                                      profile['method'],
+                                                                      re.sub(r'[^\w-]+', '_', profile['path'])))
+            profile['profile'].dump_stats(path)
+            paths.append(path)
+        return paths
+
+    def add_routes(self, api, url='/_profiles'):
+        """Exposes the kept profiles as private routes on the provided api, without profiling requests to them"""
+        self.url = url
+
+        def profiles():
+            """Returns the details of the most recently kept profiles, most recent first"""
+            return self.summary()
+
+        def profile_report(index: izi.types.number, limit: izi.types.number=40):
+            """Returns the pstats report for the kept profile at the given index, where 0 is the most recent"""
+            if not 0 <= index < len(self.profiles):
+                raise izi.HTTPNotFound()
+            return self.report(index, limit)
+
+        router = izi.routing.URLRouter(accept=('GET', ), api=api, private=True)
+        router.urls(url)(profiles)
+        router.urls(url + '/{index}', output=izi.output_format.text)(profile_report)
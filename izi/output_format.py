@@ -38,11 +38,6 @@ from izi import introspect
 from izi.format import camelcase, content_type
 from izi.json_module import json as json_converter
 
-try:
-    import numpy
-except ImportError:
-    numpy = False
-
 IMAGE_TYPES = ('png', 'jpg', 'bmp', 'eps', 'gif', 'im', 'jpeg', 'msp', 'pcx', 'ppm', 'spider', 'tiff', 'webp', 'xbm',
                'cur', 'dcx', 'fli', 'flc', 'gbr', 'gd', 'ico', 'icns', 'imt', 'iptc', 'naa', 'mcidas', 'mpo', 'pcd',
                'psd', 'sgi', 'tga', 'wal', 'xpm', 'svg', 'svg+xml')
@@ -51,6 +46,7 @@ VIDEO_TYPES = (('flv', 'video/x-flv'), ('mp4', 'video/mp4'), ('m3u8', 'applicati
                ('3gp', 'video/3gpp'), ('mov', 'video/quicktime'), ('avi', 'video/x-msvideo'), ('wmv', 'video/x-ms-wmv'))
 RE_ACCEPT_QUALITY = re.compile("q=(?P<quality>[^;]+)")
 json_converters = {}
+numpy_converters = []
 stream = tempfile.NamedTemporaryFile if 'UWSGI_ORIGINAL_PROC_NAME' in os.environ else BytesIO
 
 
@@ -58,6 +54,9 @@ def _json_converter(item):
     if hasattr(item, '__native_types__'):
         return item.__native_types__()
 
+    if type(item).__module__ == 'numpy' and not numpy_converters:
+        _register_numpy_converters()
+
     for kind, transformer in json_converters.items():
         if isinstance(item, kind):
             return transformer(item)
@@ -90,7 +89,10 @@ def json_convert(*kinds):
     return register_json_converter
 
 
-if numpy:
+def _register_numpy_converters():
+    """Registers the JSON converters for numpy types, only once a numpy value needs to be converted"""
+    import numpy
+
     @json_convert(numpy.ndarray, numpy.int_)
     def numpy_listable(item):
         return item.tolist()
@@ -103,6 +105,8 @@ if numpy:
     def numpy_floatable(item):
         return float(item)
 
+    numpy_converters.extend((numpy_listable, numpy_stringable, numpy_floatable))
+
 
 @content_type('application/json; charset=utf-8')
 def json(content, request=None, response=None, ensure_ascii=False, **kwargs):
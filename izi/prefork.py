@@ -0,0 +1,618 @@
+"""izi/prefork.py
+
+Defines the production izi server: a master process that binds the listening socket once and forks worker processes
+that each serve the API from it using a keep-alive capable WSGI loop
+
+Copyright (C) 2018 IZI Global
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from __future__ import absolute_import
+
+import os
+import random
+import select
+import selectors
+import signal
+import socket
+import sys
+import time
+import traceback
+from email.utils import formatdate
+from io import BytesIO
+from urllib.parse import unquote, urlsplit
+
+MAX_HEAD = 65536
+MAX_CHUNKED_BODY = 16 * 1024 * 1024
+BOOT_ERROR = 3
+NO_BODY = ('204', '304')
+BAD_REQUEST = b'HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\nConnection: close\r\n\r\n'
+SERVER_ERROR = (b'HTTP/1.1 500 Internal Server Error\r\nContent-Type: text/plain\r\nContent-Length: 21\r\n'
+                b'Connection: close\r\n\r\nInternal Server Error')
+MASTER_SIGNALS = ('SIGTERM', 'SIGINT', 'SIGQUIT', 'SIGHUP', 'SIGTTIN', 'SIGTTOU', 'SIGCHLD')
+
+
+class Connection(object):
+    """A client connection, buffering the data received from it, optionally until an overall deadline"""
+    __slots__ = ('socket', 'address', 'buffer', 'active', 'deadline')
+
+    def __init__(self, client, address):
+        self.socket = client
+        self.address = address
+        self.buffer = bytearray()
+        self.active = time.monotonic()
+        self.deadline = None
+
+    def receive(self):
+        if self.deadline is not None:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                raise socket.timeout('timed out')
+            self.socket.settimeout(remaining)
+        data = self.socket.recv(65536)
+        if not data:
+            raise EOFError('Connection closed by the client')
+        self.buffer += data
+
+    def read(self, size):
+        while len(self.buffer) < size:
+            self.receive()
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def readline(self, limit=MAX_HEAD):
+        start = 0
+        end = self.buffer.find(b'\n')
+        while end == -1:
+            if len(self.buffer) > limit:
+                raise ValueError('Line too long')
+            start = len(self.buffer)
+            self.receive()
+            end = self.buffer.find(b'\n', start)
+        return self.read(end + 1)
+
+    def read_head(self):
+        """Returns the request line followed by the header lines of the next request"""
+        while self.buffer[:2] == b'\r\n':
+            del self.buffer[:2]
+        end = self.buffer.find(b'\r\n\r\n')
+        while end == -1:
+            if len(self.buffer) > MAX_HEAD:
+                raise ValueError('Request head too large')
+            start = max(len(self.buffer) - 3, 0)
+            self.receive()
+            end = self.buffer.find(b'\r\n\r\n', start)
+        head = bytes(self.buffer[:end])
+        del self.buffer[:end + 4]
+        return head.split(b'\r\n')
+
+    def close(self):
+        try:
+            self.socket.close()
+        except OSError:
+            pass
+
+
+class Body(object):
+    """The `wsgi.input` of a request, reading at most its content length from the connection"""
+    __slots__ = ('connection', 'remaining')
+
+    def __init__(self, connection, length):
+        self.connection = connection
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        if not size:
+            return b''
+        self.remaining -= size
+        return self.connection.read(size)
+
+    def readline(self, size=-1):
+        limit = self.remaining if size is None or size < 0 else min(size, self.remaining)
+        buffer = self.connection.buffer
+        end = buffer.find(b'\n', 0, limit)
+        while end == -1 and len(buffer) < limit:
+            self.connection.receive()
+            end = buffer.find(b'\n', 0, limit)
+        return self.read(limit if end == -1 else end + 1)
+
+    def readlines(self, hint=-1):
+        return list(self)
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def drain(self):
+        while self.read(65536):
+            pass
+
+
+class Response(object):
+    """Writes the response to a single request, framing its body so the connection can be kept alive"""
+    __slots__ = ('connection', 'version', 'keep_alive', 'head_only', 'status', 'headers', 'sent', 'chunked',
+                 'body_allowed')
+
+    def __init__(self, connection, version, keep_alive, head_only):
+        self.connection = connection
+        self.version = version
+        self.keep_alive = keep_alive
+        self.head_only = head_only
+        self.status = None
+        self.headers = None
+        self.sent = False
+        self.chunked = False
+        self.body_allowed = False
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info:
+            try:
+                if self.sent:
+                    raise exc_info[1].with_traceback(exc_info[2])
+            finally:
+                exc_info = None
+        elif self.status is not None:
+            raise AssertionError('start_response was already called')
+        self.status = status
+        self.headers = headers
+        return self.write
+
+    def head(self, length=None):
+        """Returns the encoded status line and headers, deciding how the body will be framed"""
+        if self.status is None:
+            raise AssertionError('start_response was never called')
+        code = self.status[:3]
+        self.body_allowed = not (self.head_only or code in NO_BODY or code[0] == '1')
+        lines = ['HTTP/1.1 {0}'.format(self.status)]
+        has_length = False
+        for name, value in self.headers:
+            lowered = name.lower()
+            if lowered == 'content-length':
+                has_length = True
+            elif lowered == 'connection' and value.lower() == 'close':
+                self.keep_alive = False
+            lines.append('{0}: {1}'.format(name, value))
+        if not has_length and code not in NO_BODY and code[0] != '1':
+            if length is not None:
+                lines.append('Content-Length: {0}'.format(length))
+            elif self.version == 'HTTP/1.1':
+                self.chunked = True
+                lines.append('Transfer-Encoding: chunked')
+            else:
+                self.keep_alive = False
+        lines.append('Date: {0}'.format(formatdate(usegmt=True)))
+        if not self.keep_alive:
+            lines.append('Connection: close')
+        elif self.version == 'HTTP/1.0':
+            lines.append('Connection: keep-alive')
+        self.sent = True
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    def write(self, data):
+        if not self.sent:
+            self.connection.socket.sendall(self.head())
+        if data and self.body_allowed:
+            if self.chunked:
+                data = b''.join(('{0:x}\r\n'.format(len(data)).encode('latin-1'), data, b'\r\n'))
+            self.connection.socket.sendall(data)
+
+    def send(self, result):
+        """Sends the iterable returned by the WSGI app, in a single write when it contains only one chunk"""
+        if not self.sent and isinstance(result, (list, tuple)) and len(result) <= 1:
+            data = result[0] if result else b''
+            head = self.head(len(data))
+            self.connection.socket.sendall(head + data if self.body_allowed else head)
+            return
+
+        for data in result:
+            if data:
+                self.write(data)
+        if not self.sent:
+            self.connection.socket.sendall(self.head(0))
+        elif self.chunked and self.body_allowed:
+            self.connection.socket.sendall(b'0\r\n\r\n')
+
+
+class Worker(object):
+    """Serves a WSGI app to the connections accepted from a listening socket shared with other workers.
+
+       Requests are handled one at a time, while idle connections are kept open (for up to `keep_alive` seconds) to
+       be reused by the clients that made them, without tying up the worker.
+    """
+    __slots__ = ('app', 'listener', 'keep_alive', 'timeout', 'alive', 'environ', 'selector')
+
+    def __init__(self, app, listener, keep_alive=5, timeout=30):
+        self.app = app
+        self.listener = listener
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.alive = True
+        self.selector = None
+        host, port = listener.getsockname()[:2]
+        self.environ = {'SERVER_NAME': host, 'SERVER_PORT': str(port), 'SCRIPT_NAME': '',
+                        'SERVER_SOFTWARE': 'izi', 'wsgi.version': (1, 0), 'wsgi.url_scheme': 'http',
+                        'wsgi.errors': sys.stderr, 'wsgi.multithread': False, 'wsgi.multiprocess': True,
+                        'wsgi.run_once': False}
+
+    def stop(self, *args):
+        """Stops accepting connections, exiting once the request being handled (if any) is complete"""
+        self.alive = False
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        for name in ('SIGINT', 'SIGHUP', 'SIGTTIN', 'SIGTTOU'):
+            signal.signal(getattr(signal, name), signal.SIG_IGN)
+
+        master = os.getppid()
+        self.listener.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        try:
+            while self.alive and os.getppid() == master:
+                try:
+                    events = self.selector.select(1)
+                except InterruptedError:
+                    continue
+                for key, _ in events:
+                    if key.fileobj is self.listener:
+                        self.accept()
+                    else:
+                        self.serve(key.data)
+                self.expire()
+        finally:
+            for key in list(self.selector.get_map().values()):
+                if key.data is not None:
+                    key.data.close()
+            self.selector.close()
+
+    def accept(self):
+        try:
+            client, address = self.listener.accept()
+        except (BlockingIOError, InterruptedError):
+            return
+        client.settimeout(self.timeout)
+        if client.family in (socket.AF_INET, socket.AF_INET6):
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = Connection(client, address)
+        self.selector.register(client, selectors.EVENT_READ, connection)
+
+    def serve(self, connection):
+        """Handles the requests waiting on a connection, returning it to the idle connections if kept alive"""
+        self.selector.unregister(connection.socket)
+        try:
+            keep_alive = self.handle(connection)
+            while keep_alive and connection.buffer and self.alive:
+                keep_alive = self.handle(connection)
+        except (OSError, EOFError):
+            keep_alive = False
+
+        if keep_alive and self.alive:
+            connection.active = time.monotonic()
+            self.selector.register(connection.socket, selectors.EVENT_READ, connection)
+        else:
+            connection.close()
+
+    def expire(self):
+        """Closes connections that have been idle for longer than the keep alive timeout"""
+        expired = time.monotonic() - self.keep_alive
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None and key.data.active < expired:
+                self.selector.unregister(key.fileobj)
+                key.data.close()
+
+    def handle(self, connection):
+        """Handles a single request from the connection, returning True if the connection should be kept alive"""
+        try:
+            environ, body, version = self.parse(connection)
+        except ValueError:
+            connection.socket.sendall(BAD_REQUEST)
+            return False
+
+        connection_header = environ.get('HTTP_CONNECTION', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = 'close' not in connection_header
+        else:
+            keep_alive = 'keep-alive' in connection_header
+        response = Response(connection, version, keep_alive and self.alive, environ['REQUEST_METHOD'] == 'HEAD')
+
+        result = None
+        try:
+            result = self.app(environ, response.start_response)
+            response.send(result)
+        except (OSError, EOFError):
+            raise
+        except Exception:
+            traceback.print_exc()
+            if not response.sent:
+                connection.socket.sendall(SERVER_ERROR)
+            return False
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        if response.keep_alive:
+            body.drain()
+        return response.keep_alive
+
+    def parse(self, connection):
+        """Parses the next request from the connection, returning its WSGI environ, body, and HTTP version.
+
+           The head, and any chunked body buffered with it, have to be received within `timeout` seconds in total,
+           so clients sending them a little at a time can't hold on to the worker.
+        """
+        connection.deadline = time.monotonic() + self.timeout
+        try:
+            return self.read_request(connection)
+        finally:
+            connection.deadline = None
+            connection.socket.settimeout(self.timeout)
+
+    def read_request(self, connection):
+        lines = connection.read_head()
+        request_line = lines[0].decode('latin-1').split()
+        if len(request_line) != 3 or not request_line[2].startswith('HTTP/1.'):
+            raise ValueError('Invalid request line')
+        method, target, version = request_line
+
+        if not target.startswith('/') and '://' in target:
+            parts = urlsplit(target)
+            path, query = parts.path or '/', parts.query
+        else:
+            path, _, query = target.partition('?')
+
+        environ = self.environ.copy()
+        environ['REQUEST_METHOD'] = method
+        environ['PATH_INFO'] = unquote(path, 'latin-1')
+        environ['QUERY_STRING'] = query
+        environ['SERVER_PROTOCOL'] = version
+        environ['REMOTE_ADDR'] = connection.address[0] if isinstance(connection.address, tuple) else ''
+        for line in lines[1:]:
+            name, separator, value = line.partition(b':')
+            if not separator or not name or name.rstrip() != name:
+                raise ValueError('Invalid header')
+            name = name.decode('latin-1').upper().replace('-', '_')
+            value = value.strip().decode('latin-1')
+            if name in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                environ[name] = value
+            else:
+                name = 'HTTP_' + name
+                environ[name] = environ[name] + ',' + value if name in environ else value
+
+        if environ.get('HTTP_EXPECT', '').lower() == '100-continue' and version == 'HTTP/1.1':
+            connection.socket.sendall(b'HTTP/1.1 100 Continue\r\n\r\n')
+
+        if 'chunked' in environ.get('HTTP_TRANSFER_ENCODING', '').lower():
+            data = self.read_chunked(connection)
+            environ['CONTENT_LENGTH'] = str(len(data))
+            environ['wsgi.input'] = BytesIO(data)
+            return environ, Body(connection, 0), version
+
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+        if length < 0:
+            raise ValueError('Invalid content length')
+        environ['wsgi.input'] = body = Body(connection, length)
+        return environ, body, version
+
+    @staticmethod
+    def read_chunked(connection, limit=MAX_CHUNKED_BODY):
+        """Reads a request body sent using the chunked transfer encoding, of at most limit bytes"""
+        data = BytesIO()
+        while True:
+            size = int(connection.readline().split(b';', 1)[0].strip(), 16)
+            if size < 0:
+                raise ValueError('Invalid chunk size')
+            if not size:
+                break
+            if data.tell() + size > limit:
+                raise ValueError('Request body too large')
+            data.write(connection.read(size))
+            connection.read(2)
+        while connection.readline().strip():
+            pass
+        return data.getvalue()
+
+
+class Master(object):
+    """Binds the listening socket once, then keeps the requested number of worker processes serving the API from it,
+       replacing any worker that dies. Every worker builds its own server, running the API's startup handlers.
+
+       Signals:
+         - TERM, INT: stop gracefully, letting workers finish the requests they are handling
+         - QUIT: stop immediately
+         - HUP: reload gracefully, replacing every worker with a new one (using the API returned by `reload`, if given)
+         - TTIN, TTOU: add or remove a worker
+    """
+    __slots__ = ('api', 'host', 'port', 'workers', 'no_documentation', 'reload', 'backlog', 'keep_alive', 'timeout',
+                 'graceful_timeout', 'listener', 'children', 'generation', 'signals', 'wakeup', 'failed')
+
+    def __init__(self, api, host='', port=8000, workers=None, no_documentation=False, reload=None, backlog=2048,
+                 keep_alive=5, timeout=30, graceful_timeout=30):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.no_documentation = no_documentation
+        self.reload = reload
+        self.backlog = backlog
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.graceful_timeout = graceful_timeout
+        self.listener = None
+        self.children = {}
+        self.generation = 0
+        self.signals = []
+        self.wakeup = None
+        self.failed = False
+
+    def bind(self):
+        listener = socket.socket(socket.AF_INET6 if ':' in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind((self.host, self.port))
+        listener.listen(self.backlog)
+        return listener
+
+    def run(self):
+        """Serves the API until stopped by a signal"""
+        self.listener = self.bind()
+        self.wakeup = socket.socketpair()
+        for endpoint in self.wakeup:
+            endpoint.setblocking(False)
+        for name in MASTER_SIGNALS:
+            signal.signal(getattr(signal, name), self.signal)
+
+        host, port = self.listener.getsockname()[:2]
+        print("Serving on {0}:{1} with {2} workers...".format(host, port, self.workers), flush=True)
+        graceful = True
+        try:
+            graceful = self.manage()
+        finally:
+            self.stop(graceful)
+            for name in MASTER_SIGNALS:
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+            for endpoint in self.wakeup:
+                endpoint.close()
+            self.listener.close()
+        if self.failed:
+            print("A worker failed to boot, stopping", file=sys.stderr)
+            sys.exit(BOOT_ERROR)
+
+    def signal(self, signum, frame):
+        self.signals.append(signum)
+        try:
+            self.wakeup[1].send(b'.')
+        except OSError:
+            pass
+
+    def manage(self):
+        """Keeps the workers running and responds to signals, returning whether stopping should be graceful"""
+        while True:
+            self.reap()
+            if self.failed:
+                return False
+            self.spawn()
+
+            try:
+                select.select([self.wakeup[0]], [], [], 1)
+                while self.wakeup[0].recv(1024):
+                    pass
+            except (OSError, InterruptedError):
+                pass
+
+            while self.signals:
+                signum = self.signals.pop(0)
+                if signum in (signal.SIGTERM, signal.SIGINT):
+                    return True
+                elif signum == signal.SIGQUIT:
+                    return False
+                elif signum == signal.SIGHUP:
+                    self.restart()
+                elif signum == signal.SIGTTIN:
+                    self.workers += 1
+                elif signum == signal.SIGTTOU:
+                    self.workers = max(self.workers - 1, 1)
+
+    def restart(self):
+        """Replaces every worker with a new one, letting the old workers finish the requests they are handling"""
+        if self.reload:
+            try:
+                self.api = self.reload()
+            except Exception:
+                traceback.print_exc()
+                return
+
+        self.generation += 1
+        self.spawn()
+
+    def spawn(self):
+        """Forks workers until the current generation has the requested number, retiring any others"""
+        current = sorted(pid for pid, generation in self.children.items() if generation == self.generation)
+        for _ in range(self.workers - len(current)):
+            self.fork()
+
+        retiring = [pid for pid, generation in self.children.items() if generation not in (None, self.generation)]
+        retiring.extend(current[self.workers:])
+        for pid in retiring:
+            self.children[pid] = None
+            self.kill(pid, signal.SIGTERM)
+
+    def fork(self):
+        pid = os.fork()
+        if pid:
+            self.children[pid] = self.generation
+            return
+
+        code = 1
+        try:
+            for name in MASTER_SIGNALS:
+                signal.signal(getattr(signal, name), signal.SIG_DFL)
+            for endpoint in self.wakeup:
+                endpoint.close()
+            random.seed()
+            try:
+                app = self.api.http.server(None if self.no_documentation else True)
+            except Exception:
+                traceback.print_exc()
+                code = BOOT_ERROR
+            else:
+                Worker(app, self.listener, self.keep_alive, self.timeout).run()
+                code = 0
+        except Exception:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    def reap(self):
+        """Collects the exit status of all workers that have stopped"""
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if not pid:
+                return
+            if self.children.pop(pid, None) is not None and os.WIFEXITED(status) and \
+                    os.WEXITSTATUS(status) == BOOT_ERROR:
+                self.failed = True
+
+    @staticmethod
+    def kill(pid, signum):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def stop(self, graceful=True):
+        """Stops all workers, giving them up to `graceful_timeout` seconds to finish handling requests if graceful"""
+        for pid in self.children:
+            self.kill(pid, signal.SIGTERM if graceful else signal.SIGKILL)
+
+        deadline = time.monotonic() + (self.graceful_timeout if graceful else 1)
+        while self.children and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.05)
+
+        for pid in list(self.children):
+            self.kill(pid, signal.SIGKILL)
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.children.clear()
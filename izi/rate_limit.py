@@ -0,0 +1,140 @@
+"""izi/rate_limit.py
+
+Defines requirements limiting the rate at which HTTP endpoints can be called
+
+Copyright (C) 2018 IZI Global
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from __future__ import absolute_import
+
+from math import ceil
+from time import time
+
+import falcon
+
+from izi.store import InMemoryStore
+
+KEYS = {'route': lambda request: getattr(request, 'uri_template', None) or request.path,
+        'ip': lambda request: request.remote_addr,
+        'user': lambda request: str(request.context.get('user', None))}
+
+
+class TokenBucket(object):
+    """Allows bursts of up to `burst` requests, refilled at a steady `rate` requests every `per` seconds"""
+    __slots__ = ('capacity', 'refill', 'ttl')
+
+    def __init__(self, rate, per=1.0, burst=None):
+        self.capacity = float(burst or rate)
+        self.refill = rate / per
+        self.ttl = max(per, self.capacity / self.refill)  # once a bucket has fully refilled it can be forgotten
+
+    def __call__(self, state, now):
+        """Returns the new (tokens, last update, seconds to wait) state given the previous one"""
+        tokens = self.capacity if state is None else min(self.capacity, state[0] + (now - state[1]) * self.refill)
+        if tokens >= 1:
+            return (tokens - 1, now, 0.0)
+        return (tokens, now, (1 - tokens) / self.refill)
+
+    def __repr__(self):
+        return 'token_bucket({0}/s, burst={1})'.format(self.refill, self.capacity)
+
+
+class SlidingWindow(object):
+    """Allows up to `limit` requests within any `window` seconds.
+
+    Approximates a sliding log by weighting the count of the previous fixed window by how much of it
+    still overlaps the sliding window, so only two counters are kept per key.
+    """
+    __slots__ = ('limit', 'window', 'ttl')
+
+    def __init__(self, limit, window=60.0):
+        self.limit = limit
+        self.window = window
+        self.ttl = window * 2
+
+    def __call__(self, state, now):
+        """Returns the new (window start, count, previous count, seconds to wait) state given the previous one"""
+        start = now - now % self.window
+        if state is None or state[0] < start - self.window:
+            count = previous = 0
+        elif state[0] < start:
+            count, previous = 0, state[1]
+        else:
+            count, previous = state[1], state[2]
+
+        if previous * (1 - (now - start) / self.window) + count + 1 <= self.limit:
+            return (start, count + 1, previous, 0.0)
+        if count + 1 > self.limit or not previous:
+            return (start, count, previous, start + self.window - now)
+        return (start, count, previous, start + self.window * (1 - (self.limit - 1 - count) / previous) - now)
+
+    def __repr__(self):
+        return 'sliding_window({0}/{1}s)'.format(self.limit, self.window)
+
+
+class RateLimit(object):
+    """Rate Limited
+
+    A requirement (for use with `requires=`) rejecting HTTP requests with 429 Too Many Requests, along with a
+    Retry-After header, once the algorithm's limit has been reached for the request's key.
+    """
+    __slots__ = ('algorithm', 'keys', 'store', 'name', 'ttl')
+
+    def __init__(self, algorithm, key='ip', store=None, name=None, max_keys=100000):
+        self.algorithm = algorithm
+        self.keys = tuple(KEYS[part] if isinstance(part, str) else part for part in
+                          (key if isinstance(key, (tuple, list)) else (key, )))
+        self.store = InMemoryStore(max_entries=max_keys) if store is None else store
+        self.name = name or repr(algorithm)
+        self.ttl = algorithm.ttl
+
+    def key(self, request):
+        """Returns the key limits are counted by for the given request"""
+        return (self.name, ) + tuple(key(request) for key in self.keys)
+
+    def __call__(self, request=None, response=None, context=None, module=None, **kwargs):
+        if response is None:  # only HTTP requests are limited
+            return None
+
+        algorithm = self.algorithm
+        now = time()
+        wait = self.store.update(self.key(request), lambda state: algorithm(state, now), self.ttl)[-1]
+
+        api = getattr(module, '__izi__', None)
+        metrics = api and api.http.metrics
+        if metrics:
+            metrics.rate_limit(getattr(request, 'uri_template', None) or request.path, not wait)
+        if not wait:
+            return None
+
+        response.status = falcon.HTTP_429
+        response.set_header('Retry-After', str(int(ceil(wait))))
+        return {'errors': {'Too Many Requests': 'Rate limit exceeded, retry in {0} seconds'.format(int(ceil(wait)))}}
+
+    def reset(self, request):
+        """Forgets the requests counted against the given request's key"""
+        self.store.delete(self.key(request))
+
+
+def token_bucket(rate, per=1.0, burst=None, key='ip', store=None, **kwargs):
+    """Limits requests per key to a steady rate per given seconds, allowing bursts of up to `burst` requests"""
+    return RateLimit(TokenBucket(rate, per, burst), key, store, **kwargs)
+
+
+def sliding_window(limit, window=60.0, key='ip', store=None, **kwargs):
+    """Limits requests per key to at most `limit` within any `window` seconds"""
+    return RateLimit(SlidingWindow(limit, window), key, store, **kwargs)
@@ -0,0 +1,152 @@
+"""izi/router.py
+
+Defines the router izi builds falcon servers with, compiling the route table once and optionally caching it on disk
+
+Copyright (C) 2018 IZI Global
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from __future__ import absolute_import
+
+import hashlib
+import marshal
+import os
+import re
+import stat
+import tempfile
+from importlib.util import MAGIC_NUMBER
+
+from falcon.routing.compiled import _FIELD_PATTERN, _TAB_STR, CompiledRouter, CompiledRouterNode, _CxParent
+
+CONFLICT = ("The URI template for this route is inconsistent or conflicts with another route's template. This is "
+            "usually caused by configuring a field converter differently for the same field in two different routes, "
+            "or by using different field names at the same level in the path (e.g., '/parents/{id}' and "
+            "'/parents/{parent_id}/children')")
+
+
+class Router(CompiledRouter):
+    """A falcon CompiledRouter that only generates and compiles its finder once all routes have been added,
+       instead of after every single route, and finds where to insert each route using an index per level
+       of the route tree instead of comparing against every sibling.
+
+       If a cache directory is given the compiled finder is saved there, keyed by a hash of its generated source,
+       and reused by any later process building the same route table. As cached code is executed, the directory
+       is created accessible only to its owner, and neither it nor the files in it are trusted unless they are
+       owned by the current user and can't be written by anyone else.
+    """
+    __slots__ = ('cache', '_index')
+
+    def __init__(self, cache=None):
+        self.cache = None
+        self._index = {}
+        super().__init__()
+        self.cache = cache
+
+    def add_route(self, uri_template, method_map, resource):
+        if re.search(r'\s', _FIELD_PATTERN.sub('{FIELD}', uri_template)):
+            raise ValueError('URI templates may not include whitespace.')
+
+        path = uri_template.strip('/').split('/')
+        used_names = set()
+        for segment in path:
+            self._validate_template_segment(segment, used_names)
+
+        nodes = self._roots
+        for segment in path:
+            by_segment, variables = self._index.setdefault(id(nodes), ({}, []))
+            node = by_segment.get(segment, None)
+            if node is None:
+                if any(variable.conflicts_with(segment) for variable in variables):
+                    raise ValueError(CONFLICT)
+                node = by_segment[segment] = CompiledRouterNode(segment)
+                nodes.append(node)
+                if node.is_var:
+                    variables.append(node)
+            nodes = node.children
+
+        node.method_map = method_map
+        node.resource = resource
+        node.uri_template = uri_template
+        self._find = self._compile_and_find
+
+    def compile(self):
+        """Compiles the finder for all routes added so far, instead of on the first request"""
+        self._find = self._compile()
+
+    def _compile_and_find(self, path, return_values, patterns, converters, params):
+        self.compile()
+        return self._find(path, self._return_values, self._patterns, self._converters, params)
+
+    def _compile(self):
+        if not self.cache:
+            return super()._compile()
+
+        scope = {}
+        exec(self._cached_code(), scope)
+        return scope['find']
+
+    def _cached_code(self):
+        """Returns the compiled code of the finder, loading it from the cache directory when present and
+           saving it there otherwise
+        """
+        source = self._source()
+        path = os.path.join(self.cache, 'router-{0}.marshal'.format(
+                            hashlib.sha256(MAGIC_NUMBER + source.encode('utf8')).hexdigest()))
+        try:
+            os.makedirs(self.cache, mode=0o700, exist_ok=True)
+            trusted = _trusted(os.stat(self.cache))
+        except OSError:
+            trusted = False
+
+        if trusted:
+            try:
+                with open(path, 'rb') as cached:
+                    if _trusted(os.fstat(cached.fileno())):
+                        return marshal.load(cached)
+            except (OSError, EOFError, ValueError, TypeError):
+                pass
+
+        code = compile(source, '<string>', 'exec')
+        if not trusted:
+            return code
+
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=self.cache, delete=False) as cached:
+                marshal.dump(code, cached)
+            os.replace(cached.name, path)
+        except OSError:
+            pass
+        return code
+
+    def _source(self):
+        """Generates the source of the finder, populating the values it relies on the same way
+           CompiledRouter._compile does
+        """
+        self._return_values = []
+        self._patterns = []
+        self._converters = []
+        self._ast = _CxParent()
+        self._generate_ast(self._roots, self._ast, self._return_values, self._patterns)
+        self._finder_src = '\n'.join(('def find(path, return_values, patterns, converters, params):',
+                                      _TAB_STR + 'path_len = len(path)', self._ast.src(0), _TAB_STR + 'return None'))
+        return self._finder_src
+
+
+def _trusted(status):
+    """Returns True if the given file status belongs to the current user and can't be written by any other"""
+    if not hasattr(os, 'getuid'):
+        return True
+    return status.st_uid == os.getuid() and not status.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
@@ -191,7 +191,7 @@ class HTTPRouter(InternalValidation):
     __slots__ = ()
 
     def __init__(self, versions=any, parse_body=False, parameters=None, defaults={}, status=None,
-                 response_headers=None, private=False, inputs=None, **kwargs):
+                 response_headers=None, private=False, inputs=None, max_in_flight=None, queue_timeout=None, **kwargs):
         super().__init__(**kwargs)
         if versions is not any:
             self.route['versions'] = (versions, ) if isinstance(versions, (int, float, None.__class__)) else versions
@@ -210,11 +210,21 @@ class HTTPRouter(InternalValidation):
             self.route['private'] = private
         if inputs:
             self.route['inputs'] = inputs
+        if max_in_flight is not None:
+            self.route['max_in_flight'] = max_in_flight
+        if queue_timeout is not None:
+            self.route['queue_timeout'] = queue_timeout
 
     def versions(self, supported, **overrides):
         """Sets the versions that this route should be compatiable with"""
         return self.where(versions=supported, **overrides)
 
+    def limit_concurrency(self, max_in_flight, queue_timeout=None, **overrides):
+        """Caps how many requests can be handled at once, shedding the excess with 503 Service Unavailable.
+           Passing 'adaptive' as max_in_flight adapts the limit to the latency observed.
+        """
+        return self.where(max_in_flight=max_in_flight, queue_timeout=queue_timeout, **overrides)
+
     def parse_body(self, automatic=True, **overrides):
         """Tells izi to automatically parse the input body if it matches a registered input format"""
         return self.where(parse_body=automatic, **overrides)
@@ -418,6 +428,7 @@ class URLRouter(HTTPRouter):
                         api.http.versioned.setdefault(version, {})[callable_method.__name__] = callable_method
 
         interface.examples = use_examples
+        api.http.changed()
         return callable_method
 
     def urls(self, *urls, **overrides):
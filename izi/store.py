@@ -19,36 +19,470 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 OTHER DEALINGS IN THE SOFTWARE.
 
 """
-from izi.exceptions import StoreKeyNotFound
+from __future__ import absolute_import
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+import tempfile
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from hashlib import sha256
+from threading import Lock
+from time import monotonic, time
+
+from izi._async import asyncio, coroutine
+from izi.exceptions import StoreFull, StoreKeyNotFound
+
+try:
+    from hashlib import blake2b
+except ImportError:  # Python < 3.6
+    blake2b = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def pickled_size(data):
+    """Returns the approximate memory used by the given data, measured as the size of its pickled form"""
+    try:
+        return len(pickle.dumps(data, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(data)
+
+
+class _Shard(object):
+    """A single lock protected partition of an InMemoryStore, ordered from least to most recently used"""
+    __slots__ = ('lock', 'data', 'bytes', 'hits', 'misses', 'evictions', 'expirations')
+
+    def __init__(self):
+        self.lock = Lock()
+        self.data = OrderedDict()
+        self.bytes = self.hits = self.misses = self.evictions = self.expirations = 0
 
 
 class InMemoryStore:
     """
-    Naive store class which can be used for the session middleware and unit tests.
-    It is not thread-safe and no data will survive the lifecycle of the izi process.
-    Regard this as a blueprint for more useful and probably more complex store implementations, for example stores
-    which make use of databases like Redis, PostgreSQL or others.
+    Thread-safe store which can be used for the session middleware and unit tests.
+    No data will survive the lifecycle of the izi process.
+
+    Keys are spread across `shards` partitions each guarded by its own lock, so concurrent requests rarely contend.
+    Optionally keys expire after `ttl` seconds (which can be overridden per key on `set`).
+
+    `max_entries` and `max_bytes` are not enforced across the whole store, but as an equal share per shard (rounded
+    up): once a shard holds more than `shard_entries` keys or `shard_bytes` bytes, its own least recently used keys
+    are evicted. The store as a whole may therefore hold up to `shards * shard_entries` keys, and as keys don't
+    spread perfectly evenly across shards, it may start evicting before reaching `max_entries` or `max_bytes`.
+    Expired keys are removed lazily when accessed and by a sweep over all shards at most once every `sweep_interval`
+    seconds, piggybacking on writes.
+
+    Regard this as a blueprint for more complex store implementations, for example stores which make use of
+    databases like Redis, PostgreSQL or others.
     """
-    def __init__(self):
-        self._data = {}
+    def __init__(self, shards=16, ttl=None, max_entries=None, max_bytes=None, sweep_interval=60.0,
+                 sizeof=pickled_size):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shard_entries = max_entries and -(-max_entries // shards)
+        self.shard_bytes = max_bytes and -(-max_bytes // shards)
+        self.sweep_interval = sweep_interval
+        self.sizeof = sizeof
+        self._shards = tuple(_Shard() for shard in range(shards))
+        self._next_sweep = monotonic() + sweep_interval
+
+    def _shard(self, key):
+        return self._shards[hash(key) % len(self._shards)]
+
+    @staticmethod
+    def _remove(shard, key):
+        shard.bytes -= shard.data.pop(key)[1]
+
+    def _lookup(self, shard, key, now):
+        """Returns the live entry for key, dropping it if expired. Must be called holding the shard lock"""
+        entry = shard.data.get(key, None)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            self._remove(shard, key)
+            shard.expirations += 1
+            return None
+        return entry
 
     def get(self, key):
         """Get data for given store key. Raise izi.exceptions.StoreKeyNotFound if key does not exist."""
-        try:
-            data = self._data[key]
-        except KeyError:
-            raise StoreKeyNotFound(key)
+        shard = self._shard(key)
+        with shard.lock:
+            entry = self._lookup(shard, key, monotonic())
+            if entry is None:
+                shard.misses += 1
+                raise StoreKeyNotFound(key)
+            shard.data.move_to_end(key)
+            shard.hits += 1
+            return entry[2]
+
+    def exists(self, key):
+        """Return whether key exists or not."""
+        shard = self._shard(key)
+        with shard.lock:
+            return self._lookup(shard, key, monotonic()) is not None
+
+    def set(self, key, data, ttl=None):
+        """Set data object for given store key, expiring after ttl seconds if given (or the store's default ttl)."""
+        now = monotonic()
+        size = self.sizeof(data) if self.max_bytes else 0
+        shard = self._shard(key)
+        with shard.lock:
+            self._insert(shard, key, data, size, ttl, now)
+
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+    def update(self, key, function, ttl=None):
+        """Atomically replace the data for given store key with function(current data, or None if the key does not
+           exist), returning the new data.
+        """
+        now = monotonic()
+        shard = self._shard(key)
+        with shard.lock:
+            entry = self._lookup(shard, key, now)
+            data = function(None if entry is None else entry[2])
+            self._insert(shard, key, data, self.sizeof(data) if self.max_bytes else 0, ttl, now)
+
+        if now >= self._next_sweep:
+            self.sweep(now)
         return data
 
+    def _insert(self, shard, key, data, size, ttl, now):
+        """Stores data for key, evicting the least recently used keys if needed. Must be called holding the lock"""
+        ttl = self.ttl if ttl is None else ttl
+        if key in shard.data:
+            self._remove(shard, key)
+        shard.data[key] = (None if ttl is None else now + ttl, size, data)
+        shard.bytes += size
+        while len(shard.data) > 1 and ((self.shard_entries and len(shard.data) > self.shard_entries) or
+                                       (self.shard_bytes and shard.bytes > self.shard_bytes)):
+            shard.bytes -= shard.data.popitem(last=False)[1][1]
+            shard.evictions += 1
+
+    def delete(self, key):
+        """Delete data for given store key."""
+        shard = self._shard(key)
+        with shard.lock:
+            if key in shard.data:
+                self._remove(shard, key)
+
+    def sweep(self, now=None):
+        """Removes every expired key from the store, returning how many were removed"""
+        now = monotonic() if now is None else now
+        self._next_sweep = now + self.sweep_interval
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                expired = [key for key, entry in shard.data.items() if entry[0] is not None and entry[0] <= now]
+                for key in expired:
+                    self._remove(shard, key)
+                shard.expirations += len(expired)
+                removed += len(expired)
+        return removed
+
+    def stats(self):
+        """Returns the combined counters of all shards"""
+        totals = {'entries': 0, 'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+        for shard in self._shards:
+            with shard.lock:
+                totals['entries'] += len(shard.data)
+                totals['bytes'] += shard.bytes
+                totals['hits'] += shard.hits
+                totals['misses'] += shard.misses
+                totals['evictions'] += shard.evictions
+                totals['expirations'] += shard.expirations
+        return totals
+
+    def __len__(self):
+        return sum(len(shard.data) for shard in self._shards)
+
+
+class AsyncInMemoryStore(InMemoryStore):
+    """
+    InMemoryStore also implementing the async store protocol: aget, aexists, aset and adelete mirror their synchronous
+    counterparts as coroutines. Being in memory, none of them ever wait on anything.
+    Regard this as a blueprint for stores backed by asynchronous clients of databases like Redis or PostgreSQL.
+    """
+    @coroutine
+    def aget(self, key):
+        """Get data for given store key. Raise izi.exceptions.StoreKeyNotFound if key does not exist."""
+        return self.get(key)
+
+    @coroutine
+    def aexists(self, key):
+        """Return whether key exists or not."""
+        return self.exists(key)
+
+    @coroutine
+    def aset(self, key, data, ttl=None):
+        """Set data object for given store key, expiring after ttl seconds if given (or the store's default ttl)."""
+        self.set(key, data, ttl)
+
+    @coroutine
+    def adelete(self, key):
+        """Delete data for given store key."""
+        self.delete(key)
+
+
+class ThreadPoolStore:
+    """
+    Adapts any synchronous store to the async store protocol by running its operations within a thread pool,
+    so waiting on the store doesn't block the event loop. If no executor is given the loop's default one is used.
+    The synchronous methods are passed straight through to the wrapped store.
+    """
+    def __init__(self, store, executor=None):
+        self.store = store
+        self.executor = executor
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def exists(self, key):
+        return self.store.exists(key)
+
+    def set(self, key, data, ttl=None):
+        return self.store.set(key, data, ttl)
+
+    def delete(self, key):
+        return self.store.delete(key)
+
+    def _run(self, function, *args):
+        return asyncio.get_event_loop().run_in_executor(self.executor, function, *args)
+
+    @coroutine
+    def aget(self, key):
+        """Get data for given store key. Raise izi.exceptions.StoreKeyNotFound if key does not exist."""
+        return (yield from self._run(self.store.get, key))
+
+    @coroutine
+    def aexists(self, key):
+        """Return whether key exists or not."""
+        return (yield from self._run(self.store.exists, key))
+
+    @coroutine
+    def aset(self, key, data, ttl=None):
+        """Set data object for given store key, expiring after ttl seconds if given (or the store's default ttl)."""
+        yield from self._run(self.store.set, key, data, ttl)
+
+    @coroutine
+    def adelete(self, key):
+        """Delete data for given store key."""
+        yield from self._run(self.store.delete, key)
+
+
+class SharedMemoryStore:
+    """
+    Store shared between every process on a machine, backed by a memory mapped file, allowing for example all
+    workers of a pre-forking server to see the same sessions.
+
+    The file holds a fixed size hash table of `slots`, each able to hold a key and its pickled data of up to
+    `slot_size` bytes in total. Access is serialized across processes using an fcntl lock on the file and keys
+    optionally expire after `ttl` seconds, overridable per key on `set`. Once deleted keys leave tombstones in more
+    than a quarter of the slots, the table is rehashed so lookups never probe through long runs of them.
+    When `path` is not given a temporary file is created, which is shared with any processes forked afterwards and
+    removed once the process that created the store closes it or exits. Only available where fcntl is.
+    """
+    HEADER = struct.Struct('<4sIIII')
+    TOMBSTONES = struct.Struct('<I')
+    SLOT = struct.Struct('<BxxxIIQd')
+    MAGIC = b'IZIS'
+    VERSION = 3 if blake2b else 4  # also tells apart how keys are hashed, so every process sharing a file agrees
+    EMPTY, USED, DELETED = 0, 1, 2
+
+    def __init__(self, path=None, slots=1024, slot_size=4096, ttl=None):
+        if fcntl is None:
+            raise NotImplementedError('SharedMemoryStore requires fcntl, which is not available on this platform')
+        self._remove_temporary = None
+        if path is None:
+            handle, path = tempfile.mkstemp(prefix='izi-store-')
+            os.close(handle)
+            self._remove_temporary = weakref.finalize(self, _remove_temporary, path, os.getpid())
+        self.path = path
+        self.ttl = ttl
+        self._lock = Lock()
+        self._open(slots, slot_size)
+
+    def _open(self, slots=None, slot_size=None):
+        self._pid = os.getpid()
+        self._file = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        try:
+            if os.fstat(self._file).st_size < self.HEADER.size:
+                os.ftruncate(self._file, self.HEADER.size + slots * slot_size)
+                os.pwrite(self._file, self.HEADER.pack(self.MAGIC, self.VERSION, slots, slot_size, 0), 0)
+            magic, version, self.slots, self.slot_size = self.HEADER.unpack(os.pread(self._file, self.HEADER.size,
+                                                                                     0))[:4]
+            if magic != self.MAGIC or version != self.VERSION:
+                raise ValueError('{0} is not an izi shared memory store'.format(self.path))
+            self._memory = mmap.mmap(self._file, self.HEADER.size + self.slots * self.slot_size)
+        finally:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def close(self):
+        """Releases the memory map and file handle held by this process"""
+        self._memory.close()
+        os.close(self._file)
+        if self._remove_temporary is not None:
+            self._remove_temporary()
+
+    @contextmanager
+    def _locked(self, exclusive=True):
+        with self._lock:
+            if self._pid != os.getpid():  # flock is shared with the parent process until the file is reopened
+                self._open()
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield self._memory
+            finally:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _hash(encoded_key):
+        """Places keys within slots, using a hash available on FIPS enabled builds as well"""
+        digest = blake2b(encoded_key, digest_size=8).digest() if blake2b else sha256(encoded_key).digest()[:8]
+        return int.from_bytes(digest, 'little')
+
+    def _find(self, memory, encoded_key, now):
+        """Returns (slot index holding key or None, first free slot index or None) probing from the key's hash"""
+        key_hash = self._hash(encoded_key)
+        free = None
+        for probe in range(self.slots):
+            index = (key_hash + probe) % self.slots
+            offset = self.HEADER.size + index * self.slot_size
+            state, key_length, length, slot_hash, expires = self.SLOT.unpack_from(memory, offset)
+            if state == self.EMPTY:
+                return None, index if free is None else free
+            if state == self.USED and expires and expires <= now:
+                state = self.DELETED
+            if state == self.DELETED:
+                if free is None:
+                    free = index
+            elif slot_hash == key_hash and key_length == len(encoded_key) and memory[offset + self.SLOT.size:
+                                                  offset + self.SLOT.size + len(encoded_key)] == encoded_key:
+                return index, free
+        return None, free
+
+    def _load(self, memory, index):
+        offset = self.HEADER.size + index * self.slot_size
+        key_length, length = self.SLOT.unpack_from(memory, offset)[1:3]
+        return pickle.loads(memory[offset + self.SLOT.size + key_length:offset + self.SLOT.size + length])
+
+    def _mark(self, memory, index, state):
+        memory[self.HEADER.size + index * self.slot_size] = state
+
+    @staticmethod
+    def _encode_key(key):
+        return pickle.dumps(key, pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key):
+        """Get data for given store key. Raise izi.exceptions.StoreKeyNotFound if key does not exist."""
+        encoded_key = self._encode_key(key)
+        with self._locked(False) as memory:
+            index = self._find(memory, encoded_key, time())[0]
+            if index is None:
+                raise StoreKeyNotFound(key)
+            return self._load(memory, index)
+
     def exists(self, key):
         """Return whether key exists or not."""
-        return key in self._data
+        encoded_key = self._encode_key(key)
+        with self._locked(False) as memory:
+            return self._find(memory, encoded_key, time())[0] is not None
+
+    def set(self, key, data, ttl=None):
+        """Set data object for given store key, expiring after ttl seconds if given (or the store's default ttl)."""
+        now = time()
+        encoded_key = self._encode_key(key)
+        payload = self._payload(key, encoded_key, data)
+        with self._locked() as memory:
+            self._write(memory, self._find(memory, encoded_key, now), encoded_key, payload, ttl, now)
+
+    def update(self, key, function, ttl=None):
+        """Atomically replace the data for given store key with function(current data, or None if the key does not
+           exist), returning the new data.
+        """
+        now = time()
+        encoded_key = self._encode_key(key)
+        with self._locked() as memory:
+            found = self._find(memory, encoded_key, now)
+            data = function(None if found[0] is None else self._load(memory, found[0]))
+            self._write(memory, found, encoded_key, self._payload(key, encoded_key, data), ttl, now)
+        return data
+
+    def _payload(self, key, encoded_key, data):
+        payload = encoded_key + pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+        if self.SLOT.size + len(payload) > self.slot_size:
+            raise StoreFull('Data for {0} needs {1} bytes, more than the slot size of {2}'.format(
+                            key, self.SLOT.size + len(payload), self.slot_size))
+        return payload
 
-    def set(self, key, data):
-        """Set data object for given store key."""
-        self._data[key] = data
+    def _write(self, memory, found, encoded_key, payload, ttl, now):
+        """Writes the payload into the slot found for its key, or the first free one. Must be called holding the lock"""
+        ttl = self.ttl if ttl is None else ttl
+        index, free = found
+        if index is None:
+            index = free
+        if index is None:
+            raise StoreFull('All {0} slots of the store are in use'.format(self.slots))
+        offset = self.HEADER.size + index * self.slot_size
+        if memory[offset] == self.DELETED:
+            self._count_tombstones(memory, -1)
+        self.SLOT.pack_into(memory, offset, self.USED, len(encoded_key), len(payload), self._hash(encoded_key),
+                            0.0 if ttl is None else now + ttl)
+        memory[offset + self.SLOT.size:offset + self.SLOT.size + len(payload)] = payload
 
     def delete(self, key):
         """Delete data for given store key."""
-        if key in self._data:
-            del self._data[key]
+        encoded_key = self._encode_key(key)
+        with self._locked() as memory:
+            now = time()
+            index = self._find(memory, encoded_key, now)[0]
+            if index is not None:
+                self._mark(memory, index, self.DELETED)
+                if self._count_tombstones(memory, 1) > self.slots // 4:
+                    self._rehash(memory, now)
+
+    def _count_tombstones(self, memory, change):
+        """Adjusts the count of deleted slots kept in the header, returning the new count"""
+        offset = self.HEADER.size - self.TOMBSTONES.size
+        tombstones = self.TOMBSTONES.unpack_from(memory, offset)[0] + change
+        self.TOMBSTONES.pack_into(memory, offset, tombstones)
+        return tombstones
+
+    def _rehash(self, memory, now):
+        """Reinserts every live key into an emptied table, dropping tombstones and expired keys. Must be called
+           holding the exclusive lock
+        """
+        live = []
+        for index in range(self.slots):
+            offset = self.HEADER.size + index * self.slot_size
+            state, key_length, length, slot_hash, expires = self.SLOT.unpack_from(memory, offset)
+            if state == self.USED and not (expires and expires <= now):
+                live.append((slot_hash, memory[offset:offset + self.SLOT.size + length]))
+            memory[offset] = self.EMPTY
+
+        for slot_hash, slot in live:
+            for probe in range(self.slots):
+                offset = self.HEADER.size + (slot_hash + probe) % self.slots * self.slot_size
+                if memory[offset] == self.EMPTY:
+                    memory[offset:offset + len(slot)] = slot
+                    break
+        self.TOMBSTONES.pack_into(memory, self.HEADER.size - self.TOMBSTONES.size, 0)
+
+
+def _remove_temporary(path, pid):
+    """Removes the temporary file backing a SharedMemoryStore, only from within the process that created it"""
+    if os.getpid() == pid:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
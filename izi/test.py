@@ -22,7 +22,7 @@ OTHER DEALINGS IN THE SOFTWARE.
 from __future__ import absolute_import
 
 import sys
-from functools import partial
+from functools import partial, partialmethod
 from io import BytesIO
 from unittest import mock
 from urllib.parse import urlencode
@@ -34,21 +34,15 @@ from izi.api import API
 from izi.json_module import json
 
 
-def call(method, api_or_module, url, body='', headers=None, params=None, query_string='', scheme='http', **kwargs):
-    """Simulates a round-trip call against the given API / URL"""
-    api = API(api_or_module).http.server()
-    response = StartResponseMock()
-    headers = {} if headers is None else headers
-    if not isinstance(body, str) and 'json' in headers.get('content-type', 'application/json'):
-        body = output_format.json(body)
-        headers.setdefault('content-type', 'application/json')
-
+def _query_string(query_string, params, kwargs):
     params = params if params else {}
     params.update(kwargs)
     if params:
         query_string = '{}{}{}'.format(query_string, '&' if query_string else '', urlencode(params, True))
-    result = api(create_environ(path=url, method=method, headers=headers, query_string=query_string,
-                                body=body, scheme=scheme), response)
+    return query_string
+
+
+def _decode(response, result):
     if result:
         try:
             response.data = result[0].decode('utf8')
@@ -70,12 +64,77 @@ def call(method, api_or_module, url, body='', headers=None, params=None, query_s
     return response
 
 
+def call(method, api_or_module, url, body='', headers=None, params=None, query_string='', scheme='http', **kwargs):
+    """Simulates a round-trip call against the given API / URL"""
+    api = API(api_or_module).http.cached_server()
+    response = StartResponseMock()
+    headers = {} if headers is None else headers
+    if not isinstance(body, str) and 'json' in headers.get('content-type', 'application/json'):
+        body = output_format.json(body)
+        headers.setdefault('content-type', 'application/json')
+
+    query_string = _query_string(query_string, params, kwargs)
+    result = api(create_environ(path=url, method=method, headers=headers, query_string=query_string,
+                                body=body, scheme=scheme), response)
+    return _decode(response, result)
+
+
 for method in HTTP_METHODS:
     tester = partial(call, method)
     tester.__doc__ = """Simulates a round-trip HTTP {0} against the given API / URL""".format(method.upper())
     globals()[method.lower()] = tester
 
 
+class Client(object):
+    """A lightweight in-process client for making many round-trip calls against a single API / URL set
+
+       Skips the generation of a full simulated environment on every call, and when `decode` is False
+       returns the raw bytes of the response body as is - making it suitable for use in load and perf harnesses
+    """
+    __slots__ = ('api', 'decode', 'environ')
+
+    def __init__(self, api_or_module, decode=True, host='localhost', port='80', scheme='http'):
+        self.api = API(api_or_module)
+        self.decode = decode
+        self.environ = {'SERVER_NAME': host, 'SERVER_PORT': port, 'SERVER_PROTOCOL': 'HTTP/1.1',
+                        'SCRIPT_NAME': '', 'REMOTE_ADDR': '127.0.0.1', 'HTTP_HOST': host,
+                        'wsgi.version': (1, 0), 'wsgi.url_scheme': scheme, 'wsgi.errors': sys.stderr,
+                        'wsgi.multithread': False, 'wsgi.multiprocess': False, 'wsgi.run_once': False}
+
+    def call(self, method, url, body=b'', headers=None, params=None, query_string='', **kwargs):
+        """Makes a round-trip call against the client's API / URL"""
+        environ = self.environ.copy()
+        if not isinstance(body, (str, bytes)):
+            body = output_format.json(body)
+            environ['CONTENT_TYPE'] = 'application/json'
+        elif isinstance(body, str):
+            body = body.encode('utf8')
+
+        for name, value in (headers or {}).items():
+            name = name.upper().replace('-', '_')
+            environ[name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else 'HTTP_' + name] = str(value)
+        environ['REQUEST_METHOD'] = method
+        environ['PATH_INFO'] = url
+        environ['QUERY_STRING'] = _query_string(query_string, params, kwargs)
+        environ['CONTENT_LENGTH'] = str(len(body))
+        environ['wsgi.input'] = BytesIO(body)
+
+        response = StartResponseMock()
+        result = self.api.http.cached_server()(environ, response)
+        if self.decode:
+            return _decode(response, result)
+
+        response.data = b''.join(result)
+        response.content_type = response.headers_dict.get('content-type', None)
+        return response
+
+
+for method in HTTP_METHODS:
+    tester = partialmethod(Client.call, method)
+    tester.__doc__ = """Makes a round-trip HTTP {0} against the client's API / URL""".format(method.upper())
+    setattr(Client, method.lower(), tester)
+
+
 def cli(method, *args, **arguments):
     """Simulates testing a izi cli method from the command line"""
 
@@ -21,8 +21,12 @@ OTHER DEALINGS IN THE SOFTWARE.
 """
 from __future__ import absolute_import
 
+import re
 import uuid as native_uuid
+from array import array
+from collections.abc import MutableMapping
 from decimal import Decimal
+from threading import Lock, local
 
 import izi._empty as empty
 from izi import introspect
@@ -30,6 +34,10 @@ from izi.exceptions import InvalidTypeData
 from izi.json_module import json as json_converter
 
 
+FUNCTION, FUNCTION_WITH_CONTEXT, METHOD, METHOD_WITH_CONTEXT = ('function', 'function_with_context', 'method',
+                                                              'method_with_context')
+
+
 class Type(object):
     """Defines the base izi concept of a type for use in function annotation.
        Override `__call__` to define how the type should be transformed and validated
@@ -45,116 +53,88 @@ class Type(object):
         raise NotImplementedError('To implement a new type __call__ must be defined')
 
 
+def _rewrite(exception, value, step):
+    """Returns the exception a step of a type chain raises in place of the given one, resolving which of its
+       exception handlers applies once per exception class
+    """
+    rewrites, error_text, exception_handlers = step[2:]
+    exception_type = type(exception)
+    if exception_type not in rewrites:
+        rewrites[exception_type] = next((rewrite for take_exception, rewrite in exception_handlers.items()
+                                         if issubclass(exception_type, take_exception)), None)
+    rewrite = rewrites[exception_type]
+    if rewrite is not None:
+        return ValueError(rewrite) if isinstance(rewrite, str) else rewrite(value)
+    if error_text:
+        return ValueError(error_text)
+    return exception
+
+
 def create(doc=None, error_text=None, exception_handlers=empty.dict, extend=Type, chain=True, auto_instance=True,
-           accept_context=False):
-    """Creates a new type handler with the specified type-casting handler"""
+           accept_context=False, accepts=None):
+    """Creates a new type handler with the specified type-casting handler
+
+       The whole chain of extended types is flattened into a single sequence of steps when the type is created,
+       each step being (callable, calling convention, exception rewrites cache, error_text, exception_handlers).
+
+       `accepts` can be set to a cheap predicate that returns False only for values the type would certainly
+       reject, letting `Multi` skip the type for them. Chained types inherit the predicate of the type they extend.
+    """
     extend = extend if type(extend) == type else type(extend)
 
     def new_type_handler(function):
-        class NewType(extend):
-            __slots__ = ()
-            _accept_context = accept_context
-
-            if chain and extend != Type:
-                if error_text or exception_handlers:
-                    if not accept_context:
-                        def __call__(self, value):
-                            try:
-                                value = super(NewType, self).__call__(value)
-                                return function(value)
-                            except Exception as exception:
-                                for take_exception, rewrite in exception_handlers.items():
-                                    if isinstance(exception, take_exception):
-                                        if isinstance(rewrite, str):
-                                            raise ValueError(rewrite)
-                                        else:
-                                            raise rewrite(value)
-                                if error_text:
-                                    raise ValueError(error_text)
-                                raise exception
-                    else:
-                        if extend._accept_context:
-                            def __call__(self, value, context):
-                                try:
-                                    value = super(NewType, self).__call__(value, context)
-                                    return function(value, context)
-                                except Exception as exception:
-                                    for take_exception, rewrite in exception_handlers.items():
-                                        if isinstance(exception, take_exception):
-                                            if isinstance(rewrite, str):
-                                                raise ValueError(rewrite)
-                                            else:
-                                                raise rewrite(value)
-                                    if error_text:
-                                        raise ValueError(error_text)
-                                    raise exception
-                        else:
-                            def __call__(self, value, context):
-                                try:
-                                    value = super(NewType, self).__call__(value)
-                                    return function(value, context)
-                                except Exception as exception:
-                                    for take_exception, rewrite in exception_handlers.items():
-                                        if isinstance(exception, take_exception):
-                                            if isinstance(rewrite, str):
-                                                raise ValueError(rewrite)
-                                            else:
-                                                raise rewrite(value)
-                                    if error_text:
-                                        raise ValueError(error_text)
-                                    raise exception
-                else:
-                    if not accept_context:
-                        def __call__(self, value):
-                            value = super(NewType, self).__call__(value)
-                            return function(value)
-                    else:
-                        if extend._accept_context:
-                            def __call__(self, value, context):
-                                value = super(NewType, self).__call__(value, context)
-                                return function(value, context)
-                        else:
-                            def __call__(self, value, context):
-                                value = super(NewType, self).__call__(value)
-                                return function(value, context)
+        steps = ()
+        if chain and extend != Type:
+            if getattr(extend, '_izi_call', None) is extend.__call__:
+                steps = extend._izi_steps
             else:
-                if not accept_context:
-                    if error_text or exception_handlers:
-                        def __call__(self, value):
-                            try:
-                                return function(value)
-                            except Exception as exception:
-                                for take_exception, rewrite in exception_handlers.items():
-                                    if isinstance(exception, take_exception):
-                                        if isinstance(rewrite, str):
-                                            raise ValueError(rewrite)
-                                        else:
-                                            raise rewrite(value)
-                                if error_text:
-                                    raise ValueError(error_text)
-                                raise exception
-                    else:
-                        def __call__(self, value):
-                            return function(value)
-                else:
-                    if error_text or exception_handlers:
-                        def __call__(self, value, context):
-                            try:
-                                return function(value, context)
-                            except Exception as exception:
-                                for take_exception, rewrite in exception_handlers.items():
-                                    if isinstance(exception, take_exception):
-                                        if isinstance(rewrite, str):
-                                            raise ValueError(rewrite)
-                                        else:
-                                            raise rewrite(value)
-                                if error_text:
-                                    raise ValueError(error_text)
-                                raise exception
-                    else:
-                        def __call__(self, value, context):
-                            return function(value, context)
+                steps = ((extend.__call__, METHOD_WITH_CONTEXT if extend._accept_context else METHOD, None, None,
+                          None), )
+        if error_text or exception_handlers:
+            steps += ((function, FUNCTION_WITH_CONTEXT if accept_context else FUNCTION, {}, error_text,
+                       exception_handlers), )
+        else:
+            steps += ((function, FUNCTION_WITH_CONTEXT if accept_context else FUNCTION, None, None, None), )
+        handled = tuple(index for index, step in enumerate(steps) if step[2] is not None)
 
+        if len(steps) == 1 and not handled:
+            if accept_context:
+                def __call__(self, value, context=None):
+                    return function(value, context)
+            else:
+                def __call__(self, value, context=None):
+                    return function(value)
+        else:
+            def __call__(self, value, context=None):
+                original = value
+                position = 0
+                try:
+                    for call, convention, *_ in steps:
+                        if convention is FUNCTION:
+                            value = call(value)
+                        elif convention is FUNCTION_WITH_CONTEXT:
+                            value = call(value, context)
+                        elif convention is METHOD:
+                            value = call(self, value)
+                        else:
+                            value = call(self, value, context)
+                        position += 1
+                    return value
+                except Exception as exception:
+                    error = exception
+                    for index in handled:
+                        if index >= position:
+                            error = _rewrite(error, value if index == position else original, steps[index])
+                    if error is exception:
+                        raise
+                    raise error
+
+        namespace = {'__slots__': (), '_accept_context': accept_context, '_izi_steps': steps, '_izi_call': __call__,
+                     '__call__': __call__, '__module__': __name__,
+                     '__qualname__': 'create.<locals>.new_type_handler.<locals>.NewType'}
+        if accepts is not None or not chain:
+            namespace['accepts'] = None if accepts is None else staticmethod(accepts)
+        NewType = type(extend)('NewType', (extend, ), namespace)
         NewType.__doc__ = function.__doc__ if doc is None else doc
         if auto_instance and not (introspect.arguments(NewType.__init__, -1) or
                                   introspect.takes_kwargs(NewType.__init__) or
@@ -165,27 +145,90 @@ def create(doc=None, error_text=None, exception_handlers=empty.dict, extend=Type
     return new_type_handler
 
 
-def accept(kind, doc=None, error_text=None, exception_handlers=empty.dict, accept_context=False):
+def accept(kind, doc=None, error_text=None, exception_handlers=empty.dict, accept_context=False, accepts=None):
     """Allows quick wrapping of any Python type cast function for use as a izi type annotation"""
     return create(
         doc,
         error_text,
         exception_handlers=exception_handlers,
         chain=False,
-        accept_context=accept_context
+        accept_context=accept_context,
+        accepts=accepts
     )(kind)
 
-number = accept(int, 'A Whole number', 'Invalid whole number provided')
-float_number = accept(float, 'A float number', 'Invalid float number provided')
-decimal = accept(Decimal, 'A decimal number', 'Invalid decimal number provided')
+
+def _maybe_integer(value):
+    return type(value) is not str or value.strip().lstrip('+-').replace('_', '').isdigit()
+
+
+def _maybe_number(value):
+    return (type(value) is not str or _has_digit(value) is not None or
+            value.strip().lstrip('+-').lower() in ('inf', 'infinity', 'nan', 'snan'))
+
+
+def _maybe_uuid(value):
+    return type(value) is str and len(value.replace('urn:', '').replace('uuid:', '').strip('{}').replace('-', '')) == 32
+
+_has_digit = re.compile(r'\d').search
+
+number = accept(int, 'A Whole number', 'Invalid whole number provided', accepts=_maybe_integer)
+float_number = accept(float, 'A float number', 'Invalid float number provided', accepts=_maybe_number)
+decimal = accept(Decimal, 'A decimal number', 'Invalid decimal number provided', accepts=_maybe_number)
 boolean = accept(bool, 'Providing any value will set this to true', 'Invalid boolean value provided')
-uuid = accept(native_uuid.UUID, 'A Universally Unique IDentifier', 'Invalid UUID provided')
+uuid = accept(native_uuid.UUID, 'A Universally Unique IDentifier', 'Invalid UUID provided', accepts=_maybe_uuid)
+
+OUTPUTS = ('list', 'array', 'ndarray')
+BULK = {id(number): (int, 'q', 'int64', 'Invalid whole number provided'),
+        id(float_number): (float, 'd', 'float64', 'Invalid float number provided'),
+        id(decimal): (Decimal, None, None, 'Invalid decimal number provided'),
+        id(uuid): (native_uuid.UUID, None, None, 'Invalid UUID provided')}
+
+
+def _bulk_output(sub_type, output):
+    """Ensures the requested output container can hold the values produced by the sub type"""
+    if output not in OUTPUTS:
+        raise ValueError('Output must be one of {0}'.format(', '.join(OUTPUTS)))
+    if output != 'list':
+        if not BULK.get(id(sub_type), (None, None))[1]:
+            raise ValueError('{0} output is only supported for number and float_number values'.format(output))
+        if output == 'ndarray':
+            try:
+                import numpy  # noqa - only imported once ndarray output is requested
+            except ImportError:
+                raise ValueError('ndarray output requires numpy to be installed')
+    return output
+
+
+def _convert_all(sub_type, values, output='list'):
+    """Converts every value using the sub type, with a single C level pass when it is a known scalar type"""
+    bulk = BULK.get(id(sub_type), None)
+    if bulk is None:
+        return [sub_type(value) for value in values]
+
+    cast, typecode, dtype, error_text = bulk
+    try:
+        converted = list(map(cast, values))
+    except Exception:
+        converted = [sub_type(value) for value in values]  # raises the same error as converting items one by one
+    if output == 'list':
+        return converted
+    try:
+        if output == 'array':
+            return array(typecode, converted)
+        import numpy
+        return numpy.array(converted, dtype=dtype)
+    except OverflowError:
+        raise ValueError(error_text)
 
 
 class Text(Type):
     """Basic text / string value"""
     __slots__ = ()
 
+    @staticmethod
+    def accepts(value):
+        return type(value) not in (list, tuple) and value is not None
+
     def __call__(self, value):
         if type(value) in (list, tuple) or value is None:
             raise ValueError('Invalid text value provided')
@@ -203,21 +246,26 @@ class SubTyped(type):
 
 class Multiple(Type, metaclass=SubTyped):
     """Multiple Values"""
-    __slots__ = ()
+    __slots__ = ('output', )
+
+    def __init__(self, output='list'):
+        super().__init__()
+        self.output = _bulk_output(self._sub_type, output)
 
     def __call__(self, value):
         as_multiple = value if isinstance(value, list) else [value]
         if self._sub_type:
-            return [self._sub_type(item) for item in as_multiple]
+            return _convert_all(self._sub_type, as_multiple, self.output)
         return as_multiple
 
 
 
 class DelimitedList(Type, metaclass=SubTyped):
     """Defines a list type that is formed by delimiting a list with a certain character or set of characters"""
-    def __init__(self, using=","):
+    def __init__(self, using=",", output='list'):
         super().__init__()
         self.using = using
+        self.output = _bulk_output(self._sub_type, output)
 
     @property
     def __doc__(self):
@@ -226,7 +274,7 @@ class DelimitedList(Type, metaclass=SubTyped):
     def __call__(self, value):
         value_list = value if type(value) in (list, tuple) else value.split(self.using)
         if self._sub_type:
-            value_list = [self._sub_type(val) for val in value_list]
+            value_list = _convert_all(self._sub_type, value_list, self.output)
         return value_list
 
 
@@ -262,28 +310,39 @@ class InlineDictionary(Type, metaclass=SubTyped):
 
     def __call__(self, string):
         dictionary = {}
-        for key, value in (item.split(":") for item in string.split("|")):
+        key_type, value_type = self.key_type, self.value_type
+        for item in string.split("|"):
+            key, separator, value = item.partition(":")
+            if not separator or ":" in value:
+                raise ValueError('Invalid inline dictionary provided, expected key:value pairs separated by |')
             key, value = key.strip(), value.strip()
-            dictionary[self.key_type(key)
-                       if self.key_type else key] = self.value_type(value) if self.value_type else value
+            dictionary[key_type(key) if key_type else key] = value_type(value) if value_type else value
         return dictionary
 
 
 class OneOf(Type):
     """Ensures the value is within a set of acceptable values"""
-    __slots__ = ('values', )
+    __slots__ = ('values', 'accepted', 'error_text')
 
     def __init__(self, values):
         self.values = values
+        try:
+            self.accepted = frozenset(values)
+        except TypeError:
+            self.accepted = values
+        self.error_text = 'Invalid value passed. The accepted values are: ({0})'.format("|".join(map(str, values)))
 
     @property
     def __doc__(self):
-        return 'Accepts one of the following values: ({0})'.format("|".join(self.values))
+        return 'Accepts one of the following values: ({0})'.format("|".join(map(str, self.values)))
 
     def __call__(self, value):
-        if not value in self.values:
-            raise KeyError('Invalid value passed. The accepted values are: ({0})'.format("|".join(self.values)))
-        return value
+        try:
+            if value in self.accepted:
+                return value
+        except TypeError:
+            pass
+        raise KeyError(self.error_text)
 
 
 class Mapping(OneOf):
@@ -291,17 +350,15 @@ class Mapping(OneOf):
     __slots__ = ('value_map', )
 
     def __init__(self, value_map):
-        self.value_map = value_map
-        self.values = value_map.keys()
-
-    @property
-    def __doc__(self):
-        return 'Accepts one of the following values: ({0})'.format("|".join(self.values))
+        self.value_map = value_map if isinstance(value_map, dict) else dict(value_map)
+        super().__init__(self.value_map.keys())
+        self.accepted = self.value_map
 
     def __call__(self, value):
-        if not value in self.values:
-            raise KeyError('Invalid value passed. The accepted values are: ({0})'.format("|".join(self.values)))
-        return self.value_map[value]
+        try:
+            return self.value_map[value]
+        except (KeyError, TypeError):
+            raise KeyError(self.error_text)
 
 
 class JSON(Type):
@@ -326,25 +383,46 @@ class JSON(Type):
 
 
 class Multi(Type):
-    """Enables accepting one of multiple type methods"""
-    __slots__ = ('types', )
+    """Enables accepting one of multiple type methods.
+
+       Types declaring an `accepts(value)` predicate are skipped while it returns False (or raises), and only tried
+       once every other type has failed to convert the value.
+    """
+    __slots__ = ('types', 'predicates')
 
     def __init__(self, *types):
-       self.types = types
+        self.types = types
+        self.predicates = tuple(getattr(type_method, 'accepts', None) for type_method in types)
 
     @property
     def __doc__(self):
-        type_strings = (type_method.__doc__ for type_method in self.types)
+        type_strings = (type_method.__doc__ or type(type_method).__name__ for type_method in self.types)
         return 'Accepts any of the following value types:{0}\n'.format('\n  - '.join(type_strings))
 
     def __call__(self, value):
-        for type_method in self.types:
+        skipped = []
+        for type_method, accepts in zip(self.types, self.predicates):
+            if accepts is not None and not self._accepted(accepts, value):
+                skipped.append(type_method)
+                continue
             try:
                 return type_method(value)
-            except:
+            except Exception:
+                pass
+        for type_method in skipped:
+            try:
+                return type_method(value)
+            except Exception:
                 pass
         raise ValueError(self.__doc__)
 
+    @staticmethod
+    def _accepted(accepts, value):
+        try:
+            return accepts(value)
+        except Exception:
+            return False
+
 
 class InRange(Type):
     """Accepts a number within a lower and upper bound of acceptable values"""
@@ -533,25 +611,90 @@ class TypedProperty(object):
 
 
 class NewTypeMeta(type):
-    """Meta class to turn Schema objects into format usable by izi"""
+    """Meta class to turn Schema objects into format usable by izi, compiling each into a slotted class with a
+       generated constructor and native type conversion covering all of its fields
+    """
     __slots__ = ()
 
+    def __new__(mcs, name, bases, nmspc):
+        types = {}
+        for base in reversed(bases):
+            types.update({attr: getattr(base, attr) for attr in dir(base)
+                          if getattr(getattr(base, attr), "_izi_type", False)})
+            types.update(getattr(base, "_types", {}))
+        inherited = set().union(*(getattr(base, "_types", {}) for base in bases))
+        types.update({attr: value for attr, value in nmspc.items() if getattr(value, "_izi_type", False)})
+
+        slots = nmspc.get("__slots__", ())
+        slots = {slots} if isinstance(slots, str) else set(slots)
+        if any("__dict__" in vars(klass) for base in bases for klass in base.__mro__ if klass is not object):
+            slots.discard("__dict__")  # already provided by a base, so only declared fields get new slots
+        nmspc = dict(nmspc)
+        for attr, type_func in types.items():
+            if attr not in inherited:
+                slots.add("_" + attr)
+            if attr in nmspc or attr not in inherited:
+                nmspc[attr] = TypedProperty(attr, type_func)
+        nmspc["__slots__"] = tuple(sorted(slots))
+        nmspc["_types"] = types
+        cls = super(NewTypeMeta, mcs).__new__(mcs, name, bases, nmspc)
+        if types and mcs._replaceable(cls, "__init__"):
+            cls.__init__ = mcs._compile_init(types)
+        if types and mcs._replaceable(cls, "__native_types__"):
+            cls.__native_types__ = mcs._compile_native_types(types)
+        return cls
+
     def __init__(cls, name, bases, nmspc):
-        cls._types = {attr: getattr(cls, attr) for attr in dir(cls) if getattr(getattr(cls, attr), "_izi_type", False)}
-        slots = getattr(cls, "__slots__", ())
-        slots = set(slots)
-        for attr, type_func in cls._types.items():
-            slots.add("_" + attr)
-            slots.add(attr)
-            prop = TypedProperty(attr, type_func)
-            setattr(cls, attr, prop)
-        cls.__slots__ = tuple(slots)
         super(NewTypeMeta, cls).__init__(name, bases, nmspc)
+        cls.__slots__ = tuple(sorted(set(cls.__slots__).union(cls._types)))  # field names, as well as their storage
+
+    @staticmethod
+    def _replaceable(cls, name):
+        """Returns True if the schema class, including any of its bases, has no hand written version of the method"""
+        method = getattr(cls, name, None)
+        return method is None or getattr(method, "_izi_default", False)
+
+    @staticmethod
+    def _compile_init(types):
+        """Generates a constructor that validates every field of the schema in a single pass"""
+        lines = ["def __init__(self, json, force=False):",
+                 "    if self is json:",
+                 "        return",
+                 "    if force:",
+                 "        for key, value in json.items():",
+                 "            setattr(self, '_' + key, value)",
+                 "        return",
+                 "    remaining = len(json)"]
+        for attr in types:
+            lines.extend(("    if {0!r} in json:".format(attr),
+                          "        self._{0} = types[{0!r}](json[{0!r}])".format(attr),
+                          "        remaining -= 1"))
+        lines.extend(("    if remaining:",
+                      "        for key, value in json.items():",
+                      "            if key not in types:",
+                      "                setattr(self, key, value)"))
+        namespace = {"types": types}
+        exec("\n".join(lines), namespace)
+        namespace["__init__"]._izi_default = True
+        return namespace["__init__"]
+
+    @staticmethod
+    def _compile_native_types(types):
+        """Generates a conversion of the schema object to a dictionary of its fields for output"""
+        source = "def __native_types__(self):\n    return {{{0}}}".format(
+                 ", ".join("{0!r}: getattr(self, {1!r}, None)".format(attr, "_" + attr) for attr in types))
+        namespace = {}
+        exec(source, namespace)
+        namespace["__native_types__"]._izi_default = True
+        return namespace["__native_types__"]
 
 
 class Schema(object, metaclass=NewTypeMeta):
-    """Schema for creating complex types using izi types"""
-    __slots__ = ()
+    """Schema for creating complex types using izi types
+
+       Declared fields are stored in slots, while any additional keys provided are kept as plain attributes
+    """
+    __slots__ = ('__dict__', )
 
     def __new__(cls, json, *args, **kwargs):
         if json.__class__ == cls:
@@ -565,23 +708,89 @@ class Schema(object, metaclass=NewTypeMeta):
                 if force:
                     key = "_" + key
                 setattr(self, key, value)
+    __init__._izi_default = True
+
+    @classmethod
+    def many(cls, values, force=False):
+        """Creates a schema object for each of the provided dictionaries"""
+        new, init = object.__new__, cls.__init__
+        objects = []
+        for value in values:
+            if value.__class__ is not cls:
+                item, value = value, new(cls)
+                init(value, item, force)
+            objects.append(value)
+        return objects
 
 json = JSON()
 
 
+class SchemaContext(MutableMapping):
+    """The context given to a Marshmallow schema shared between threads, acting as the context set by the current
+       thread (or the schema's original context, if the current thread has not set one)
+    """
+    __slots__ = ('local', 'default')
+
+    def __init__(self, default=None):
+        self.local = local()
+        self.default = {} if default is None else default
+
+    @property
+    def current(self):
+        return getattr(self.local, 'context', self.default)
+
+    @current.setter
+    def current(self, context):
+        self.local.context = context
+
+    def __getitem__(self, key):
+        return self.current[key]
+
+    def __setitem__(self, key, value):
+        self.current[key] = value
+
+    def __delitem__(self, key):
+        del self.current[key]
+
+    def __iter__(self):
+        return iter(self.current)
+
+    def __len__(self):
+        return len(self.current)
+
+    def __bool__(self):  # nested schemas are given their parent's context only if it is truthy
+        return True
+
+
+def _schema_context(schema):
+    """Returns the SchemaContext of the given Marshmallow schema instance, giving it one if it has none yet"""
+    with _SCHEMA_CONTEXT_LOCK:
+        context = getattr(schema, 'context', None)
+        if not isinstance(context, SchemaContext):
+            context = schema.context = SchemaContext(context)
+        return context
+
+_SCHEMA_CONTEXT_LOCK = Lock()
+
+
 class MarshmallowInputSchema(Type):
-    """Allows using a Marshmallow Schema directly in a izi input type annotation"""
-    __slots__ = ("schema")
+    """Allows using a Marshmallow Schema directly in a izi input type annotation.
+
+       The context of each call is only visible to the thread making it, so concurrent requests never see each
+       other's context.
+    """
+    __slots__ = ("schema", "shared_context")
 
     def __init__(self, schema):
         self.schema = schema
+        self.shared_context = _schema_context(schema)
 
     @property
     def __doc__(self):
         return self.schema.__doc__ or self.schema.__class__.__name__
 
     def __call__(self, value, context):
-        self.schema.context = context
+        self.shared_context.current = context
         value, errors = self.schema.loads(value) if isinstance(value, str) else self.schema.load(value)
         if errors:
             raise InvalidTypeData('Invalid {0} passed in'.format(self.schema.__class__.__name__), errors)
@@ -589,32 +798,40 @@ class MarshmallowInputSchema(Type):
 
 
 class MarshmallowReturnSchema(Type):
-    """Allows using a Marshmallow Schema directly in a izi return type annotation"""
-    __slots__ = ("schema", )
+    """Allows using a Marshmallow Schema directly in a izi return type annotation.
+
+       The context set before each call is only visible to the thread setting it, so concurrent requests never see
+       each other's context. Lists returned for a schema expecting a single value are dumped in one `many=True` call.
+    """
+    __slots__ = ("schema", "shared_context")
 
     def __init__(self, schema):
         self.schema = schema
+        self.shared_context = _schema_context(schema)
 
     @property
     def context(self):
-        return self.schema.context
+        return self.shared_context.current
 
     @context.setter
     def context(self, context):
-        self.schema.context = context
+        self.shared_context.current = context
 
     @property
     def __doc__(self):
         return self.schema.__doc__ or self.schema.__class__.__name__
 
     def __call__(self, value):
-        value, errors = self.schema.dump(value)
+        schema = self.schema
+        if type(value) in (list, tuple) and getattr(schema, 'many', None) is False:
+            value, errors = schema.dump(value, many=True)
+        else:
+            value, errors = schema.dump(value)
         if errors:
-            raise InvalidTypeData('Invalid {0} passed in'.format(self.schema.__class__.__name__), errors)
+            raise InvalidTypeData('Invalid {0} passed in'.format(schema.__class__.__name__), errors)
         return value
 
 
-
 multiple = Multiple()
 smart_boolean = SmartBoolean()
 inline_dictionary = InlineDictionary()
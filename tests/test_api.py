@@ -19,6 +19,7 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 OTHER DEALINGS IN THE SOFTWARE.
 
 """
+import falcon
 import pytest
 
 import izi
@@ -122,3 +123,62 @@ def test_cli_interface_api_without_exit_codes():
 
     api.cli(args=[None, 'true'])
     api.cli(args=[None, 'false'])
+
+
+@pytest.mark.parametrize('concurrent', (False, True))
+def test_batch(izi_api, concurrent):
+    """Ensure a list of requests can be ran against the API in a single round trip"""
+    @izi.get(api=izi_api)
+    def add(number_1: izi.types.number, number_2: izi.types.number):
+        return number_1 + number_2
+
+    @izi.post(api=izi_api)
+    def echo(body):
+        return body
+
+    @izi.get(api=izi_api, requires=izi.authentication.basic(izi.authentication.verify('Tim', 'Custom password')))
+    def secret():
+        return 'Secret!'
+
+    izi_api.http.add_batch(max_size=5, concurrent=concurrent)
+    result = izi.test.post(izi_api, '/_batch', body=[
+        {'url': '/add', 'params': {'number_1': 1, 'number_2': 2}},
+        {'url': '/add?number_1=1&number_2=two'},
+        {'method': 'POST', 'url': '/echo', 'body': {'name': 'izi'}},
+        {'url': '/secret'},
+        {'method': 'POST', 'url': '/_batch', 'body': [{'url': '/add'}]}
+    ]).data
+    assert [item['status'] for item in result] == [200, 400, 200, 401, 400]
+    assert result[0]['body'] == 3
+    assert 'number_2' in result[1]['body']['errors']
+    assert result[2]['body'] == {'name': 'izi'}
+    assert ['content-type', 'application/json; charset=utf-8'] in result[2]['headers']
+
+    @izi.get(api=izi_api, output=izi.output_format.text)
+    def cookies(response):
+        response.set_cookie('first', '1')
+        response.set_cookie('second', '2')
+        return 'cookies'
+
+    izi_api.http.add_batch('/_batches', max_size=5)
+    result = izi.test.post(izi_api, '/_batch', body=[
+        {'url': '/cookies'},
+        {'url': '/_batch/', 'method': 'POST', 'body': [{'url': '/add'}]},
+        {'url': '/_batches', 'method': 'POST', 'body': [{'url': '/add'}]},
+        {'url': '/add', 'method': ['GET']},
+        {'url': '/add', 'headers': ['Accept']}
+    ]).data
+    assert [item['status'] for item in result] == [200, 400, 400, 400, 400]
+    assert all(item['body'] == {'errors': {'Invalid Batch': 'Batches can not be nested'}} for item in result[1:3])
+    assert [name for name, value in result[0]['headers']].count('set-cookie') == 2
+
+    @izi.get(api=izi_api)
+    def broken():
+        raise RuntimeError('broken')
+
+    result = izi.test.post(izi_api, '/_batch', body=[{'url': '/broken'}, {'url': '/add?number_1=1&number_2=2'}]).data
+    assert [item['status'] for item in result] == [500, 200]
+    assert result[1]['body'] == 3
+
+    assert izi.test.post(izi_api, '/_batch', body=[{'url': '/add'}] * 6).status == falcon.HTTP_400
+    assert izi.test.post(izi_api, '/_batch', body={'url': '/add'}).status == falcon.HTTP_400
@@ -19,6 +19,9 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 OTHER DEALINGS IN THE SOFTWARE.
 
 """
+import hashlib
+import json
+import time
 from base64 import b64encode
 
 from falcon import HTTPUnauthorized
@@ -218,3 +221,110 @@ def test_missing_authenticator_docstring():
         return 'Hello World!'
 
     izi.test.get(api, 'hello_world')
+
+
+def test_cached_verifier():
+    """Test to ensure verification results are cached by credentials, including failures, until revoked"""
+    calls = []
+
+    @izi.authentication.cached(ttl=60, failure_ttl=60)
+    def verify_token(token, context):
+        calls.append(token)
+        return {'name': 'Tim'} if token == 'valid' else None
+
+    @izi.get(requires=izi.authentication.token(verify_token))
+    def cached_token(request):
+        return request.context['user']['name']
+
+    for attempt in range(3):
+        assert izi.test.get(api, 'cached_token', headers={'Authorization': 'valid'}).data == 'Tim'
+        assert '401' in izi.test.get(api, 'cached_token', headers={'Authorization': 'invalid'}).status
+    assert calls == ['valid', 'invalid']
+    assert 'valid' not in str(verify_token.store.stats())
+
+    verify_token.revoke('valid')
+    assert izi.test.get(api, 'cached_token', headers={'Authorization': 'valid'}).data == 'Tim'
+    assert calls == ['valid', 'invalid', 'valid']
+
+    assert verify_token.key(('valid', )) != hashlib.sha256(repr(('valid', )).encode('utf8')).hexdigest()
+    assert verify_token.key(('valid', )) != izi.authentication.cached(verify_token).key(('valid', ))
+    shared = izi.authentication.cached(verify_token, secret='shared')
+    assert shared.key(('valid', )) == izi.authentication.cached(verify_token, secret=b'shared').key(('valid', ))
+
+
+def test_verifier_calling_convention():
+    """Test to ensure whether the request context is passed is resolved once per verify function"""
+    class Verify(object):
+        def method(self, user_name, password):
+            return user_name
+
+        def __call__(self, user_name, password, context):
+            calls.append(context)
+            return context
+
+    calls = []
+    assert izi.authentication.Verifier(Verify().method)('Tim', 'password', context='context') == 'Tim'
+    verifier = izi.authentication.Verifier(Verify())
+    assert verifier.arguments is None
+    assert verifier('Tim', 'password', context='context') == 'context'
+    assert verifier('Tim', 'password', context='other') == 'other'
+    assert verifier.arguments == 3 and calls == ['context', 'other']
+
+    def optional(user_name, password, db='default'):
+        return db
+
+    def named(user_name, password, db='default', context=None):
+        return (db, context)
+
+    assert izi.authentication.Verifier(optional)('Tim', 'password', context='context') == 'default'
+    assert izi.authentication.Verifier(optional)('Tim', password='password', db='users') == 'users'
+    assert izi.authentication.Verifier(named)('Tim', 'password', context='context') == ('default', 'context')
+
+    cached = izi.authentication.cached(optional)
+    assert cached('Tim', password='password', db='users') == 'users'
+    assert cached('Tim', password='password', db='other') == 'other'
+    cached.revoke('Tim', password='password', db='users')
+    assert len(cached.store) == 1
+
+
+def test_signed_token():
+    """Test to ensure the built-in HS256 signed token authenticator verifies tokens without any lookups"""
+    tokens = izi.authentication.SignedTokens({'old': 'old-secret', 'new': 'new-secret'})
+    precomptoken = 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.eyJkYXRhIjoibXkgZGF0YSIsInVzZXIiOiJUaW1vdGh5In0.' \
+                   '8QqzQMJUTq0Dq7vHlnDjdoCKFPDAlvxGCpc_8XF41nI'
+    assert izi.authentication.SignedTokens('super-secret-key-please-change').claims(precomptoken) == \
+        {'data': 'my data', 'user': 'Timothy'}
+
+    @izi.get(requires=izi.authentication.signed_token(tokens.keys, leeway=5))
+    def signed(request):
+        return request.context['user']['user']
+
+    def get(token):
+        return izi.test.get(api, 'signed', headers={'Authorization': token} if token else {})
+
+    now = time.time()
+    for kid in ('old', 'new'):
+        assert get(tokens.sign({'user': kid}, kid)).data == kid
+        assert get('Bearer ' + tokens.sign({'user': kid, 'exp': now + 60, 'nbf': now - 1}, kid)).data == kid
+
+    assert '401' in get(None).status
+    assert '401' in get('not.a.token').status
+    assert '401' in get(tokens.sign({'user': 'Tim', 'exp': now - 10}, 'new')).status
+    assert '401' in get(tokens.sign({'user': 'Tim', 'nbf': now + 60}, 'new')).status
+    assert get(tokens.sign({'user': 'Tim', 'exp': now - 1}, 'new')).data == 'Tim'
+
+    forged = izi.authentication.SignedTokens({'new': 'wrong-secret'}).sign({'user': 'Tim'}, 'new')
+    assert '401' in get(forged).status
+    assert '401' in get(izi.authentication.SignedTokens({'other': 'new-secret'}).sign({}, 'other')).status
+    header, payload, signature = tokens.sign({'user': 'Tim'}, 'new').split('.')
+    assert '401' in get('eyJhbGciOiJub25lIiwia2lkIjoibmV3In0.{0}.'.format(payload)).status
+    for kid in (['new'], {'new': 1}, 1):
+        unhashable = izi.authentication._base64_encode(json.dumps({'alg': 'HS256', 'kid': kid}).encode('utf8'))
+        assert '401' in get('{0}.{1}.{2}'.format(unhashable.decode('ascii'), payload, signature)).status
+
+    @izi.get(requires=izi.authentication.signed_token('secret', lambda claims: claims['user'].upper()))
+    def signed_user(user: izi.directives.user):
+        return user
+
+    token = izi.authentication.SignedTokens('secret').sign({'user': 'tim'})
+    assert izi.test.get(api, 'signed_user', headers={'Authorization': token}).data == 'TIM'
@@ -0,0 +1,119 @@
+"""tests/test_concurrency.py.
+
+Tests the per endpoint concurrency limits included with izi
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+from threading import Event, Thread
+
+import izi
+from izi.concurrency import AdaptiveConcurrencyLimit, ConcurrencyLimit
+
+api = izi.API(__name__)
+
+
+def test_concurrency_limit():
+    limit = ConcurrencyLimit(2)
+    first, second = limit.acquire(), limit.acquire()
+    assert first is not None and second is not None
+    assert limit.acquire() is None
+    assert limit.shed == 1
+
+    limit.release(first)
+    third = limit.acquire()
+    assert third is not None and limit.in_flight == 2
+
+    queued = ConcurrencyLimit(1, queue_timeout=5)
+    started = queued.acquire()
+    Thread(target=queued.release, args=(started, )).start()
+    assert queued.acquire() is not None
+    assert ConcurrencyLimit(0, queue_timeout=0.01).acquire() is None
+
+
+def test_adaptive_concurrency_limit(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(izi.concurrency, 'python_timer', lambda: now[0])
+
+    def handle(latency):
+        started = [limit.acquire() for slot in range(int(limit.limit))]
+        now[0] += latency
+        for start in started:
+            limit.release(start)
+
+    limit = AdaptiveConcurrencyLimit(limit=4, min_limit=2, max_limit=5, tolerance=2.0, backoff=0.5)
+    for request in range(20):
+        handle(0.01)
+    assert limit.limit == 5
+
+    handle(1.0)
+    assert limit.limit == 2.5
+    for request in range(5):
+        handle(1.0)
+    assert limit.limit == 2
+    assert limit.in_flight == 0
+
+    limit = AdaptiveConcurrencyLimit(limit=100, min_limit=1, max_limit=100, backoff=0.9)
+    handle(0.01)
+    handle(1.0)
+    assert limit.limit == 90
+
+
+def test_max_in_flight_sheds_load():
+    release = Event()
+    entered = Event()
+
+    @izi.get(max_in_flight=1, output=izi.output_format.text)
+    def slow():
+        entered.set()
+        release.wait(5)
+        return 'done'
+
+    @izi.get(output=izi.output_format.text)
+    def healthy():
+        return 'healthy'
+
+    responses = []
+    thread = Thread(target=lambda: responses.append(izi.test.get(api, 'slow')))
+    thread.start()
+    assert entered.wait(5)
+
+    shed = izi.test.get(api, 'slow')
+    assert shed.status == '503 Service Unavailable'
+    assert shed.headers_dict['retry-after'] == '1'
+    assert izi.test.get(api, 'healthy').data == 'healthy'
+
+    release.set()
+    thread.join()
+    assert responses[0].data == 'done'
+    assert izi.test.get(api, 'slow').data == 'done'
+    assert slow.interface.http.concurrency_limit.in_flight == 0
+    assert slow.interface.http.concurrency_limit.shed == 1
+
+
+def test_limit_concurrency_router():
+    router = izi.http().limit_concurrency('adaptive', queue_timeout=0.5)
+    assert router.route['max_in_flight'] == 'adaptive'
+    assert router.route['queue_timeout'] == 0.5
+
+    @router.urls('/adaptive')
+    def adaptive():
+        return True
+
+    limit = adaptive.interface.http.concurrency_limit
+    assert isinstance(limit, AdaptiveConcurrencyLimit) and limit.queue_timeout == 0.5
+    assert izi.test.get(api, 'adaptive').data is True
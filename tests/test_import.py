@@ -0,0 +1,63 @@
+"""tests/test_import.py.
+
+Tests the cost of importing izi, ensuring rarely needed modules are only imported once used
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import izi
+
+IMPORT_BUDGET = 0.75  # seconds, including the import of falcon
+LAZY = ('numpy', 'requests', 'falcon.testing', 'izi.test', 'izi.use', 'izi.development_runner')
+
+
+def run_python(*args):
+    """Runs a fresh Python process able to import this copy of izi, returning the completed process"""
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(izi.__file__))))
+    return subprocess.run((sys.executable, ) + args, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                          env=environment, universal_newlines=True, check=True)
+
+
+@pytest.mark.skipif(sys.version_info < (3, 5), reason='Python 3.4 imports the lazy modules eagerly')
+def test_lazy_modules():
+    """Test that importing izi leaves rarely needed modules unimported until they are accessed"""
+    loaded = json.loads(run_python('-c', 'import json, sys, izi; print(json.dumps(sorted(sys.modules)))').stdout)
+    assert not set(LAZY).intersection(loaded)
+
+    assert run_python('-c', 'import izi; print(izi.test.__name__, izi.use.__name__)').stdout.split() == \
+        ['izi.test', 'izi.use']
+    with pytest.raises(AttributeError):
+        izi.does_not_exist
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason='-X importtime requires Python 3.7+')
+def test_import_time_budget():
+    """Test that importing izi stays within its time budget"""
+    cumulative = {}
+    for line in run_python('-X', 'importtime', '-c', 'import izi').stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            _, total, name = line[len('import time:'):].split('|')
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total) / 1e6
+    assert cumulative['izi'] < IMPORT_BUDGET
@@ -69,3 +69,22 @@ class TestLocal(object):
 
         instance = MyObject()
         assert instance.my_method(10) == 10
+
+
+class TestCLI(object):
+    """Tests the functionality provided by izi.interface.CLI"""
+
+    def test_lazy_parser(self, izi_api):
+        @izi.cli(api=izi_api)
+        def greet(name: izi.types.text, times: izi.types.number=1):
+            """Greets the named person"""
+            return ' '.join(['hello {0}'.format(name)] * times)
+
+        cli = greet.interface.cli
+        assert cli._parser is None
+        assert 'greet' in str(izi_api.cli)
+        assert cli._parser is None
+
+        assert izi.test.cli(greet, 'izi', times=2) == 'hello izi hello izi'
+        assert cli._parser is not None
+        assert cli.parser.description == 'Greets the named person'
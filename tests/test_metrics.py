@@ -0,0 +1,74 @@
+"""tests/test_metrics.py.
+
+Tests to ensure per endpoint metrics are recorded and exposed correctly
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import pytest
+
+import izi
+from izi.metrics import PHASES, Histogram, Metrics
+
+
+def test_histogram():
+    """Test to ensure histograms place observations in the expected preallocated bucket"""
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 5.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1]
+    assert histogram.count == 4
+    assert histogram.sum == pytest.approx(5.65)
+    assert list(histogram.cumulative()) == [(0.1, 2), (1.0, 3), (float('inf'), 4)]
+
+
+def test_metrics(izi_api):
+    """Test to ensure requests are recorded per endpoint, status, and phase when metrics are enabled"""
+    @izi.get('/add/{number_1}', api=izi_api)
+    def add(number_1: izi.types.number, number_2: izi.types.number):
+        return number_1 + number_2
+
+    @izi.get(api=izi_api)
+    def fail():
+        raise ValueError('Failure')
+
+    assert izi_api.http.metrics is None
+    metrics = izi_api.http.add_metrics()
+    assert isinstance(metrics, Metrics)
+
+    assert izi.test.get(izi_api, '/add/1', number_2=2).data == 3
+    assert izi.test.get(izi_api, '/add/1', number_2='two').status == izi.HTTP_400
+    with pytest.raises(ValueError):
+        izi.test.get(izi_api, '/fail')
+
+    add_metrics = metrics.endpoints[('/add/{number_1}', 'GET', None)]
+    assert add_metrics.statuses == {'200': 1, '400': 1}
+    assert add_metrics.latency.count == 2
+    assert [phase.count for phase in add_metrics.phases] == [2, 2, 2, 1, 1, 1]
+    assert metrics.endpoints[('/fail', 'GET', None)].statuses == {'500': 1}
+
+    exposed = izi.test.get(izi_api, '/_metrics').data
+    assert 'izi_requests_total{route="/add/{number_1}",method="GET",version="",status="200"} 1' in exposed
+    assert 'izi_request_duration_seconds_count{route="/add/{number_1}",method="GET",version=""} 2' in exposed
+    assert 'phase="{0}"'.format(PHASES[-1]) in exposed
+
+    exposed = izi.test.get(izi_api, '/_metrics.json').data
+    add_metrics = next(endpoint for endpoint in exposed if endpoint['route'] == '/add/{number_1}')
+    assert add_metrics['statuses'] == {'200': 1, '400': 1}
+    assert add_metrics['latency']['buckets']['+Inf'] == 2
+    assert list(add_metrics['phases'].keys()) == list(PHASES)
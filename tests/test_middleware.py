@@ -17,13 +17,19 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 OTHER DEALINGS IN THE SOFTWARE.
 
 """
+from copy import deepcopy
+
 import pytest
+from falcon import Request, Response
 from falcon.request import SimpleCookie
+from falcon.testing import create_environ
 
 import izi
 from izi.exceptions import SessionNotFound
-from izi.middleware import CORSMiddleware, LogMiddleware, SessionMiddleware
-from izi.store import InMemoryStore
+from izi._async import asyncio
+from izi.middleware import (AsyncSessionMiddleware, CORSMiddleware, LogMiddleware, ProfileMiddleware, Session,
+                            SessionMiddleware)
+from izi.store import AsyncInMemoryStore, InMemoryStore, ThreadPoolStore
 
 api = izi.API(__name__)
 
@@ -72,6 +78,170 @@ def test_session_middleware():
     assert cookies['test-sid'] != 'foobarfoo'
 
 
+def test_session_middleware_skips_unmodified_sessions(izi_api):
+    class CountingStore(InMemoryStore):
+        def __init__(self):
+            super().__init__()
+            self.calls = []
+
+        def get(self, key):
+            self.calls.append('get')
+            return super().get(key)
+
+        def exists(self, key):
+            self.calls.append('exists')
+            return super().exists(key)
+
+        def set(self, key, data, ttl=None):
+            self.calls.append('set')
+            return super().set(key, data, ttl)
+
+    @izi_api.route.http.get()
+    def read(request):
+        return request.context['session'].get('name')
+
+    @izi_api.route.http.get()
+    def write(request, name):
+        request.context['session']['name'] = name
+
+    store = CountingStore()
+    izi_api.http.add_middleware(SessionMiddleware(store, cookie_name='sid', touch_interval=60))
+
+    response = izi.test.get(izi_api, '/read')
+    assert 'set-cookie' not in response.headers_dict
+    assert store.calls == [] and len(store) == 0
+
+    response = izi.test.get(izi_api, '/write', name='izi')
+    sid = SimpleCookie(response.headers_dict['set-cookie'])['sid'].value
+    assert store.calls == ['set']
+    touched = store.get(sid)['_touched']
+    assert store.get(sid) == {'name': 'izi', '_touched': touched}
+
+    del store.calls[:]
+    response = izi.test.get(izi_api, '/read', headers={'Cookie': 'sid={}'.format(sid)})
+    assert response.data == 'izi'
+    assert 'set-cookie' not in response.headers_dict
+    assert store.calls == ['get']
+
+    store.set(sid, {'name': 'izi', '_touched': touched - 120})
+    del store.calls[:]
+    response = izi.test.get(izi_api, '/read', headers={'Cookie': 'sid={}'.format(sid)})
+    assert 'set-cookie' in response.headers_dict
+    assert store.calls == ['get', 'set']
+    assert store.get(sid)['_touched'] > touched - 120
+
+    del store.calls[:]
+    response = izi.test.get(izi_api, '/read', headers={'Cookie': 'sid=unknown'})
+    assert response.data is None
+    assert store.calls == ['get']
+
+
+class AwaitedStore(AsyncInMemoryStore):
+    """Records which of the store protocols has been used"""
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    @asyncio.coroutine
+    def aget(self, key):
+        self.calls.append('aget')
+        return (yield from super().aget(key))
+
+    @asyncio.coroutine
+    def aset(self, key, data, ttl=None):
+        self.calls.append('aset')
+        yield from super().aset(key, data, ttl)
+
+
+@pytest.mark.parametrize('store', [AsyncInMemoryStore, InMemoryStore])
+def test_async_session_middleware(izi_api, store):
+    store = store()
+
+    @izi_api.route.http.get()
+    def count(request):
+        session = request.context['session']
+        session['counter'] = session.get('counter', 0) + 1
+        return session['counter']
+
+    middleware = AsyncSessionMiddleware(store)
+    assert isinstance(middleware.store, ThreadPoolStore) == (not hasattr(store, 'aget'))
+    izi_api.http.add_middleware(middleware)
+
+    response = izi.test.get(izi_api, '/count')
+    assert response.data == 1
+    sid = SimpleCookie(response.headers_dict['set-cookie'])['sid'].value
+    assert store.get(sid) == {'counter': 1}
+    assert izi.test.get(izi_api, '/count', headers={'Cookie': 'sid={}'.format(sid)}).data == 2
+    assert store.get(sid) == {'counter': 2}
+    assert izi.test.get(izi_api, '/count', headers={'Cookie': 'sid=unknown'}).data == 1
+
+
+@pytest.mark.parametrize('store', [AwaitedStore, InMemoryStore])
+def test_async_session_middleware_awaited(store):
+    store = store()
+    middleware = AsyncSessionMiddleware(store)
+    loop = asyncio.new_event_loop()
+
+    def handle(cookie=None):
+        request = Request(create_environ(headers={'Cookie': 'sid={}'.format(cookie)} if cookie else None))
+        response = Response()
+        loop.run_until_complete(middleware.process_request_async(request, response))
+        session = request.context['session']
+        session['counter'] = session.get('counter', 0) + 1
+        loop.run_until_complete(middleware.process_response_async(request, response, None))
+        return session['counter'], response
+
+    try:
+        counter, response = handle()
+        assert counter == 1
+        sid = response._cookies['sid'].value
+        assert handle(sid)[0] == 2
+        assert store.get(sid) == {'counter': 2}
+        if isinstance(store, AwaitedStore):
+            assert store.calls == ['aset', 'aget', 'aset']
+    finally:
+        loop.close()
+
+
+def test_session_tracks_modifications():
+    session = Session({'a': 1}, 'sid')
+    assert not session.modified
+    session.get('a')
+    session.pop('missing', None)
+    session.setdefault('a', 2)
+    assert not session.modified
+    for modify in (lambda: session.update(b=2), lambda: session.setdefault('c', 3), lambda: session.pop('a'),
+                   lambda: session.__delitem__('b'), lambda: session.popitem(), session.clear):
+        session.modified = False
+        modify()
+        assert session.modified
+
+    session = Session({'name': 'izi', 'cart': ['one'], 'options': {'size': 1}}, 'sid')
+    assert not session.changed
+    session['cart'].append('two')
+    assert session.changed and session.modified
+    session = Session({'name': 'izi', 'cart': ['one'], 'options': {'size': 1}}, 'sid')
+    session['options']['size'] = 2
+    assert session.changed
+
+
+def test_session_middleware_saves_nested_changes(izi_api):
+    class CopyingStore(InMemoryStore):
+        """Returns copies of the stored sessions, like stores that serialize them do"""
+        def get(self, key):
+            return deepcopy(super().get(key))
+
+    @izi_api.route.http.get()
+    def add(request, item):
+        request.context['session'].setdefault('cart', []).append(item)
+
+    store = CopyingStore()
+    izi_api.http.add_middleware(SessionMiddleware(store, cookie_name='sid'))
+    sid = SimpleCookie(izi.test.get(izi_api, '/add', item='one').headers_dict['set-cookie'])['sid'].value
+    izi.test.get(izi_api, '/add', item='two', headers={'Cookie': 'sid={}'.format(sid)})
+    assert store.get(sid) == {'cart': ['one', 'two']}
+
+
 def test_logging_middleware():
     output = []
 
@@ -150,3 +320,84 @@ def test_cors_middleware(izi_api):
     assert set(methods.split(',')) == set(['OPTIONS', 'GET', 'DELETE', 'PUT'])
     assert set(allow.split(',')) == set(['OPTIONS', 'GET', 'DELETE', 'PUT'])
     assert response.headers_dict['access-control-max-age'] == '10'
+
+    @izi.patch('/demo/{param}/detail/{other}', api=izi_api)
+    def patch_demo(param, other):
+        return other
+
+    response = izi.test.options(izi_api, '/demo/a.b/detail/c', headers={'Origin': 'http://example.com',
+                                                                          'Access-Control-Request-Headers': 'X-Test'})
+    assert response.headers_dict['access-control-allow-methods'] == 'OPTIONS, PATCH'
+    assert response.headers_dict['access-control-allow-origin'] == 'http://example.com'
+    assert response.headers_dict['access-control-allow-headers'] == 'X-Test'
+    assert response.headers_dict['vary'] == 'Origin,Access-Control-Request-Headers'
+    assert izi.test.options(izi_api, '/unknown').headers_dict['access-control-allow-methods'] == 'OPTIONS'
+
+
+def test_cors_middleware_origins(izi_api):
+    middleware = CORSMiddleware(izi_api, allow_origins=['http://allowed.com'], allow_credentials=False)
+    izi_api.http.add_middleware(middleware)
+    izi_api.http.base_url = '/api'
+
+    @izi.get('/cors', api=izi_api)
+    def cors():
+        return True
+
+    response = izi.test.get(izi_api, '/api/cors', headers={'Origin': 'http://allowed.com'})
+    assert response.headers_dict['access-control-allow-origin'] == 'http://allowed.com'
+    assert response.headers_dict['access-control-allow-credentials'] == 'false'
+    assert 'access-control-allow-origin' not in izi.test.get(izi_api, '/api/cors',
+                                                             headers={'Origin': 'http://other.com'}).headers_dict
+    assert middleware.match_route('/api/v2/cors') == '/cors'
+    assert middleware.match_route('/api/cors/') == '/cors'
+    assert middleware.match_route('/cors') == '/cors'
+    assert middleware.match_route('/other') == '/other'
+
+    for index in range(150):
+        izi.get('/many/{0}/{{param}}'.format(index), api=izi_api)(cors)
+    assert middleware.match_route('/api/many/120/value') == '/many/120/{param}'
+
+
+def test_profile_middleware(izi_api, tmpdir):
+    """Test to ensure sampled and slow requests are profiled, keeping only the most recent profiles"""
+    middleware = ProfileMiddleware(sample_rate=1, keep=2, api=izi_api)
+    izi_api.http.add_middleware(middleware)
+
+    @izi.get(api=izi_api)
+    def profiled(name):
+        return 'Hello {0}'.format(name)
+
+    for name in ('first', 'second', 'third'):
+        assert izi.test.get(izi_api, '/profiled', name=name).data == 'Hello {0}'.format(name)
+
+    assert len(middleware.profiles) == 2
+    summary = middleware.summary()
+    assert [profile['path'] for profile in summary] == ['/profiled', '/profiled']
+    assert all(profile['duration'] >= 0 for profile in summary)
+    assert 'profiled' in middleware.report()
+
+    response = izi.test.get(izi_api, '/_profiles/0')
+    assert response.status == izi.HTTP_200
+    assert 'function calls' in response.data
+    assert izi.test.get(izi_api, '/_profiles/10').status == izi.HTTP_404
+    assert [profile['path'] for profile in izi.test.get(izi_api, '/_profiles').data] == ['/profiled', '/profiled']
+
+    paths = middleware.dump(str(tmpdir))
+    assert len(paths) == 2 and all(path.endswith('.pstats') for path in paths)
+
+    slow_only = ProfileMiddleware(sample_rate=0, threshold=60, context_name='slow_only')
+    slow = ProfileMiddleware(sample_rate=0, threshold=0, context_name='slow')
+    sampled = ProfileMiddleware(sample_rate=1, threshold=60, context_name='sampled')
+    for added in (slow_only, slow, sampled):
+        izi_api.http.add_middleware(added)
+    izi.test.get(izi_api, '/profiled', name='fast')
+    assert not slow_only.profiles
+    assert len(slow.profiles) == 1
+    assert len(sampled.profiles) == 1
+
+    @izi.get(api=izi_api)
+    def _profilesX():
+        return 'not a profile route'
+
+    izi.test.get(izi_api, '/_profilesX')
+    assert middleware.summary()[0]['path'] == '/_profilesX'
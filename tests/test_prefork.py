@@ -0,0 +1,236 @@
+"""tests/test_prefork.py.
+
+Tests to ensure the production prefork server handles HTTP/1.1 connections and manages its workers correctly
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import izi
+from izi.prefork import Connection, Worker
+
+api = izi.API(__name__)
+
+
+@izi.get(api=api, output=izi.output_format.text)
+def hello(name='world'):
+    return 'Hello {0}'.format(name)
+
+
+@izi.post(api=api)
+def echo(body):
+    return body
+
+
+def streamed(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return (part for part in (b'Hello ', b'', b'world'))
+
+
+def exchange(app, request):
+    """Sends the raw request to a worker serving the app, returning the raw response and if the connection was kept"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    client, server = socket.socketpair()
+    try:
+        connection = Connection(server, ('127.0.0.1', 1234))
+        client.sendall(request)
+        worker = Worker(app, listener)
+        keep_alive = worker.handle(connection)
+        while keep_alive and connection.buffer:
+            keep_alive = worker.handle(connection)
+        server.shutdown(socket.SHUT_WR)
+        response = b''.join(iter(lambda: client.recv(65536), b''))
+        return response, keep_alive
+    finally:
+        for endpoint in (listener, client, server):
+            endpoint.close()
+
+
+def test_worker_keep_alive():
+    """Test to ensure workers keep connections alive, handling pipelined requests in order"""
+    app = api.http.server()
+    response, keep_alive = exchange(app, b'GET /hello HTTP/1.1\r\nHost: izi\r\n\r\n'
+                                         b'GET /hello?name=izi HTTP/1.1\r\nHost: izi\r\n\r\n')
+    assert keep_alive
+    assert response.count(b'HTTP/1.1 200 OK') == 2
+    assert response.index(b'Hello world') < response.index(b'Hello izi')
+    assert b'Connection: close' not in response
+
+    response, keep_alive = exchange(app, b'GET /hello HTTP/1.1\r\nHost: izi\r\nConnection: close\r\n\r\n')
+    assert not keep_alive
+    assert b'Connection: close' in response
+
+    response, keep_alive = exchange(app, b'GET /hello HTTP/1.0\r\n\r\n')
+    assert not keep_alive
+
+    response, keep_alive = exchange(app, b'GET /hello HTTP/1.0\r\nConnection: keep-alive\r\n\r\n')
+    assert keep_alive
+    assert b'Connection: keep-alive' in response
+
+
+def test_worker_bodies():
+    """Test to ensure workers read request bodies of either framing and frame responses of unknown length"""
+    app = api.http.server()
+    response, keep_alive = exchange(app, b'POST /echo HTTP/1.1\r\nHost: izi\r\nContent-Type: application/json\r\n'
+                                         b'Content-Length: 10\r\n\r\n{"a": "b"}')
+    assert keep_alive and response.endswith(b'{"a": "b"}')
+
+    response, keep_alive = exchange(app, b'POST /echo HTTP/1.1\r\nHost: izi\r\nContent-Type: application/json\r\n'
+                                         b'Transfer-Encoding: chunked\r\n\r\n5\r\n{"a":\r\n5\r\n "b"}\r\n0\r\n\r\n'
+                                         b'GET /hello HTTP/1.1\r\nHost: izi\r\n\r\n')
+    assert keep_alive
+    assert b'{"a": "b"}' in response and response.endswith(b'Hello world')
+
+    response, keep_alive = exchange(streamed, b'GET / HTTP/1.1\r\nHost: izi\r\n\r\n')
+    assert keep_alive
+    assert b'Transfer-Encoding: chunked' in response
+    assert response.endswith(b'\r\n\r\n6\r\nHello \r\n5\r\nworld\r\n0\r\n\r\n')
+
+    response, keep_alive = exchange(streamed, b'GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n')
+    assert not keep_alive and response.endswith(b'\r\n\r\nHello world')
+
+    response, keep_alive = exchange(streamed, b'HEAD / HTTP/1.1\r\nHost: izi\r\n\r\n')
+    assert keep_alive and response.endswith(b'\r\n\r\n')
+
+
+def test_worker_errors():
+    """Test to ensure workers reject malformed requests and report app failures without keeping the connection"""
+    def broken(environ, start_response):
+        raise RuntimeError('broken')
+
+    response, keep_alive = exchange(api.http.server(), b'NOT HTTP\r\n\r\n')
+    assert not keep_alive and response.startswith(b'HTTP/1.1 400 Bad Request')
+
+    response, keep_alive = exchange(api.http.server(), b'GET / HTTP/1.1\r\nHost izi\r\n\r\n')
+    assert not keep_alive and response.startswith(b'HTTP/1.1 400 Bad Request')
+
+    response, keep_alive = exchange(broken, b'GET / HTTP/1.1\r\nHost: izi\r\n\r\n')
+    assert not keep_alive and response.startswith(b'HTTP/1.1 500 Internal Server Error')
+
+
+def test_worker_limits():
+    """Test to ensure workers bound the time taken to receive a request head and the size of chunked bodies"""
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    client, server = socket.socketpair()
+    stop = threading.Event()
+
+    def dribble():
+        for byte in b'GET /hello HTTP/1.1\r\nHost: izi\r\n\r\n':
+            if stop.wait(0.05):
+                return
+            client.sendall(bytes((byte, )))
+
+    sender = threading.Thread(target=dribble)
+    sender.start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(socket.timeout):
+            Worker(api.http.server(), listener, timeout=0.3).handle(Connection(server, ('127.0.0.1', 1234)))
+        assert time.monotonic() - started < 1
+        assert server.gettimeout() == 0.3
+    finally:
+        stop.set()
+        sender.join()
+        for endpoint in (listener, client, server):
+            endpoint.close()
+
+    client, server = socket.socketpair()
+    try:
+        client.sendall(b'4\r\nizi!\r\n4\r\nizi!\r\n0\r\n\r\n')
+        with pytest.raises(ValueError):
+            Worker.read_chunked(Connection(server, ('127.0.0.1', 1234)), limit=6)
+        client.sendall(b'4\r\nizi!\r\n0\r\n\r\n')
+        assert Worker.read_chunked(Connection(server, ('127.0.0.1', 1234)), limit=6) == b'izi!'
+    finally:
+        client.close()
+        server.close()
+
+
+SERVICE = '''
+import os
+import izi
+
+
+@izi.startup()
+def started(api):
+    with open({started!r}, 'a') as started_file:
+        started_file.write('{{0}}\\n'.format(os.getpid()))
+
+
+@izi.get()
+def pid():
+    return os.getpid()
+
+
+__izi__.http.prefork('127.0.0.1', 0, 2, display_intro=False, graceful_timeout=5)
+'''
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='The prefork server requires os.fork')
+def test_master(tmpdir):
+    """Test to ensure the master runs startup handlers per worker, replaces dead workers, and reloads gracefully"""
+    started = str(tmpdir.join('started'))
+    service = tmpdir.join('service.py')
+    service.write(SERVICE.format(started=started))
+
+    def workers():
+        return open(started).read().split() if os.path.exists(started) else []
+
+    environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.abspath(izi.__file__))))
+    master = subprocess.Popen([sys.executable, str(service)], stdout=subprocess.PIPE, env=environment)
+    try:
+        port = int(master.stdout.readline().decode('utf8').split(' with ')[0].rsplit(':', 1)[1])
+        wait_for(lambda: len(workers()) == 2)
+
+        client = socket.create_connection(('127.0.0.1', port))
+        client.sendall(b'GET /pid HTTP/1.1\r\nHost: izi\r\n\r\n'
+                       b'GET /pid HTTP/1.1\r\nHost: izi\r\nConnection: close\r\n\r\n')
+        responses = b''.join(iter(lambda: client.recv(65536), b'')).decode('utf8')
+        client.close()
+        assert responses.count('HTTP/1.1 200 OK') == 2
+        assert responses.rsplit('\r\n\r\n', 1)[1] in workers()
+
+        os.kill(int(workers()[0]), signal.SIGKILL)
+        wait_for(lambda: len(workers()) == 3)
+
+        master.send_signal(signal.SIGHUP)
+        wait_for(lambda: len(workers()) == 5)
+
+        master.send_signal(signal.SIGTERM)
+        assert master.wait(10) == 0
+    finally:
+        if master.poll() is None:
+            master.kill()
+        master.stdout.close()
@@ -0,0 +1,125 @@
+"""tests/test_rate_limit.py.
+
+Tests the rate limiting requirements included with izi
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import os
+import time
+
+import pytest
+
+import izi
+from izi.rate_limit import RateLimit, SlidingWindow, TokenBucket
+from izi.store import SharedMemoryStore
+
+api = izi.API(__name__)
+
+
+def test_token_bucket():
+    bucket = TokenBucket(2, per=1.0, burst=3)
+    state = None
+    for request in range(3):
+        state = bucket(state, 100.0)
+        assert state[-1] == 0.0
+    state = bucket(state, 100.0)
+    assert state[-1] == pytest.approx(0.5)
+    state = bucket(state, 100.5)
+    assert state[-1] == 0.0
+    assert bucket(None, 0)[0] == 2.0
+
+
+def test_sliding_window():
+    window = SlidingWindow(4, window=10)
+    state = None
+    for request in range(4):
+        state = window(state, 101.0)
+        assert state[-1] == 0.0
+    state = window(state, 105.0)
+    assert state[-1] == pytest.approx(5.0)
+
+    for request in range(2):
+        state = window(state, 115.0)
+        assert state[-1] == 0.0
+    state = window(state, 115.0)
+    assert state[-1] == pytest.approx(2.5)
+    state = window(state, 117.5)
+    assert state[-1] == 0.0
+    assert window(state, 140.0)[1:3] == (1, 0)
+
+
+@pytest.mark.parametrize('store', (None, ) + ((SharedMemoryStore(slots=64, slot_size=256), )
+                                               if hasattr(os, 'fork') else ()))
+def test_rate_limit_requirement(store):
+    limit = izi.rate_limit.token_bucket(2, per=60, key=('route', 'ip'), store=store)
+
+    @izi.get(requires=limit)
+    def limited():
+        return 'limited'
+
+    @izi.get(requires=izi.rate_limit.sliding_window(1, key=lambda request: request.get_header('X-Client')))
+    def per_client():
+        return 'client'
+
+    assert izi.test.get(api, 'limited').data == 'limited'
+    assert izi.test.get(api, 'limited').data == 'limited'
+    response = izi.test.get(api, 'limited')
+    assert response.status == '429 Too Many Requests'
+    assert 25 <= int(response.headers_dict['retry-after']) <= 30
+    assert 'Too Many Requests' in response.data['errors']
+
+    class Request(object):
+        uri_template = path = '/limited'
+        remote_addr = '127.0.0.1'
+
+    limit.reset(Request())
+    assert izi.test.get(api, 'limited').data == 'limited'
+
+    assert izi.test.get(api, 'per_client', headers={'X-Client': 'a'}).data == 'client'
+    assert izi.test.get(api, 'per_client', headers={'X-Client': 'b'}).data == 'client'
+    assert izi.test.get(api, 'per_client', headers={'X-Client': 'a'}).status == '429 Too Many Requests'
+
+    assert limited() == 'limited'
+
+
+def test_token_bucket_outlives_refill(izi_api):
+    limit = izi.rate_limit.token_bucket(1, per=0.1, burst=100)
+    izi_api.route.http.get(requires=limit)(lambda: 'refilled')
+    assert limit.ttl == pytest.approx(10.0)
+
+    allowed = 0
+    while izi.test.get(izi_api, '/<lambda>').status == '200 OK':
+        allowed += 1
+    assert allowed >= 100
+
+    time.sleep(0.25)
+    allowed = 0
+    while izi.test.get(izi_api, '/<lambda>').status == '200 OK':
+        allowed += 1
+    assert 1 <= allowed <= 10
+
+
+def test_rate_limit_metrics(izi_api):
+    metrics = izi_api.http.add_metrics()
+    limit = RateLimit(TokenBucket(1, per=60))
+    izi_api.route.http.get(requires=limit)(lambda: 'once')
+
+    assert izi.test.get(izi_api, '/<lambda>').data == 'once'
+    assert izi.test.get(izi_api, '/<lambda>').status == '429 Too Many Requests'
+    assert metrics.rate_limits == {('/<lambda>', 'allowed'): 1, ('/<lambda>', 'limited'): 1}
+    assert 'izi_rate_limit_decisions_total{route="/<lambda>",decision="limited"} 1' in metrics.prometheus()
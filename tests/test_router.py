@@ -0,0 +1,127 @@
+"""tests/test_router.py.
+
+Tests to ensure the router izi builds servers with routes and caches identically to the falcon router
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import marshal
+import os
+import stat
+
+import pytest
+from falcon.routing import CompiledRouter
+
+import izi
+from izi.router import Router
+
+TEMPLATES = ('/', '/items', '/items/{item_id}', '/items/{item_id}/parts/{part}', '/items/latest', '/files/{name}.{ext}',
+             '/files/{name}.{ext}/size', '/numbers/{number:int}', '/v{api_version}/items/{item_id}')
+
+
+def test_router_matches_falcon():
+    """Test to ensure the router generates the same finder and raises the same conflicts as the falcon router"""
+    router, falcon_router = Router(), CompiledRouter()
+    for template in TEMPLATES:
+        router.add_route(template, {'GET': template}, template)
+        falcon_router.add_route(template, {'GET': template}, template)
+
+    for template in ('/items/{identifier}', '/files/{base}.{extension}'):
+        with pytest.raises(ValueError) as error:
+            router.add_route(template, {}, None)
+        with pytest.raises(ValueError) as falcon_error:
+            falcon_router.add_route(template, {}, None)
+        assert str(error.value) == str(falcon_error.value)
+
+    assert router.find('/items/10/parts/wheel')[1:] == falcon_router.find('/items/10/parts/wheel')[1:]
+    assert router.find('/numbers/10')[1:] == ({'GET': '/numbers/{number:int}'}, {'number': 10},
+                                             '/numbers/{number:int}')
+    assert router.find('/numbers/ten') is None
+    assert router.finder_src == falcon_router.finder_src
+
+
+def test_router_cache(tmpdir):
+    """Test to ensure the compiled router is cached on disk, keyed by the routes it contains"""
+    def router(*templates):
+        router = Router(str(tmpdir))
+        for template in templates:
+            router.add_route(template, {'GET': template}, template)
+        router.compile()
+        return router
+
+    assert router('/items/{item_id}').find('/items/1')[2] == {'item_id': '1'}
+    cached = set(os.listdir(str(tmpdir)))
+    assert router('/items/{item_id}').find('/items/2')[2] == {'item_id': '2'}
+    assert set(os.listdir(str(tmpdir))) == cached
+
+    assert router('/items/{item_id}', '/parts').find('/parts')[0] == '/parts'
+    assert len(os.listdir(str(tmpdir))) == len(cached) + 1
+
+    for name in os.listdir(str(tmpdir)):
+        with open(os.path.join(str(tmpdir), name), 'wb') as corrupted:
+            corrupted.write(b'not marshaled')
+    assert router('/items/{item_id}').find('/items/3')[2] == {'item_id': '3'}
+
+
+@pytest.mark.skipif(not hasattr(os, 'getuid'), reason='file ownership is not available on this platform')
+def test_router_cache_untrusted(tmpdir):
+    """Test to ensure cached routers are only loaded from private directories, from files the current user owns"""
+    cache = os.path.join(str(tmpdir), 'cache')
+    router = Router(cache)
+    router.add_route('/items', {'GET': 'items'}, 'items')
+    router.compile()
+    assert stat.S_IMODE(os.stat(cache).st_mode) & 0o077 == 0
+
+    def forge():
+        for name in os.listdir(cache):
+            with open(os.path.join(cache, name), 'wb') as forged:
+                marshal.dump(compile('def find(*args):\n    return None', '<string>', 'exec'), forged)
+
+    def found():
+        router = Router(cache)
+        router.add_route('/items', {'GET': 'items'}, 'items')
+        router.compile()
+        return router.find('/items')
+
+    forge()
+    assert found() is None
+
+    forge()
+    os.chmod(cache, 0o777)
+    assert found()[0] == 'items'
+    os.chmod(cache, 0o700)
+
+    if os.getuid() == 0:
+        forge()
+        for name in os.listdir(cache):
+            os.chown(os.path.join(cache, name), 1, -1)
+        assert found()[0] == 'items'
+
+
+def test_api_router_cache(tmpdir):
+    """Test to ensure APIs can be configured to cache their compiled router"""
+    api = izi.API('test_api_router_cache')
+
+    @izi.get(api=api, versions=(1, 2))
+    def hello_world(name='world'):
+        return 'Hello {0}'.format(name)
+
+    api.http.router_cache = str(tmpdir)
+    for _ in range(2):
+        assert izi.test.get(api, '/v1/hello_world', name='izi').data == 'Hello izi'
+        assert izi.test.get(api, '/v2/hello_world').data == 'Hello world'
+    assert len(os.listdir(str(tmpdir))) == 1
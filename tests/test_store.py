@@ -19,14 +19,24 @@ CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFT
 OTHER DEALINGS IN THE SOFTWARE.
 
 """
+import asyncio
+import os
+from threading import Thread
+
 import pytest
 
-from izi.exceptions import StoreKeyNotFound
-from izi.store import InMemoryStore
+import izi.store
+from izi.exceptions import StoreFull, StoreKeyNotFound
+from izi.store import AsyncInMemoryStore, InMemoryStore, SharedMemoryStore, ThreadPoolStore
 
+shared_memory = hasattr(os, 'fork')
+requires_shared_memory = pytest.mark.skipif(not shared_memory, reason='SharedMemoryStore requires fcntl and os.fork')
 stores_to_test = [
-    InMemoryStore()
+    InMemoryStore(),
+    InMemoryStore(shards=1, ttl=60, max_entries=10, max_bytes=1024),
 ]
+if shared_memory:
+    stores_to_test.append(SharedMemoryStore(slots=16, slot_size=512))
 
 
 @pytest.mark.parametrize('store', stores_to_test)
@@ -52,3 +62,191 @@ def test_stores_generically(store):
     # Delete key
     store.delete(key)
     assert not store.exists(key)
+
+
+def test_in_memory_store_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(izi.store, 'monotonic', lambda: now[0])
+    store = InMemoryStore(ttl=10, sweep_interval=60)
+    store.set('default', 1)
+    store.set('short', 2, ttl=1)
+    store.set('long', 3, ttl=1000)
+    assert store.get('short') == 2
+
+    now[0] += 5
+    assert not store.exists('short')
+    assert store.get('default') == 1
+    with pytest.raises(StoreKeyNotFound):
+        store.get('short')
+
+    now[0] += 10
+    assert store.sweep() == 1
+    assert len(store) == 1
+    assert store.get('long') == 3
+    assert store.stats()['expirations'] == 2
+
+    store.set('swept', 4, ttl=1)
+    now[0] += 100
+    store.set('triggers_sweep', 5)
+    assert len(store) == 2
+
+
+def test_in_memory_store_lru_eviction():
+    store = InMemoryStore(shards=1, max_entries=3)
+    for key in 'abc':
+        store.set(key, key)
+    store.get('a')
+    store.set('d', 'd')
+    assert not store.exists('b')
+    assert all(store.exists(key) for key in 'acd')
+
+    store = InMemoryStore(shards=1, max_bytes=100, sizeof=len)
+    store.set('first', 'x' * 60)
+    store.set('second', 'x' * 60)
+    assert not store.exists('first')
+    assert store.exists('second')
+    store.set('oversized', 'x' * 200)
+    assert store.exists('oversized') and len(store) == 1
+
+    stats = store.stats()
+    assert stats['evictions'] == 2
+    assert stats['bytes'] == 200
+
+    store = InMemoryStore(shards=4, max_entries=10, max_bytes=1000)
+    assert (store.max_entries, store.shard_entries) == (10, 3)
+    assert (store.max_bytes, store.shard_bytes) == (1000, 250)
+    for key in range(100):
+        store.set(key, key)
+    assert len(store) <= 4 * store.shard_entries
+    assert all(len(shard.data) <= store.shard_entries for shard in store._shards)
+
+
+def test_in_memory_store_counters_and_threads():
+    store = InMemoryStore(shards=4)
+
+    def work(offset):
+        for index in range(200):
+            store.set((offset, index), index)
+            assert store.get((offset, index)) == index
+            store.delete((offset, index - 1))
+
+    threads = [Thread(target=work, args=(offset, )) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with pytest.raises(StoreKeyNotFound):
+        store.get('missing')
+    stats = store.stats()
+    assert stats['entries'] == len(store) == 8
+    assert stats['hits'] == 1600
+    assert stats['misses'] == 1
+
+
+@requires_shared_memory
+def test_shared_memory_store(tmpdir, monkeypatch):
+    path = str(tmpdir.join('store'))
+    store = SharedMemoryStore(path, slots=4, slot_size=256, ttl=10)
+    store.set('a', {'user': 'a'})
+    store.set('b', [1, 2, 3], ttl=1)
+
+    other = SharedMemoryStore(path, slots=1, slot_size=1)
+    assert (other.slots, other.slot_size) == (4, 256)
+    assert other.get('a') == {'user': 'a'}
+    other.set('a', {'user': 'changed'})
+    assert store.get('a') == {'user': 'changed'}
+
+    store.set('c', 'c')
+    store.set('d', 'd')
+    with pytest.raises(StoreFull):
+        store.set('e', 'e')
+    with pytest.raises(StoreFull):
+        store.set('a', 'x' * 1024)
+
+    now = izi.store.time()
+    monkeypatch.setattr(izi.store, 'time', lambda: now + 5)
+    assert not store.exists('b')
+    store.set('e', 'e')
+    assert store.get('e') == 'e'
+    store.delete('e')
+    with pytest.raises(StoreKeyNotFound):
+        other.get('e')
+    store.close()
+    other.close()
+
+
+@requires_shared_memory
+def test_shared_memory_store_tombstones():
+    store = SharedMemoryStore(slots=16, slot_size=256)
+    assert os.path.exists(store.path)
+    for index in range(45):
+        store.set(index, index)
+        if index % 3:
+            store.delete(index)
+        assert store._count_tombstones(store._memory, 0) <= store.slots // 4
+
+    with pytest.raises(StoreKeyNotFound):
+        store.get(1)
+    assert [store.get(index) for index in range(0, 45, 3)] == list(range(0, 45, 3))
+    store.close()
+    assert not os.path.exists(store.path)
+
+
+@requires_shared_memory
+def test_shared_memory_store_across_processes(tmpdir):
+    store = SharedMemoryStore(str(tmpdir.join('store')), slots=64, slot_size=256)
+    store.set('parent', 1)
+
+    children = []
+    for child in range(4):
+        pid = os.fork()
+        if not pid:
+            try:
+                for index in range(10):
+                    store.set(('child', child, index), store.get('parent') + index)
+            finally:
+                os._exit(0)
+        children.append(pid)
+    for pid in children:
+        os.waitpid(pid, 0)
+
+    assert all(store.get(('child', child, index)) == 1 + index for child in range(4) for index in range(10))
+
+
+@pytest.mark.parametrize('store', [AsyncInMemoryStore(), ThreadPoolStore(InMemoryStore())])
+def test_async_stores(store):
+    loop = asyncio.get_event_loop()
+    key = 'test-key'
+    data = {'user': 'foo'}
+
+    assert not loop.run_until_complete(store.aexists(key))
+    loop.run_until_complete(store.aset(key, data))
+    assert loop.run_until_complete(store.aexists(key))
+    assert store.exists(key)
+    assert loop.run_until_complete(store.aget(key)) == data
+
+    with pytest.raises(StoreKeyNotFound):
+        loop.run_until_complete(store.aget('unknown'))
+
+    loop.run_until_complete(store.adelete(key))
+    assert not loop.run_until_complete(store.aexists(key))
+
+
+def test_thread_pool_store_ttl(monkeypatch):
+    store = ThreadPoolStore(InMemoryStore())
+    store.set('sync', 1, ttl=10)
+    asyncio.get_event_loop().run_until_complete(store.aset('async', 2, ttl=10))
+
+    now = izi.store.monotonic()
+    monkeypatch.setattr(izi.store, 'monotonic', lambda: now + 20)
+    assert not store.exists('sync')
+    assert not store.exists('async')
+
+
+@pytest.mark.parametrize('store', [InMemoryStore(shards=2)] +
+                         ([SharedMemoryStore(slots=8, slot_size=256)] if shared_memory else []))
+def test_stores_update(store):
+    assert store.update('counter', lambda count: (count or 0) + 1) == 1
+    assert store.update('counter', lambda count: (count or 0) + 1, ttl=60) == 2
+    assert store.get('counter') == 2
@@ -0,0 +1,65 @@
+"""tests/test_test.py.
+
+Tests the utilities IZIR provides for round-trip testing of APIs
+
+Copyright (C) 2018 DiepDT-IZIGlobal
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
+documentation files (the "Software"), to deal in the Software without restriction, including without limitation
+the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software, and
+to permit persons to whom the Software is furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all copies or
+substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED
+TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL
+THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF
+CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+OTHER DEALINGS IN THE SOFTWARE.
+
+"""
+import izi
+
+
+def test_server_is_cached_until_routes_change(izi_api):
+    """Test to ensure the WSGI server used for testing is only rebuilt when the API's routing changes"""
+    started = []
+
+    @izi.startup(api=izi_api)
+    def on_startup(api):
+        started.append(api)
+
+    @izi.get(api=izi_api)
+    def first():
+        return 'first'
+
+    assert izi.test.get(izi_api, 'first').data == 'first'
+    server = izi_api.http.cached_server()
+    assert izi.test.get(izi_api, 'first').data == 'first'
+    assert izi_api.http.cached_server() is server
+    assert started == [izi_api]
+
+    @izi.get(api=izi_api)
+    def second():
+        return 'second'
+
+    assert izi.test.get(izi_api, 'second').data == 'second'
+    assert izi_api.http.cached_server() is not server
+    assert started == [izi_api]
+
+
+def test_client(izi_api):
+    """Test to ensure the lightweight test client can make round-trip calls, optionally skipping decoding"""
+    @izi.post(api=izi_api)
+    def echo(body, times: izi.types.number=1, request=None):
+        return {'body': body, 'times': times, 'header': request.get_header('X-Custom')}
+
+    client = izi.test.Client(izi_api)
+    response = client.post('/echo', {'name': 'izi'}, headers={'X-Custom': 'yes'}, times=2)
+    assert response.status == izi.HTTP_200
+    assert response.data == {'body': {'name': 'izi'}, 'times': 2, 'header': 'yes'}
+
+    raw = izi.test.Client(izi_api, decode=False).call('POST', '/echo', b'text', headers={'content-type': 'text/plain'})
+    assert raw.data == b'{"body": "text", "times": 1, "header": null}'
+    assert raw.content_type.startswith('application/json')
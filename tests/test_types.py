@@ -20,10 +20,13 @@ OTHER DEALINGS IN THE SOFTWARE.
 
 """
 import json
+import threading
+import time
 import urllib
+from array import array
 from datetime import datetime
 from decimal import Decimal
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 from marshmallow import Schema, fields
@@ -98,6 +101,37 @@ def test_delimited_list():
     assert ',' in izi.types.delimited_list(',').__doc__
 
 
+def test_bulk_scalar_lists():
+    """Test that lists of known scalar types convert in bulk, keeping the same per item errors"""
+    assert izi.types.DelimitedList[izi.types.number]()('1,2,3') == [1, 2, 3]
+    assert izi.types.Multiple[izi.types.float_number]()(['1.5', '2']) == [1.5, 2.0]
+    assert izi.types.DelimitedList[izi.types.decimal]()('1.10,2') == [Decimal('1.10'), Decimal('2')]
+    identifier = uuid4()
+    assert izi.types.Multiple[izi.types.uuid]()(str(identifier)) == [identifier]
+
+    with pytest.raises(ValueError) as error:
+        izi.types.DelimitedList[izi.types.number]()('1,two,3')
+    assert str(error.value) == 'Invalid whole number provided'
+    with pytest.raises(ValueError) as error:
+        izi.types.Multiple[izi.types.uuid]()(['not a uuid'])
+    assert str(error.value) == 'Invalid UUID provided'
+
+    as_array = izi.types.DelimitedList[izi.types.number](output='array')('1,2,3')
+    assert isinstance(as_array, array) and as_array.tolist() == [1, 2, 3]
+    assert izi.types.Multiple[izi.types.float_number](output='array')('1.5').tolist() == [1.5]
+    with pytest.raises(ValueError) as error:
+        izi.types.DelimitedList[izi.types.number](output='array')(str(2 ** 70))
+    assert str(error.value) == 'Invalid whole number provided'
+    with pytest.raises(ValueError):
+        izi.types.DelimitedList[izi.types.uuid](output='array')
+    with pytest.raises(ValueError):
+        izi.types.Multiple[izi.types.number](output='set')
+
+    numpy = pytest.importorskip('numpy')
+    as_ndarray = izi.types.DelimitedList[izi.types.number](output='ndarray')('1,2,3')
+    assert isinstance(as_ndarray, numpy.ndarray) and as_ndarray.tolist() == [1, 2, 3]
+
+
 def test_comma_separated_list():
     """Tests that izi's comma separated type correctly converts into a Python list"""
     assert izi.types.comma_separated_list('value') == ['value']
@@ -134,6 +168,9 @@ def test_boolean():
 def test_mapping():
     """Test to ensure the mapping type works as expected"""
     mapping_type = izi.types.mapping({'n': None, 'l': [], 's': set()})
+    assert izi.types.mapping((('a', 1), ('b', 2)))('b') == 2
+    with pytest.raises(KeyError):
+        mapping_type(['n'])
     assert mapping_type('n') is None
     assert mapping_type('l') == []
     assert mapping_type('s') == set()
@@ -251,6 +288,11 @@ def test_inline_dictionary():
     int_dict = izi.types.InlineDictionary[int, int, int]()
     assert int_dict('1:2') == {1: 2}
 
+    assert izi.types.inline_dictionary(' a : b | c:d') == {'a': 'b', 'c': 'd'}
+    for invalid in ('', '1:2|', '1:2:3', '1:2||3:4'):
+        with pytest.raises(ValueError):
+            izi.types.inline_dictionary(invalid)
+
 
 
 def test_one_of():
@@ -262,6 +304,14 @@ def test_one_of():
     with pytest.raises(KeyError):
         izi.types.one_of({'bacon', 'sausage', 'pancakes'})('syrup')
 
+    breakfast = izi.types.one_of(['bacon', 'sausage', 'pancakes'])
+    assert breakfast.accepted == frozenset(('bacon', 'sausage', 'pancakes'))
+    assert breakfast.values == ['bacon', 'sausage', 'pancakes']
+    with pytest.raises(KeyError) as error:
+        breakfast(['bacon'])
+    assert 'bacon|sausage|pancakes' in str(error.value)
+    assert izi.types.one_of([1, [2]])(1) == 1
+
 
 def test_accept():
     """Tests to ensure the accept type wrapper works as expected"""
@@ -313,6 +363,54 @@ def test_multi():
         multi_type('Bacon!')
 
 
+def test_multi_accepts():
+    """Test that multi types skip members whose accepts predicate rejects a value, and keep their declared order"""
+    identifier = uuid4()
+    calls = []
+
+    @izi.type(extend=izi.types.number, accepts=lambda value: isinstance(value, str) and value.startswith('#'))
+    def tagged(value):
+        calls.append(value)
+        return value
+
+    @izi.type(chain=False)
+    def interrupted(value):
+        raise KeyboardInterrupt()
+
+    identifier_type = izi.types.multi(izi.types.number, izi.types.uuid)
+    assert identifier_type('42') == 42
+    assert identifier_type(str(identifier)) == identifier
+    assert identifier_type(' 7 ') == 7
+    with pytest.raises(ValueError):
+        identifier_type('neither')
+
+    assert izi.types.multi(tagged, izi.types.text)('hello') == 'hello'
+    assert not calls
+    assert izi.types.multi(izi.types.text, izi.types.number)('5') == '5'
+    assert izi.types.multi(izi.types.uuid, izi.types.text)(10) == '10'
+
+    @izi.type(extend=izi.types.text, accepts=lambda value: value.startswith('sku-'))
+    def sku(value):
+        """A product SKU"""
+        return value[4:]
+
+    product_type = izi.types.multi(izi.types.number, sku)
+    assert product_type('sku-1') == '1'
+    with pytest.raises(ValueError) as error:
+        product_type(['sku-1', 'sku-2'])
+    assert str(error.value) == product_type.__doc__
+    assert 'A product SKU' in product_type.__doc__
+
+    assert izi.types.number.accepts('-12') and not izi.types.number.accepts('twelve')
+    assert izi.types.float_number.accepts('1e5') and izi.types.float_number.accepts('inf')
+    assert not izi.types.float_number.accepts('e')
+    assert izi.types.uuid.accepts('{' + str(identifier) + '}') and not izi.types.uuid.accepts('1234')
+    assert izi.types.text.accepts('text') and not izi.types.text.accepts(None)
+
+    with pytest.raises(KeyboardInterrupt):
+        izi.types.multi(interrupted, izi.types.text)('value')
+
+
 def test_chain():
     """Test to ensure that chaining together multiple types works as expected"""
     chain_type = izi.types.Chain(izi.types.text, izi.types.LongerThan(10))
@@ -356,6 +454,79 @@ def test_schema_type():
     assert user_one.password == "password123"
 
 
+def test_schema_type_compiled():
+    """Test that schema types are compiled into slotted classes with batch construction and native output"""
+    class User(izi.types.Schema):
+        username = izi.types.text
+        age = izi.types.number
+
+    class Admin(User):
+        level = izi.types.number
+
+    user = User({'username': 'brandon', 'age': '30'})
+    assert user.__dict__ == {}
+    assert user.__native_types__() == {'username': 'brandon', 'age': 30}
+    assert User({'username': 'brandon'}).__native_types__() == {'username': 'brandon', 'age': None}
+    extra = User({'username': 'brandon', 'unknown': True})
+    assert extra.unknown is True
+    assert extra.__dict__ == {'unknown': True}
+    assert extra.__native_types__() == {'username': 'brandon', 'age': None}
+    assert User({'username': 'brandon', 'unknown': True}, force=True)._unknown is True
+
+    class Extended(User):
+        __slots__ = ('__dict__', )
+        note = izi.types.text
+
+    assert Extended({'note': 'kept', 'other': 1}).other == 1
+
+    admin = Admin({'username': 'root', 'age': 40, 'level': '3'})
+    assert admin.__dict__ == {}
+    assert admin.__native_types__() == {'username': 'root', 'age': 40, 'level': 3}
+    with pytest.raises(ValueError):
+        admin.level = 'high'
+
+    users = User.many([{'username': 'one', 'age': 1}, user, {'username': 'two', 'age': '2'}])
+    assert [found.age for found in users] == [1, 30, 2]
+    assert users[1] is user
+    with pytest.raises(ValueError):
+        User.many([{'username': 'one', 'age': 'one'}])
+
+    @izi.get()
+    def users_endpoint(users: User.many):
+        return users
+
+    assert izi.test.get(api, 'users_endpoint', body={'users': [{'username': 'one', 'age': 1}]}).data == \
+        [{'username': 'one', 'age': 1}]
+
+
+def test_schema_type_inherits_custom_methods():
+    """Test that hand written constructors and native types of a schema are kept by schemas extending it"""
+    class Base(izi.types.Schema):
+        name = izi.types.text
+
+        def __init__(self, json, force=False):
+            self._name = json['name'].upper()
+
+        def __native_types__(self):
+            return 'Base {0}'.format(self.name)
+
+    class Child(Base):
+        level = izi.types.number
+
+    child = Child({'name': 'izi', 'level': '1'})
+    assert child.name == 'IZI'
+    assert child.__native_types__() == 'Base IZI'
+    assert Child.__init__ is Base.__init__ and Child.__native_types__ is Base.__native_types__
+
+    class Plain(izi.types.Schema):
+        name = izi.types.text
+
+    class Extended(Plain):
+        level = izi.types.number
+
+    assert Extended({'name': 'izi', 'level': '1'}).__native_types__() == {'name': 'izi', 'level': 1}
+
+
 def test_marshmallow_schema():
     """Test izi's marshmallow schema support"""
     class UserSchema(Schema):
@@ -375,6 +546,48 @@ def test_marshmallow_schema():
         schema_type({"name": "test"})
 
 
+def test_marshmallow_schema_batches_and_context():
+    """Test that marshmallow schemas handle lists in one call and keep the context of each thread separate"""
+    class UserSchema(Schema):
+        name = fields.Int()
+        request = fields.Method('from_context')
+
+        def from_context(self, value):
+            time.sleep(0.001)
+            return self.context['request']
+
+    schema = UserSchema()
+    input_type = izi.types.MarshmallowInputSchema(schema)
+    with pytest.raises(InvalidTypeData):
+        input_type([{"name": 1}, {"name": "2"}], {})
+
+    many_type = izi.types.MarshmallowInputSchema(UserSchema(many=True))
+    assert many_type([{"name": 1}, {"name": "2"}], {}) == [{"name": 1}, {"name": 2}]
+    with pytest.raises(InvalidTypeData) as error:
+        many_type([{"name": 1}, {"name": "two"}], {})
+    assert 1 in error.value.reasons
+
+    return_type = izi.types.MarshmallowReturnSchema(schema)
+    assert return_type.shared_context is input_type.shared_context is schema.context
+    return_type.context = {'request': 0}
+    assert return_type([{"name": 1}, {"name": 2}]) == [{"name": 1, "request": 0}, {"name": 2, "request": 0}]
+
+    mismatches = []
+
+    def dump(request):
+        for attempt in range(20):
+            return_type.context = {'request': request}
+            if return_type({"name": request})['request'] != request:
+                mismatches.append(request)
+
+    threads = [threading.Thread(target=dump, args=(request, )) for request in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not mismatches
+
+
 def test_create_type():
     """Test izi's new type creation decorator works as expected"""
     @izi.type(extend=izi.types.text, exception_handlers={TypeError: ValueError, LookupError: 'Hi!'},
@@ -418,6 +631,42 @@ def test_create_type():
     assert numbered(['1', '2', '3'])('1') == 1
 
 
+def test_create_type_flattened_chain():
+    """Test that chained types run every step of the chain in a single call, rewriting errors per level"""
+    @izi.type(extend=izi.types.number, exception_handlers={ZeroDivisionError: 'Cannot be zero'})
+    def inverse(value):
+        return 1 / value
+
+    @izi.type(extend=inverse, error_text='Too small')
+    def at_least_half(value):
+        if value < 0.5:
+            raise LookupError('too small')
+        return value
+
+    assert len(type(at_least_half)._izi_steps) == 3
+    assert at_least_half('2') == 0.5
+    assert at_least_half('1', context={}) == 1
+    with pytest.raises(ValueError) as error:
+        inverse('0')
+    assert str(error.value) == 'Cannot be zero'
+    with pytest.raises(ValueError) as error:
+        at_least_half('0')
+    assert str(error.value) == 'Too small'
+    with pytest.raises(ValueError) as error:
+        at_least_half('4')
+    assert str(error.value) == 'Too small'
+    with pytest.raises(ValueError) as error:
+        at_least_half('not a number')
+    assert str(error.value) == 'Too small'
+
+    @izi.type(extend=izi.types.text, chain=False)
+    def shout(value):
+        return value.upper()
+
+    assert len(type(shout)._izi_steps) == 1
+    assert shout('hi', context={}) == 'HI'
+
+
 def test_marshmallow_custom_context():
     custom_context = dict(context='global', factory=0, delete=0, marshmallow=0)
 